@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 # User
-from user.views import UserViewSet
+from user.views import RoleViewSet, UserViewSet
 
 # Meat Module
 from ezmeat.views import MeatAnimalViewSet, WeightRecordViewSet, SlaughterRecordViewSet
@@ -25,11 +25,21 @@ from ezcore.inventory_and_sales.views import (
     SaleViewSet, SaleItemViewSet, ExpenseViewSet
 )
 
+# Dashboard
+from ezcore.dashboard.views import DashboardView
+
+# Reports
+from ezcore.reports.views import FeedCostReportView, PnLReportView
+
+# Analytics
+from ezcore.analytics.views import AnimalProfitabilityView
+
 # Create main router for core entities
 router = DefaultRouter()
 
 # User
 router.register(r'users', UserViewSet, basename='user')
+router.register(r'roles', RoleViewSet, basename='role')
 
 # Meat module
 router.register(r'meat-animals', MeatAnimalViewSet, basename='meat-animal')
@@ -62,5 +72,9 @@ router.register(r'expenses', ExpenseViewSet, basename='expense')
 
 
 urlpatterns = [
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('reports/pnl/', PnLReportView.as_view(), name='report-pnl'),
+    path('reports/feed-cost/', FeedCostReportView.as_view(), name='report-feed-cost'),
+    path('analytics/animal-profitability/', AnimalProfitabilityView.as_view(), name='animal-profitability'),
     path('', include(router.urls)),
 ]
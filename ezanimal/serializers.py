@@ -17,7 +17,7 @@ class BreedSerializer(serializers.ModelSerializer):
     class Meta:
         model = Breed
         fields = [
-            'id', 'animal_type', 'birth_date', 'animal_type_name', 'name', 'description',
+            'id', 'animal_type', 'animal_type_name', 'name', 'description',
             'average_weight', 'average_height', 'average_milk_production',
             'lactation_period', 'average_meat_yield', 'growth_rate',
             'gestation_period', 'maturity_age', 'is_active'
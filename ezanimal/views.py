@@ -2,12 +2,13 @@ from rest_framework import viewsets, permissions, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from ezanimal.models import AnimalType, Breed
 from .serializers import AnimalTypeSerializer, BreedSerializer
+from ezcore.mixins import ReferenceDataMixin
 from ezcore.permissions import HasFarmAccess
 from django.http import HttpResponse
 
 
 
-class AnimalTypeViewSet(viewsets.ModelViewSet):
+class AnimalTypeViewSet(ReferenceDataMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and editing animal types."""
     queryset = AnimalType.objects.all()
     serializer_class = AnimalTypeSerializer
@@ -15,6 +16,7 @@ class AnimalTypeViewSet(viewsets.ModelViewSet):
     filterset_fields = ['farming_type', 'is_active']
     search_fields = ['name', 'description']
     ordering_fields = ['name']
+    capability = 'animals'
     
     def get_permissions(self):
         """
@@ -30,7 +32,7 @@ class AnimalTypeViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class BreedViewSet(viewsets.ModelViewSet):
+class BreedViewSet(ReferenceDataMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and editing breeds."""
     queryset = Breed.objects.all()
     serializer_class = BreedSerializer
@@ -38,6 +40,7 @@ class BreedViewSet(viewsets.ModelViewSet):
     filterset_fields = ['animal_type', 'is_active']
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'animal_type__name']
+    capability = 'animals'
     
     def get_permissions(self):
         """
@@ -7,8 +7,10 @@ from ezcore.health_and_feed.models import (
     FeedingSchedule, FeedingScheduleItem, FeedingRecord
 )
 from ezcore.inventory_and_sales.models import (
-    InventoryItem, InventoryTransaction, Sale, SaleItem, Expense
+    InventoryItem, InventoryTransaction, InventorySnapshot, Sale, SaleItem, Expense
 )
+from ezcore.analytics.models import AnimalProfitability
+from ezcore.dashboard.models import FarmDailySummary
 
 
 @admin.register(AnimalHealth)
@@ -83,12 +85,12 @@ class FeedingRecordAdmin(admin.ModelAdmin):
 
 @admin.register(InventoryItem)
 class InventoryItemAdmin(admin.ModelAdmin):
-    list_display = ('name', 'item_type', 'quantity', 'unit', 'unit_price', 'storage_location', 'is_active')
+    list_display = ('name', 'item_type', 'feed_type', 'quantity', 'unit', 'unit_price', 'storage_location', 'is_active')
     list_filter = ('item_type', 'is_active')
     search_fields = ('name', 'description', 'storage_location')
     fieldsets = (
         (None, {
-            'fields': ('name', 'item_type', 'description', 'is_active', 'owner')
+            'fields': ('name', 'item_type', 'feed_type', 'description', 'is_active', 'owner')
         }),
         (_('Inventory Details'), {
             'fields': ('quantity', 'unit', 'unit_price', 'storage_location', 'expiry_date')
@@ -111,6 +113,14 @@ class InventoryTransactionAdmin(admin.ModelAdmin):
     get_recorded_by.short_description = _('Recorded By')
 
 
+@admin.register(InventorySnapshot)
+class InventorySnapshotAdmin(admin.ModelAdmin):
+    list_display = ('date', 'item', 'quantity', 'unit_price', 'total_value')
+    list_filter = ('date',)
+    search_fields = ('item__name',)
+    date_hierarchy = 'date'
+
+
 @admin.register(Sale)
 class SaleAdmin(admin.ModelAdmin):
     list_display = ('invoice_number', 'sale_date', 'customer_name', 'sale_type', 'total_amount', 'payment_status')
@@ -137,6 +147,25 @@ class ExpenseAdmin(admin.ModelAdmin):
         return obj.recorded_by.get_full_name() if obj.recorded_by else '-'
     get_recorded_by.short_description = _('Recorded By')
 
+
+@admin.register(FarmDailySummary)
+class FarmDailySummaryAdmin(admin.ModelAdmin):
+    list_display = ('date', 'owner', 'milk_total', 'revenue', 'expenses', 'stock_usage_value')
+    list_filter = ('date',)
+    search_fields = ('owner__email', 'owner__farm_name')
+    date_hierarchy = 'date'
+
+
+@admin.register(AnimalProfitability)
+class AnimalProfitabilityAdmin(admin.ModelAdmin):
+    list_display = ('get_animal_tag', 'animal_kind', 'owner', 'total_cost', 'total_revenue', 'profit', 'is_stale')
+    list_filter = ('animal_kind', 'is_stale')
+    search_fields = ('dairy_animal__tag_number', 'meat_animal__tag_number', 'owner__email')
+    
+    def get_animal_tag(self, obj):
+        return obj.animal.tag_number
+    get_animal_tag.short_description = _('Animal Tag')
+
 # class UserAdmin(BaseUserAdmin):
 #     model = User
 #     list_display = ('email', 'is_staff', 'is_superuser')
@@ -0,0 +1,214 @@
+from decimal import Decimal
+
+import pandas as pd
+from django.conf import settings
+from django.db import models
+from django.db.models import DecimalField, F, Q, Sum
+from django.utils.translation import gettext_lazy as _
+
+from ezcore.db import month_of
+from ezcore.health_and_feed.costing import value_feeding
+from ezcore.health_and_feed.models import AnimalHealth, FeedingRecord, Vaccination
+from ezcore.inventory_and_sales.models import SaleItem
+from ezdairy.models import DairyAnimal, MilkProduction
+from ezmeat.models import MeatAnimal
+
+ANIMAL_MODELS = {'dairy': DairyAnimal, 'meat': MeatAnimal}
+LEDGER_FIELDS = [
+    'acquisition_cost', 'feed_amount', 'feed_cost', 'health_cost', 'vaccination_cost', 'total_cost',
+    'milk_amount', 'milk_revenue', 'sale_revenue', 'total_revenue', 'profit',
+]
+
+
+def milk_prices(owner_ids):
+    """Return {owner_id: average price per unit} of the milk each owner has sold."""
+    rows = SaleItem.objects.filter(sale__owner_id__in=owner_ids, item_type='milk').exclude(
+        sale__payment_status='cancelled'
+    ).values('sale__owner_id').order_by().annotate(
+        value=Sum(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=20, decimal_places=4)),
+        quantity=Sum('quantity'),
+    )
+    return {row['sale__owner_id']: row['value'] / row['quantity'] for row in rows if row['quantity']}
+
+
+def ledger_rows(kind, animals):
+    """
+    Build the AnimalProfitability rows of a queryset of dairy or meat
+    animals with one grouped query per input, however many animals it holds.
+    """
+    animal_field = f'{kind}_animal'
+    animal_rows = list(animals.order_by().values_list('pk', 'owner_id', 'acquisition_price'))
+    if not animal_rows:
+        return []
+    # The animals are matched with a subquery rather than a list of ids
+    in_animals = {f'{animal_field}__in': animals.values('pk')}
+    owner_ids = {owner_id for pk, owner_id, price in animal_rows}
+
+    owners = {pk: owner_id for pk, owner_id, price in animal_rows}
+    feeding = pd.DataFrame.from_records(
+        list(FeedingRecord.objects.filter(**in_animals).values_list(
+            animal_field, 'feed_type', month_of('date')
+        ).order_by().annotate(amount=Sum('amount'))),
+        columns=['animal_id', 'feed_type_id', 'month', 'amount'],
+    )
+    feeding['owner_id'] = feeding['animal_id'].map(owners)
+    feed = value_feeding(feeding).groupby('animal_id')[['amount', 'cost']].sum()
+
+    def cost_totals(model):
+        rows = model.objects.filter(**in_animals).values(animal_field).order_by().annotate(cost=Sum('cost'))
+        return {row[animal_field]: row['cost'] or 0 for row in rows}
+
+    health = cost_totals(AnimalHealth)
+    vaccinations = cost_totals(Vaccination)
+    # Milk sold is valued through the milk each animal produced instead
+    sales = {
+        row[f'{animal_field}_id']: row['revenue']
+        for row in SaleItem.objects.filter(**{f'{animal_field}_id__in': animals.values('pk')}).exclude(
+            sale__payment_status='cancelled'
+        ).exclude(item_type='milk').values(f'{animal_field}_id').order_by().annotate(
+            revenue=Sum(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=20, decimal_places=4))
+        )
+    }
+    milk, prices_per_unit = {}, {}
+    if kind == 'dairy':
+        milk = dict(MilkProduction.objects.filter(animal__in=animals.values('pk')).values('animal').order_by().annotate(
+            total=Sum('total_amount')
+        ).values_list('animal', 'total'))
+        prices_per_unit = milk_prices(owner_ids)
+
+    rows = []
+    for pk, owner_id, acquisition_price in animal_rows:
+        feed_amount, feed_cost = feed.loc[pk] if pk in feed.index else (0, 0)
+        milk_amount = milk.get(pk) or 0
+        values = {
+            'acquisition_cost': acquisition_price or 0,
+            'feed_amount': feed_amount,
+            'feed_cost': feed_cost,
+            'health_cost': health.get(pk, 0),
+            'vaccination_cost': vaccinations.get(pk, 0),
+            'milk_amount': milk_amount,
+            'milk_revenue': milk_amount * prices_per_unit.get(owner_id, 0),
+            'sale_revenue': sales.get(pk) or 0,
+        }
+        values = {field: Decimal(f'{value:.2f}') for field, value in values.items()}
+        values['total_cost'] = (
+            values['acquisition_cost'] + values['feed_cost'] + values['health_cost'] + values['vaccination_cost']
+        )
+        values['total_revenue'] = values['milk_revenue'] + values['sale_revenue']
+        values['profit'] = values['total_revenue'] - values['total_cost']
+        rows.append(AnimalProfitability(
+            owner_id=owner_id, animal_kind=kind, is_stale=False, **{f'{animal_field}_id': pk}, **values
+        ))
+    return rows
+
+
+class AnimalProfitabilityQuerySet(models.QuerySet):
+    """Custom queryset for the animal profitability ledger."""
+
+    def mark_stale(self, dairy_ids=(), meat_ids=()):
+        """Flag the rows of the given animals to be recomputed when next read."""
+        dairy_ids = {pk for pk in dairy_ids if pk is not None}
+        meat_ids = {pk for pk in meat_ids if pk is not None}
+        if not dairy_ids and not meat_ids:
+            return 0
+        return self.filter(Q(dairy_animal__in=dairy_ids) | Q(meat_animal__in=meat_ids), is_stale=False).update(
+            is_stale=True
+        )
+
+    def mark_feed_stale(self, items):
+        """Flag the rows of fed animals whose feed price may have changed with the given inventory items."""
+        return self.filter(owner__in=items.values('owner'), feed_amount__gt=0, is_stale=False).update(is_stale=True)
+
+    def refresh(self, owner_id=None, stale_only=True, batch_size=500):
+        """
+        Recompute the rows of the animals of owner_id, or of every owner when
+        it is None. With stale_only, only animals whose row is stale or
+        missing are recomputed. Return the number of rows written.
+        """
+        written = 0
+        for kind, model in ANIMAL_MODELS.items():
+            animals = model.objects.all()
+            if owner_id is not None:
+                animals = animals.filter(owner_id=owner_id)
+            if stale_only:
+                animals = animals.filter(Q(profitability__isnull=True) | Q(profitability__is_stale=True))
+            rows = ledger_rows(kind, animals)
+            self.bulk_create(
+                rows,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=[f'{kind}_animal'],
+                update_fields=['owner', 'is_stale', 'updated_at', *LEDGER_FIELDS],
+            )
+            written += len(rows)
+        return written
+
+
+class AnimalProfitability(models.Model):
+    """
+    Costs and revenue to date of one dairy or meat animal, rebuilt in bulk
+    from its records. Signals on the records flag a row as stale and the
+    stale rows of a farm are recomputed together before they are read.
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='animal_profitability',
+        verbose_name=_('owner')
+    )
+    animal_kind = models.CharField(
+        _('animal kind'),
+        max_length=10,
+        choices=[('dairy', _('Dairy')), ('meat', _('Meat'))]
+    )
+    dairy_animal = models.OneToOneField(
+        DairyAnimal,
+        on_delete=models.CASCADE,
+        related_name='profitability',
+        verbose_name=_('dairy animal'),
+        null=True,
+        blank=True
+    )
+    meat_animal = models.OneToOneField(
+        MeatAnimal,
+        on_delete=models.CASCADE,
+        related_name='profitability',
+        verbose_name=_('meat animal'),
+        null=True,
+        blank=True
+    )
+
+    # Costs
+    acquisition_cost = models.DecimalField(_('acquisition cost'), max_digits=12, decimal_places=2, default=0)
+    feed_amount = models.DecimalField(_('feed amount (kg)'), max_digits=12, decimal_places=2, default=0)
+    feed_cost = models.DecimalField(_('feed cost'), max_digits=12, decimal_places=2, default=0)
+    health_cost = models.DecimalField(_('health cost'), max_digits=12, decimal_places=2, default=0)
+    vaccination_cost = models.DecimalField(_('vaccination cost'), max_digits=12, decimal_places=2, default=0)
+    total_cost = models.DecimalField(_('total cost'), max_digits=12, decimal_places=2, default=0)
+
+    # Revenue, with milk valued at the farm's average milk sale price
+    milk_amount = models.DecimalField(_('milk amount'), max_digits=12, decimal_places=2, default=0)
+    milk_revenue = models.DecimalField(_('milk revenue'), max_digits=12, decimal_places=2, default=0)
+    sale_revenue = models.DecimalField(_('sale revenue'), max_digits=12, decimal_places=2, default=0)
+    total_revenue = models.DecimalField(_('total revenue'), max_digits=12, decimal_places=2, default=0)
+    profit = models.DecimalField(_('profit'), max_digits=12, decimal_places=2, default=0)
+
+    is_stale = models.BooleanField(_('stale'), default=False)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    objects = AnimalProfitabilityQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('animal profitability')
+        verbose_name_plural = _('animal profitability')
+        ordering = ['profit']
+        indexes = [
+            models.Index(fields=['owner', 'profit'], name='ezcore_profit_owner_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.animal} - {self.profit}"
+
+    @property
+    def animal(self):
+        return self.dairy_animal if self.animal_kind == 'dairy' else self.meat_animal
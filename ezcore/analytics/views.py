@@ -0,0 +1,50 @@
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters, generics, permissions, serializers
+
+from ezcore.analytics.models import LEDGER_FIELDS, AnimalProfitability
+from ezcore.mixins import ExportMixin, FarmScopedQuerySetMixin
+from ezcore.permissions import HasFarmAccess
+
+
+class AnimalProfitabilitySerializer(serializers.ModelSerializer):
+    """Serializer for the AnimalProfitability model."""
+    animal = serializers.SerializerMethodField()
+    tag_number = serializers.SerializerMethodField()
+    status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AnimalProfitability
+        fields = ['id', 'animal_kind', 'animal', 'tag_number', 'status', *LEDGER_FIELDS, 'updated_at']
+
+    def get_animal(self, obj):
+        return obj.animal.pk
+
+    def get_tag_number(self, obj):
+        return obj.animal.tag_number
+
+    def get_status(self, obj):
+        return obj.animal.status
+
+
+class AnimalProfitabilityView(ExportMixin, FarmScopedQuerySetMixin, generics.ListAPIView):
+    """
+    Costs, revenue and profit to date of each animal of the current user's
+    farm, least profitable first. Rows changed since they were last read
+    are recomputed together before the list is returned.
+    """
+    queryset = AnimalProfitability.objects.select_related('dairy_animal', 'meat_animal')
+    serializer_class = AnimalProfitabilitySerializer
+    permission_classes = [permissions.IsAuthenticated, HasFarmAccess]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['animal_kind']
+    search_fields = ['dairy_animal__tag_number', 'meat_animal__tag_number']
+    ordering_fields = LEDGER_FIELDS
+    ordering = ['profit']
+    capability = 'reports'
+    basename = 'animal-profitability'
+
+    def list(self, request, *args, **kwargs):
+        owner_id = self.get_farm_owner_id()
+        if request.user.is_staff or owner_id is not None:
+            AnimalProfitability.objects.refresh(owner_id=None if request.user.is_staff else owner_id)
+        return super().list(request, *args, **kwargs)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class EzcoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ezcore'
+
+    def ready(self):
+        # Register signal handlers and system checks
+        from ezcore import checks, signals
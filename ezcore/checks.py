@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Warn when a deployment's worker processes would each keep their own cache."""
+    if settings.CACHES['default']['BACKEND'] not in LOCAL_CACHES:
+        return []
+    return [Warning(
+        'The default cache is local to each process.',
+        hint='Set REDIS_URL so every worker sees the same cache versions; '
+             'otherwise reports, reference tables and role capabilities go stale in other workers.',
+        id='ezcore.W001',
+    )]
@@ -0,0 +1,222 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils.translation import gettext_lazy as _
+
+from ezcore.inventory_and_sales.models import InventoryTransaction, Sale, Expense
+from ezdairy.models import MilkProduction
+from ezmeat.models import WeightRecord
+
+
+class SummarySource(ABC):
+    """
+    Describes how one kind of record feeds into FarmDailySummary: where its
+    owner and date live and which summary fields it is responsible for.
+    """
+    model = None
+    owner_field = 'owner_id'
+    date_field = 'date'
+    fields = ()
+
+    def get_queryset(self):
+        return self.model.objects.all()
+
+    @abstractmethod
+    def aggregate(self, queryset):
+        """Return {(owner_id, date): {field: value}} for the records in queryset."""
+
+    def get_key(self, instance):
+        """Return the (owner_id, date) a record counts towards."""
+        value = instance
+        for part in self.owner_field.split('__'):
+            value = getattr(value, part)
+        return value, getattr(instance, self.date_field)
+
+    def get_stored_key(self, pk):
+        """Return the (owner_id, date) a record counted towards before it was changed."""
+        return self.model.objects.filter(pk=pk).values_list(self.owner_field, self.date_field).first()
+
+    def get_affected_keys(self, key):
+        """Return every (owner_id, date) whose totals change with a record at key."""
+        return [key]
+
+
+class AggregateSource(SummarySource):
+    """A source whose fields are SQL aggregates of its records per owner and date."""
+
+    @abstractmethod
+    def get_aggregates(self):
+        """Return the aggregate expression for each of self.fields."""
+
+    def aggregate(self, queryset):
+        rows = queryset.values(
+            summary_owner=F(self.owner_field), summary_date=F(self.date_field)
+        ).order_by().annotate(**self.get_aggregates())
+        return {
+            (row['summary_owner'], row['summary_date']): {field: row[field] or 0 for field in self.fields}
+            for row in rows
+        }
+
+
+class MilkSource(AggregateSource):
+    model = MilkProduction
+    owner_field = 'animal__owner_id'
+    fields = ('milk_total', 'milk_records')
+
+    def get_aggregates(self):
+        return {'milk_total': Sum('total_amount'), 'milk_records': Count('pk')}
+
+
+class WeightSource(SummarySource):
+    """
+    Weight gain is counted on the day of the later of two weigh-ins, so a
+    change to one record also moves the gain of the animal's next record.
+    """
+    model = WeightRecord
+    owner_field = 'animal__owner_id'
+    fields = ('weight_gain', 'weight_gain_days')
+
+    def get_queryset(self):
+        previous = WeightRecord.objects.filter(
+            animal=OuterRef('animal'), date__lt=OuterRef('date')
+        ).order_by('-date')
+        return WeightRecord.objects.annotate(
+            previous_weight=Subquery(previous.values('weight')[:1]),
+            previous_date=Subquery(previous.values('date')[:1]),
+        )
+
+    def aggregate(self, queryset):
+        totals = defaultdict(lambda: {'weight_gain': Decimal('0'), 'weight_gain_days': 0})
+        rows = queryset.filter(previous_date__isnull=False).values_list(
+            self.owner_field, 'date', 'weight', 'previous_weight', 'previous_date'
+        )
+        for owner_id, day, weight, previous_weight, previous_date in rows:
+            totals[owner_id, day]['weight_gain'] += weight - previous_weight
+            totals[owner_id, day]['weight_gain_days'] += (day - previous_date).days
+        return dict(totals)
+
+    def get_affected_keys(self, key):
+        owner_id, day = key
+        next_dates = WeightRecord.objects.filter(
+            animal__owner_id=owner_id, date__gt=day
+        ).values('animal').annotate(next_date=models.Min('date')).values_list('next_date', flat=True)
+        return [key] + [(owner_id, next_date) for next_date in set(next_dates)]
+
+
+class SaleSource(AggregateSource):
+    model = Sale
+    date_field = 'sale_date'
+    fields = ('revenue',)
+
+    def get_aggregates(self):
+        return {'revenue': Sum('total_amount', filter=~Q(payment_status='cancelled'))}
+
+
+class ExpenseSource(AggregateSource):
+    model = Expense
+    date_field = 'expense_date'
+    fields = ('expenses',)
+
+    def get_aggregates(self):
+        return {'expenses': Sum('amount')}
+
+
+class InventoryTransactionSource(AggregateSource):
+    """Stock used or wasted, valued at its own price or else at the item's."""
+    model = InventoryTransaction
+    owner_field = 'item__owner_id'
+    date_field = 'transaction_date'
+    fields = ('stock_usage_value',)
+
+    def get_aggregates(self):
+        return {'stock_usage_value': Sum(
+            F('quantity') * Coalesce('unit_price', 'item__unit_price'),
+            filter=Q(transaction_type__in=['usage', 'wastage']),
+            output_field=DecimalField(max_digits=20, decimal_places=4),
+        )}
+
+
+SUMMARY_SOURCES = {
+    source.model: source
+    for source in (MilkSource(), WeightSource(), SaleSource(), ExpenseSource(), InventoryTransactionSource())
+}
+
+
+class FarmDailySummaryQuerySet(models.QuerySet):
+    """Custom queryset for farm daily summaries."""
+
+    def refresh(self, source, keys=None, owner_id=None, batch_size=500):
+        """
+        Recompute the fields a source is responsible for on the given
+        (owner_id, date) keys, or on every key the source has records for
+        (optionally limited to one owner) when keys is None. Keys without
+        records are reset to zero.
+        """
+        queryset = source.get_queryset()
+        if owner_id is not None:
+            queryset = queryset.filter(**{source.owner_field: owner_id})
+        if keys is not None:
+            keys = set(keys)
+            if not keys:
+                return
+            queryset = queryset.filter(
+                **{f'{source.owner_field}__in': {key[0] for key in keys}},
+                **{f'{source.date_field}__in': {key[1] for key in keys}},
+            )
+        totals = source.aggregate(queryset)
+        zero = dict.fromkeys(source.fields, 0)
+        summaries = [
+            self.model(owner_id=key[0], date=key[1], **totals.get(key, zero))
+            for key in (keys if keys is not None else totals)
+            if key[0] is not None
+        ]
+        self.bulk_create(
+            summaries,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['owner', 'date'],
+            update_fields=list(source.fields),
+        )
+
+
+class FarmDailySummary(models.Model):
+    """
+    Per farm and day totals behind the dashboard, kept up to date by signals
+    on the underlying records.
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='daily_summaries',
+        verbose_name=_('owner')
+    )
+    date = models.DateField(_('date'))
+    
+    # Milk
+    milk_total = models.DecimalField(_('milk total'), max_digits=12, decimal_places=2, default=0)
+    milk_records = models.PositiveIntegerField(_('milk records'), default=0)
+    
+    # Growth, counted on the day of the later weigh-in
+    weight_gain = models.DecimalField(_('weight gain'), max_digits=12, decimal_places=2, default=0)
+    weight_gain_days = models.PositiveIntegerField(_('weight gain days'), default=0)
+    
+    # Finance
+    revenue = models.DecimalField(_('revenue'), max_digits=12, decimal_places=2, default=0)
+    expenses = models.DecimalField(_('expenses'), max_digits=12, decimal_places=2, default=0)
+    stock_usage_value = models.DecimalField(_('stock usage value'), max_digits=12, decimal_places=2, default=0)
+    
+    objects = FarmDailySummaryQuerySet.as_manager()
+    
+    class Meta:
+        verbose_name = _('farm daily summary')
+        verbose_name_plural = _('farm daily summaries')
+        ordering = ['-date']
+        unique_together = ['owner', 'date']
+    
+    def __str__(self):
+        return f"{self.owner} - {self.date}"
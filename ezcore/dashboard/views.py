@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ezcore.dashboard.models import FarmDailySummary
+from ezcore.inventory_and_sales.models import InventoryItem
+from ezcore.mixins import get_farm_owner_id
+from ezcore.permissions import HasFarmAccess
+from ezdairy.models import DairyAnimal
+from ezmeat.models import MeatAnimal
+
+
+class DashboardView(APIView):
+    """
+    Home screen figures for the current user's farm. Daily totals are read
+    from FarmDailySummary rather than recomputed from the records.
+    """
+    permission_classes = [permissions.IsAuthenticated, HasFarmAccess]
+    capability = 'reports'
+    
+    def get(self, request):
+        owner_id = get_farm_owner_id(request)
+        today = timezone.localdate()
+        week_start = today - timedelta(days=6)
+        month_start = today - timedelta(days=29)
+        
+        totals = FarmDailySummary.objects.filter(owner_id=owner_id, date__gte=month_start).aggregate(
+            milk_today=Sum('milk_total', filter=Q(date=today), default=0),
+            milk_7_days=Sum('milk_total', filter=Q(date__gte=week_start), default=0),
+            milk_30_days=Sum('milk_total', default=0),
+            weight_gain=Sum('weight_gain', default=0),
+            weight_gain_days=Sum('weight_gain_days', default=0),
+            revenue_7_days=Sum('revenue', filter=Q(date__gte=week_start), default=0),
+            expenses_7_days=Sum('expenses', filter=Q(date__gte=week_start), default=0),
+            revenue_30_days=Sum('revenue', default=0),
+            expenses_30_days=Sum('expenses', default=0),
+            stock_usage_30_days=Sum('stock_usage_value', default=0),
+        )
+        
+        return Response({
+            'date': today,
+            'herd': {
+                'dairy': self.count_by_status(DairyAnimal, owner_id),
+                'meat': self.count_by_status(MeatAnimal, owner_id),
+            },
+            'milk': {
+                'today': totals['milk_today'],
+                'last_7_days': totals['milk_7_days'],
+                'last_30_days': totals['milk_30_days'],
+            },
+            'average_daily_gain': (
+                round(totals['weight_gain'] / totals['weight_gain_days'], 3)
+                if totals['weight_gain_days'] else None
+            ),
+            'finance': {
+                'last_7_days': self.finance(totals['revenue_7_days'], totals['expenses_7_days']),
+                'last_30_days': self.finance(totals['revenue_30_days'], totals['expenses_30_days']),
+            },
+            'stock': {
+                'low_stock_count': InventoryItem.objects.filter(
+                    owner_id=owner_id, is_active=True, quantity__lte=F('minimum_stock_level')
+                ).count(),
+                'usage_value_30_days': totals['stock_usage_30_days'],
+            },
+        })
+    
+    def count_by_status(self, model, owner_id):
+        """Count a farm's animals per status."""
+        rows = model.objects.filter(owner_id=owner_id).values('status').order_by().annotate(count=Count('pk'))
+        return {row['status']: row['count'] for row in rows}
+    
+    def finance(self, revenue, expenses):
+        return {'revenue': revenue, 'expenses': expenses, 'margin': revenue - expenses}
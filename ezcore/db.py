@@ -0,0 +1,59 @@
+from django.db import NotSupportedError, connection
+from django.db.models import CharField
+from django.db.models.functions import Cast, Substr
+
+
+def month_of(field):
+    """
+    Return an expression for the 'YYYY-MM' month of a date field. TruncMonth
+    is a Python function SQLite calls for every row; slicing the ISO date
+    is plain SQL on every backend.
+    """
+    return Substr(Cast(field, CharField()), 1, 7)
+
+
+def update_rows(model, fields, rows):
+    """
+    Write rows of field values, each followed by its pk, with one prepared
+    UPDATE run through executemany(). bulk_update() builds a CASE over every
+    pk and is orders of magnitude slower when a whole herd is rewritten.
+    """
+    if not rows:
+        return
+    opts = model._meta
+    quote_name = connection.ops.quote_name
+    assignments = ', '.join(f'{quote_name(opts.get_field(field).column)} = %s' for field in fields)
+    sql = f'UPDATE {quote_name(opts.db_table)} SET {assignments} WHERE {quote_name(opts.pk.column)} = %s'
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def upsert_rows(model, fields, rows, unique_fields, updates):
+    """
+    Insert rows of field values with one prepared INSERT ... ON CONFLICT DO
+    UPDATE run through executemany(). updates maps each field to rewrite on
+    a conflict to an SQL expression over the stored row, written {old}, and
+    the proposed one, written {new}, e.g. '{new}.amount + {old}.amount'.
+    Unlike bulk_create(update_conflicts=True), the new values can be merged
+    with the stored ones instead of replacing them.
+    """
+    if not rows:
+        return
+    if not connection.features.supports_update_conflicts_with_target:
+        raise NotSupportedError('This database backend does not support updating conflicts with a target.')
+    opts = model._meta
+    quote_name = connection.ops.quote_name
+    table = quote_name(opts.db_table)
+    columns = ', '.join(quote_name(opts.get_field(field).column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    conflict = ', '.join(quote_name(opts.get_field(field).column) for field in unique_fields)
+    assignments = ', '.join(
+        f"{quote_name(opts.get_field(field).column)} = {expression.format(old=table, new='EXCLUDED')}"
+        for field, expression in updates.items()
+    )
+    sql = (
+        f'INSERT INTO {table} ({columns}) VALUES ({placeholders}) '
+        f'ON CONFLICT ({conflict}) DO UPDATE SET {assignments}'
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
@@ -0,0 +1,63 @@
+import pandas as pd
+from django.db.models import Avg, DecimalField, F, Sum
+
+from ezcore.inventory_and_sales.models import InventoryItem, InventoryTransaction
+
+PRICE_KEYS = ['owner_id', 'feed_type_id']
+
+
+def purchase_prices(owner_ids):
+    """
+    Return a data frame of the weighted average price each owner has paid
+    for each feed type, as of every day it was bought, with owner_id,
+    feed_type_id, date and price columns sorted by date.
+    """
+    rows = InventoryTransaction.objects.filter(
+        item__owner_id__in=owner_ids, item__feed_type__isnull=False,
+        transaction_type='purchase', unit_price__isnull=False,
+    ).values(
+        owner_id=F('item__owner_id'), feed_type_id=F('item__feed_type_id'), date=F('transaction_date')
+    ).order_by().annotate(
+        value=Sum(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=20, decimal_places=4)),
+        bought=Sum('quantity'),
+    )
+    frame = pd.DataFrame.from_records(list(rows), columns=PRICE_KEYS + ['date', 'value', 'bought'])
+    frame = frame.astype({'owner_id': 'int64', 'feed_type_id': 'int64', 'value': float, 'bought': float})
+    frame['date'] = pd.to_datetime(frame['date'])
+    frame = frame.sort_values('date', kind='stable')
+    totals = frame.groupby(PRICE_KEYS)[['value', 'bought']].cumsum()
+    frame['price'] = totals['value'] / totals['bought']
+    return frame[PRICE_KEYS + ['date', 'price']]
+
+
+def item_prices(owner_ids):
+    """Return a data frame of the average unit price of each owner's stock of each feed type."""
+    rows = InventoryItem.objects.filter(owner_id__in=owner_ids, feed_type__isnull=False).values(
+        *PRICE_KEYS
+    ).order_by().annotate(item_price=Avg('unit_price'))
+    frame = pd.DataFrame.from_records(list(rows), columns=PRICE_KEYS + ['item_price'])
+    return frame.astype({'owner_id': 'int64', 'feed_type_id': 'int64', 'item_price': float})
+
+
+def value_feeding(feeding):
+    """
+    Price a data frame of feeding totals with owner_id, feed_type_id, month
+    ('YYYY-MM') and amount columns, adding price and cost columns.
+
+    A month is valued at the weighted average price of the feed bought up
+    to its end, or at the unit price of the linked stock before the first
+    purchase. Feed types without stock are valued at nothing. The prices
+    are looked up for every row at once with an as-of merge.
+    """
+    feeding = feeding.astype({'owner_id': 'int64', 'feed_type_id': 'int64', 'amount': float})
+    owner_ids = feeding['owner_id'].unique().tolist()
+    feeding['month_end'] = pd.PeriodIndex(feeding['month'], freq='M').end_time.normalize()
+    feeding = pd.merge_asof(
+        feeding.sort_values('month_end', kind='stable'),
+        purchase_prices(owner_ids),
+        left_on='month_end', right_on='date', by=PRICE_KEYS, direction='backward',
+    ).drop(columns=['month_end', 'date'])
+    feeding = feeding.merge(item_prices(owner_ids), on=PRICE_KEYS, how='left')
+    feeding['price'] = feeding['price'].fillna(feeding.pop('item_price')).fillna(0.0)
+    feeding['cost'] = feeding['amount'] * feeding['price']
+    return feeding
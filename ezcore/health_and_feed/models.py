@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from ezanimal.models import AnimalType, Breed
@@ -28,6 +29,16 @@ class AnimalHealth(models.Model):
         blank=True
     )
     
+    # Owner of the animal, copied on save so farm-scoped queries need no join
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='owned_health_records',
+        verbose_name=_('owner'),
+        null=True,
+        editable=False
+    )
+    
     # Health record details
     record_date = models.DateField(_('record date'))
     record_type = models.CharField(
@@ -99,6 +110,9 @@ class AnimalHealth(models.Model):
         verbose_name = _('animal health record')
         verbose_name_plural = _('animal health records')
         ordering = ['-record_date']
+        indexes = [
+            models.Index(fields=['owner', '-record_date'], name='ezcore_health_owner_date_idx'),
+        ]
     
     def __str__(self):
         animal = self.dairy_animal or self.meat_animal
@@ -112,6 +126,17 @@ class AnimalHealth(models.Model):
             raise ValidationError(_('A health record cannot be associated with both dairy and meat animals.'))
         if not self.dairy_animal and not self.meat_animal:
             raise ValidationError(_('A health record must be associated with either a dairy or meat animal.'))
+        self.set_owner_from_animal()
+    
+    def set_owner_from_animal(self):
+        """Copy the owner of the linked animal onto the health record."""
+        animal = self.dairy_animal or self.meat_animal
+        if animal is not None:
+            self.owner_id = animal.owner_id
+    
+    def save(self, *args, **kwargs):
+        self.set_owner_from_animal()
+        super().save(*args, **kwargs)
 
 
 class Vaccination(models.Model):
@@ -136,6 +161,16 @@ class Vaccination(models.Model):
         blank=True
     )
     
+    # Owner of the animal, copied on save so farm-scoped queries need no join
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='owned_vaccinations',
+        verbose_name=_('owner'),
+        null=True,
+        editable=False
+    )
+    
     # Vaccination details
     vaccine_name = models.CharField(_('vaccine name'), max_length=255)
     vaccination_date = models.DateField(_('vaccination date'))
@@ -199,6 +234,10 @@ class Vaccination(models.Model):
         verbose_name = _('vaccination')
         verbose_name_plural = _('vaccinations')
         ordering = ['-vaccination_date']
+        indexes = [
+            models.Index(fields=['owner', '-vaccination_date'], name='ezcore_vacc_owner_date_idx'),
+            models.Index(fields=['next_due_date'], condition=Q(next_due_date__isnull=False), name='ezcore_vacc_due_idx'),
+        ]
     
     def __str__(self):
         animal = self.dairy_animal or self.meat_animal
@@ -212,6 +251,17 @@ class Vaccination(models.Model):
             raise ValidationError(_('A vaccination cannot be associated with both dairy and meat animals.'))
         if not self.dairy_animal and not self.meat_animal:
             raise ValidationError(_('A vaccination must be associated with either a dairy or meat animal.'))
+        self.set_owner_from_animal()
+    
+    def set_owner_from_animal(self):
+        """Copy the owner of the linked animal onto the vaccination."""
+        animal = self.dairy_animal or self.meat_animal
+        if animal is not None:
+            self.owner_id = animal.owner_id
+    
+    def save(self, *args, **kwargs):
+        self.set_owner_from_animal()
+        super().save(*args, **kwargs)
 
 
 class FeedType(models.Model):
@@ -406,6 +456,16 @@ class FeedingRecord(models.Model):
         blank=True
     )
     
+    # Owner of the animal, copied on save so farm-scoped queries need no join
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='owned_feeding_records',
+        verbose_name=_('owner'),
+        null=True,
+        editable=False
+    )
+    
     # Feeding details
     date = models.DateField(_('date'))
     feed_type = models.ForeignKey(
@@ -454,6 +514,10 @@ class FeedingRecord(models.Model):
         verbose_name = _('feeding record')
         verbose_name_plural = _('feeding records')
         ordering = ['-date', 'time_of_day']
+        indexes = [
+            models.Index(fields=['owner', '-date', 'time_of_day'], name='ezcore_feeding_owner_date_idx'),
+            models.Index(fields=['-date', 'time_of_day'], name='ezcore_feeding_date_idx'),
+        ]
     
     def __str__(self):
         animal = self.dairy_animal or self.meat_animal
@@ -467,3 +531,14 @@ class FeedingRecord(models.Model):
             raise ValidationError(_('A feeding record cannot be associated with both dairy and meat animals.'))
         if not self.dairy_animal and not self.meat_animal:
             raise ValidationError(_('A feeding record must be associated with either a dairy or meat animal.'))
+        self.set_owner_from_animal()
+    
+    def set_owner_from_animal(self):
+        """Copy the owner of the linked animal onto the feeding record."""
+        animal = self.dairy_animal or self.meat_animal
+        if animal is not None:
+            self.owner_id = animal.owner_id
+    
+    def save(self, *args, **kwargs):
+        self.set_owner_from_animal()
+        super().save(*args, **kwargs)
\ No newline at end of file
@@ -61,13 +61,14 @@ class FeedingScheduleItemSerializer(serializers.ModelSerializer):
     """Serializer for the FeedingScheduleItem model."""
     feed_type_name = serializers.ReadOnlyField(source='feed_type.name')
     frequency_display = serializers.ReadOnlyField(source='get_frequency_display')
+    time_of_day_display = serializers.ReadOnlyField(source='get_time_of_day_display')
     
     class Meta:
         model = FeedingScheduleItem
         fields = [
             'id', 'schedule', 'feed_type', 'feed_type_name', 'amount',
             'frequency', 'frequency_display', 'custom_frequency',
-            'morning', 'afternoon', 'evening', 'notes'
+            'time_of_day', 'time_of_day_display'
         ]
         read_only_fields = ['id']
 
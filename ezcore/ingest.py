@@ -0,0 +1,285 @@
+import asyncio
+import csv
+import time
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.utils import timezone
+
+from ezcore.db import update_rows
+from ezcore.health_and_feed.models import AnimalHealth
+from ezdairy.models import DairyAnimal
+from ezmeat.models import MeatAnimal
+from ezmeat.serializers import WeightRecordBulkSerializer
+
+Reading = namedtuple('Reading', 'line tag_number weight timestamp')
+Animal = namedtuple('Animal', 'kind pk owner_id')
+
+
+def parse_reading(line):
+    """
+    Parse a `tag_number,weight,timestamp` line from a scale or RFID reader.
+    The timestamp is ISO 8601 or Unix seconds and may be left out, in which
+    case the reading is taken now. Raise ValueError on a malformed line.
+    """
+    parts = [part.strip() for part in line.strip().split(',')]
+    if len(parts) not in (2, 3) or not parts[0]:
+        raise ValueError('expected tag_number,weight,timestamp')
+    try:
+        weight = Decimal(parts[1])
+    except InvalidOperation:
+        raise ValueError(f'invalid weight {parts[1]!r}')
+    if not weight > 0:
+        raise ValueError('weight must be positive')
+
+    if len(parts) == 2 or not parts[2]:
+        timestamp = timezone.now()
+    else:
+        try:
+            timestamp = datetime.fromtimestamp(float(parts[2]), tz=dt_timezone.utc)
+        except (OverflowError, OSError):
+            raise ValueError(f'invalid timestamp {parts[2]!r}')
+        except ValueError:
+            timestamp = datetime.fromisoformat(parts[2])
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp)
+    return Reading(line.strip(), parts[0], weight, timestamp)
+
+
+class TagIndex:
+    """
+    In-memory map of tag numbers to meat and dairy animals, loaded with one
+    query per model. Unknown tags trigger a reload at most once every
+    reload_interval seconds, so animals registered mid-session are found.
+    """
+
+    def __init__(self, reload_interval=60):
+        self.reload_interval = reload_interval
+        self.animals = {}
+        self.ambiguous = set()
+        self.loaded_at = None
+
+    def load(self):
+        animals = {}
+        ambiguous = set()
+        for kind, model in (('meat', MeatAnimal), ('dairy', DairyAnimal)):
+            for pk, tag_number, owner_id in model.objects.values_list('pk', 'tag_number', 'owner_id'):
+                if tag_number in animals:
+                    ambiguous.add(tag_number)
+                animals[tag_number] = Animal(kind, pk, owner_id)
+        self.animals = animals
+        self.ambiguous = ambiguous
+        self.loaded_at = time.monotonic()
+
+    def is_stale(self):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= self.reload_interval
+
+    def get(self, tag_number):
+        """Return the Animal a tag belongs to, or None when unknown or shared by a dairy and a meat animal."""
+        if tag_number in self.ambiguous:
+            return None
+        return self.animals.get(tag_number)
+
+
+def write_readings(readings, record_health=False, recorded_by=None):
+    """
+    Write a batch of resolved (Reading, Animal) pairs. Meat animals get a
+    weight record per day through the bulk weigh-in serializer, keeping
+    the day's last reading; dairy animals get the weight on a routine check
+    health record when record_health is set. Return the (reading, reason)
+    pairs that could not be written.
+    """
+    latest = {}
+    rejected = []
+    for reading, animal in sorted(readings, key=lambda pair: pair[0].timestamp):
+        day = timezone.localdate(reading.timestamp)
+        if animal.kind == 'dairy' and not record_health:
+            rejected.append((reading, 'dairy animals have no weight records'))
+        else:
+            latest[animal.kind, animal.pk, day] = (reading, animal)
+
+    meat = [(key, pair) for key, pair in latest.items() if key[0] == 'meat']
+    dairy = [(key, pair) for key, pair in latest.items() if key[0] == 'dairy']
+    with transaction.atomic():
+        if meat:
+            serializer = WeightRecordBulkSerializer(
+                data=[{'animal': pk, 'date': day, 'weight': reading.weight} for (kind, pk, day), (reading, animal) in meat],
+                many=True,
+                context={'animals': MeatAnimal.objects.all()},
+            )
+            serializer.is_valid(raise_exception=True)
+            if serializer.validated_data:
+                serializer.save(recorded_by=recorded_by)
+            rejected.extend(
+                (meat[error['index']][1][0], format_errors(error['errors'])) for error in serializer.row_errors
+            )
+        if dairy:
+            write_health_weights(dairy, recorded_by)
+    return rejected
+
+
+def format_errors(errors):
+    """Flatten a serializer's field errors into one line."""
+    return '; '.join(f'{field}: {" ".join(str(message) for message in messages)}' for field, messages in errors.items())
+
+
+def write_health_weights(dairy, recorded_by):
+    """Set the weight of each dairy animal's routine check on the day, creating it when missing."""
+    existing = dict(
+        ((animal_id, day), pk)
+        for pk, animal_id, day in AnimalHealth.objects.filter(
+            dairy_animal_id__in={pk for (kind, pk, day), pair in dairy},
+            record_date__in={day for (kind, pk, day), pair in dairy},
+            record_type='routine_check',
+        ).values_list('pk', 'dairy_animal_id', 'record_date')
+    )
+    updates = []
+    records = []
+    for (kind, pk, day), (reading, animal) in dairy:
+        if (pk, day) in existing:
+            updates.append([reading.weight, existing[pk, day]])
+        else:
+            # bulk_create() bypasses AnimalHealth.save(), so copy the owner here
+            records.append(AnimalHealth(
+                dairy_animal_id=pk, owner_id=animal.owner_id, record_date=day, record_type='routine_check',
+                weight=reading.weight, notes='Scale reading', recorded_by=recorded_by,
+            ))
+    if updates:
+        update_rows(AnimalHealth, ('weight',), updates)
+    AnimalHealth.objects.bulk_create(records)
+
+
+class ScaleIngestor:
+    """
+    Read scale lines from any number of asyncio streams and write them in
+    batches of up to batch_size, or every flush_interval seconds.
+
+    At most max_pending readings wait to be written; once the queue is
+    full the readers stop reading, so a fast emitter is slowed down by TCP
+    flow control instead of growing memory. Lines that cannot be parsed or
+    whose tag is unknown are appended to the dead_letter CSV with a reason.
+    """
+
+    def __init__(self, index, batch_size=500, flush_interval=1.0, max_pending=5000,
+                 dead_letter=None, record_health=False, recorded_by=None, log=None):
+        self.index = index
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.dead_letter = dead_letter
+        self.record_health = record_health
+        self.recorded_by = recorded_by
+        self.log = log
+        self.received = 0
+        self.written = 0
+        self.rejected = 0
+
+    def reject(self, line, reason):
+        self.rejected += 1
+        if self.dead_letter is not None:
+            with open(self.dead_letter, 'a', newline='') as dead_letter:
+                csv.writer(dead_letter).writerow([timezone.now().isoformat(), line, reason])
+
+    async def resolve(self, tag_number):
+        animal = self.index.get(tag_number)
+        if animal is None and tag_number not in self.index.ambiguous and self.index.is_stale():
+            await sync_to_async(self.index.load)()
+            animal = self.index.get(tag_number)
+        return animal
+
+    async def handle_line(self, line):
+        line = line.strip()
+        if not line:
+            return
+        self.received += 1
+        try:
+            reading = parse_reading(line)
+        except ValueError as exc:
+            self.reject(line, str(exc))
+            return
+        animal = await self.resolve(reading.tag_number)
+        if animal is None:
+            reason = 'ambiguous tag' if reading.tag_number in self.index.ambiguous else 'unknown tag'
+            self.reject(line, reason)
+            return
+        await self.queue.put((reading, animal))
+
+    async def read_stream(self, reader, writer=None):
+        """Feed every line of a stream to the queue until it closes."""
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than the stream limit; the rest of the line was discarded
+                    self.reject('', 'line too long')
+                    continue
+                if not line:
+                    break
+                await self.handle_line(line.decode('utf-8', errors='replace'))
+        finally:
+            if writer is not None:
+                writer.close()
+
+    async def read_device(self, path):
+        """
+        Feed every line of a serial device, already configured with stty,
+        to the queue. Lines are read in a worker thread.
+        """
+        loop = asyncio.get_running_loop()
+        with open(path, 'rb', buffering=0) as device:
+            while line := await loop.run_in_executor(None, device.readline):
+                await self.handle_line(line.decode('utf-8', errors='replace'))
+
+    async def next_batch(self):
+        """
+        Wait for a reading, then collect more until the batch is full or
+        flush_interval passes. A None in the queue ends the batch early.
+        """
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not None:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def flush(self, batch):
+        started = time.perf_counter()
+        try:
+            rejected = await sync_to_async(write_readings)(batch, self.record_health, self.recorded_by)
+        except Exception as exc:
+            rejected = [(reading, f'write failed: {exc}') for reading, animal in batch]
+        for reading, reason in rejected:
+            self.reject(reading.line, reason)
+        self.written += len(batch) - len(rejected)
+        if self.log is not None:
+            self.log(f'Wrote {len(batch) - len(rejected)} of {len(batch)} readings in '
+                     f'{(time.perf_counter() - started) * 1000:.0f} ms, {self.queue.qsize()} pending')
+
+    async def run_writer(self):
+        """Write batches until close() is called, then write what is left."""
+        while True:
+            batch = await self.next_batch()
+            stopping = batch[-1] is None
+            if stopping:
+                batch.pop()
+            if batch:
+                await self.flush(batch)
+            if stopping:
+                return
+
+    async def close(self):
+        """Ask run_writer() to stop once the readings queued so far are written."""
+        await self.queue.put(None)
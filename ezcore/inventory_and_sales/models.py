@@ -1,9 +1,45 @@
-from django.db import models
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Q, Subquery, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from ezanimal.models import AnimalType, Breed
 
 
+class InventoryItemQuerySet(models.QuerySet):
+    """Custom queryset for inventory items."""
+    
+    def with_stock_at(self, day):
+        """
+        Annotate each item with its stock_quantity and stock_unit_price at the
+        end of day. Both are read from the transaction ledger with an index
+        seek per item instead of replaying the transactions. Items without
+        an earlier purchase are priced at their current unit price.
+        """
+        decimal_field = DecimalField(max_digits=10, decimal_places=2)
+        transactions = InventoryTransaction.objects.filter(item=OuterRef('pk'))
+        last_before = transactions.filter(transaction_date__lte=day).order_by('-transaction_date', '-id')
+        first_after = transactions.filter(transaction_date__gt=day).order_by('transaction_date', 'id')
+        last_purchase = last_before.filter(transaction_type='purchase', unit_price__isnull=False)
+        return self.annotate(
+            stock_quantity=Coalesce(
+                Subquery(last_before.values('balance_after')[:1]),
+                # Before its first transaction an item holds its opening stock
+                Subquery(first_after.annotate(
+                    balance_before=F('balance_after') - InventoryTransaction.stock_change_expression()
+                ).values('balance_before')[:1]),
+                F('quantity'),
+                output_field=decimal_field,
+            ),
+            stock_unit_price=Coalesce(
+                Subquery(last_purchase.values('unit_price')[:1]), F('unit_price'), output_field=decimal_field
+            ),
+        )
+
+
 class InventoryItem(models.Model):
     """
     Model for tracking inventory items such as feed, medicine, equipment, etc.
@@ -23,6 +59,15 @@ class InventoryItem(models.Model):
             ('other', _('Other'))
         ]
     )
+    # Feed stock is linked to the feed type it supplies, which prices feeding records
+    feed_type = models.ForeignKey(
+        'ezcore.FeedType',
+        on_delete=models.SET_NULL,
+        related_name='inventory_items',
+        verbose_name=_('feed type'),
+        null=True,
+        blank=True
+    )
     
     # Inventory tracking
     quantity = models.DecimalField(_('quantity'), max_digits=10, decimal_places=2)
@@ -67,10 +112,15 @@ class InventoryItem(models.Model):
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     
+    objects = InventoryItemQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('inventory item')
         verbose_name_plural = _('inventory items')
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['owner', 'name'], condition=Q(is_active=True), name='ezcore_invitem_active_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.quantity} {self.unit}"
@@ -88,10 +138,48 @@ class InventoryItem(models.Model):
         return False
 
 
+class InventoryTransactionQuerySet(models.QuerySet):
+    """Custom queryset for inventory transactions."""
+    
+    def rebalance(self, item_ids, from_date):
+        """
+        Recompute the running balance_after of the given items' transactions
+        dated on or after from_date, continuing from the last balance before
+        it. Items without earlier transactions start from their opening
+        stock, i.e. the current quantity less every recorded movement.
+        """
+        previous = self.model.objects.filter(
+            item=OuterRef('pk'), transaction_date__lt=from_date
+        ).order_by('-transaction_date', '-id')
+        items = InventoryItem.objects.filter(pk__in=item_ids).annotate(
+            previous_balance=Subquery(previous.values('balance_after')[:1])
+        ).values_list('pk', 'previous_balance', 'quantity')
+        
+        records = defaultdict(list)
+        for record in self.model.objects.filter(item__in=item_ids, transaction_date__gte=from_date).order_by(
+            'transaction_date', 'id'
+        ).only('item', 'transaction_type', 'quantity', 'balance_after'):
+            records[record.item_id].append(record)
+        
+        changed = []
+        for item_id, balance, quantity in items:
+            if balance is None:
+                balance = quantity - sum(record.stock_change for record in records[item_id])
+            for record in records[item_id]:
+                balance += record.stock_change
+                if record.balance_after != balance:
+                    record.balance_after = balance
+                    changed.append(record)
+        self.model.objects.bulk_update(changed, ['balance_after'], batch_size=500)
+
+
 class InventoryTransaction(models.Model):
     """
     Model for tracking inventory transactions (additions, removals, adjustments).
     """
+    # Transaction types that add to the stock, all others remove from it
+    INCOMING_TYPES = ['purchase', 'adjustment', 'transfer']
+    
     item = models.ForeignKey(
         InventoryItem,
         on_delete=models.CASCADE,
@@ -128,6 +216,15 @@ class InventoryTransaction(models.Model):
     reference = models.CharField(_('reference'), max_length=255, blank=True)
     supplier = models.CharField(_('supplier'), max_length=255, blank=True)
     
+    # Running stock of the item after this transaction, in date order
+    balance_after = models.DecimalField(
+        _('balance after'),
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        editable=False
+    )
+    
     notes = models.TextField(_('notes'), blank=True)
     recorded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -140,32 +237,113 @@ class InventoryTransaction(models.Model):
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     
+    objects = InventoryTransactionQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('inventory transaction')
         verbose_name_plural = _('inventory transactions')
         ordering = ['-transaction_date', '-created_at']
+        indexes = [
+            models.Index(fields=['item', '-transaction_date'], name='ezcore_invtx_item_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.item.name} - {self.transaction_date} - {self.get_transaction_type_display()}"
     
+    @property
+    def stock_change(self):
+        """Signed change this transaction makes to the item quantity."""
+        if self.transaction_type in self.INCOMING_TYPES:
+            return self.quantity
+        return -self.quantity  # usage, wastage, etc.
+    
+    @classmethod
+    def stock_change_expression(cls):
+        """Database expression for stock_change."""
+        return Case(
+            When(transaction_type__in=cls.INCOMING_TYPES, then=F('quantity')),
+            default=-F('quantity'),
+        )
+    
+    @staticmethod
+    def move_stock(item_id, change, **changes):
+        """
+        Add change to an item's quantity in the database, so concurrent
+        transactions on the same item cannot overwrite each other.
+        """
+        InventoryItem.objects.filter(pk=item_id).update(
+            quantity=F('quantity') + change, updated_at=timezone.now(), **changes
+        )
+    
     def save(self, *args, **kwargs):
-        """Update the inventory item quantity when a transaction is saved."""
-        is_new = self.pk is None
-        
-        if is_new:
-            # For new transactions, update the inventory item quantity
-            if self.transaction_type in ['purchase', 'adjustment', 'transfer']:
-                self.item.quantity += self.quantity
-            else:  # usage, wastage, etc.
-                self.item.quantity -= self.quantity
+        """
+        Update the inventory item quantity and the running balances when a
+        transaction is saved, including when an existing one is edited.
+        """
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = InventoryTransaction.objects.select_for_update().filter(pk=self.pk).only(
+                    'item', 'transaction_date', 'transaction_type', 'quantity'
+                ).first()
+            super().save(*args, **kwargs)
             
-            # Update the unit price if this is a purchase
-            if self.transaction_type == 'purchase' and self.unit_price:
-                self.item.unit_price = self.unit_price
-            
-            self.item.save(update_fields=['quantity', 'unit_price', 'updated_at'])
+            if previous is None:
+                # Update the unit price if this is a purchase
+                changes = {}
+                if self.transaction_type == 'purchase' and self.unit_price:
+                    changes['unit_price'] = self.unit_price
+                self.move_stock(self.item_id, self.stock_change, **changes)
+                # Fill in this transaction's balance and shift any later ones
+                InventoryTransaction.objects.rebalance([self.item_id], self.transaction_date)
+            elif (previous.item_id, previous.transaction_date, previous.stock_change) != (
+                self.item_id, self.transaction_date, self.stock_change
+            ):
+                # Take the old movement back out and apply the new one
+                if previous.item_id == self.item_id:
+                    self.move_stock(self.item_id, self.stock_change - previous.stock_change)
+                else:
+                    self.move_stock(previous.item_id, -previous.stock_change)
+                    self.move_stock(self.item_id, self.stock_change)
+                InventoryTransaction.objects.rebalance(
+                    {previous.item_id, self.item_id}, min(previous.transaction_date, self.transaction_date)
+                )
         
-        super().save(*args, **kwargs)
+        # A cached item no longer matches the database, reload it on next access
+        item_field = self._meta.get_field('item')
+        if item_field.is_cached(self):
+            item_field.delete_cached_value(self)
+
+
+class InventorySnapshot(models.Model):
+    """
+    Stock of an inventory item frozen at a closing date, e.g. a month end.
+    """
+    item = models.ForeignKey(
+        InventoryItem,
+        on_delete=models.CASCADE,
+        related_name='snapshots',
+        verbose_name=_('item')
+    )
+    date = models.DateField(_('date'))
+    quantity = models.DecimalField(_('quantity'), max_digits=10, decimal_places=2)
+    unit_price = models.DecimalField(_('unit price'), max_digits=10, decimal_places=2)
+    
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('inventory snapshot')
+        verbose_name_plural = _('inventory snapshots')
+        ordering = ['-date', 'item']
+        unique_together = ['item', 'date']
+    
+    def __str__(self):
+        return f"{self.item.name} - {self.date} - {self.quantity}"
+    
+    @property
+    def total_value(self):
+        """Calculate the total value of the snapshot."""
+        return self.quantity * self.unit_price
 
 
 class Sale(models.Model):
@@ -248,6 +426,9 @@ class Sale(models.Model):
         verbose_name = _('sale')
         verbose_name_plural = _('sales')
         ordering = ['-sale_date', '-created_at']
+        indexes = [
+            models.Index(fields=['owner', '-sale_date'], name='ezcore_sale_owner_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_sale_type_display()} - {self.sale_date} - {self.total_amount}"
@@ -373,6 +554,9 @@ class Expense(models.Model):
         verbose_name = _('expense')
         verbose_name_plural = _('expenses')
         ordering = ['-expense_date', '-created_at']
+        indexes = [
+            models.Index(fields=['owner', '-expense_date'], name='ezcore_expense_owner_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_expense_type_display()} - {self.expense_date} - {self.amount}"
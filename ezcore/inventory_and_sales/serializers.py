@@ -1,12 +1,22 @@
+from collections import defaultdict
+from decimal import Decimal
+
 from rest_framework import serializers
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from ezcore.analytics.models import AnimalProfitability
+from ezcore.dashboard.models import FarmDailySummary, SUMMARY_SOURCES
 from ezcore.inventory_and_sales.models import (
-    InventoryItem, InventoryTransaction, Sale, SaleItem, Expense
+    InventoryItem, InventoryTransaction, InventorySnapshot, Sale, SaleItem, Expense
 )
 
 
 class InventoryItemSerializer(serializers.ModelSerializer):
     """Serializer for the InventoryItem model."""
     item_type_display = serializers.ReadOnlyField(source='get_item_type_display')
+    feed_type_name = serializers.ReadOnlyField(source='feed_type.name')
     total_value = serializers.ReadOnlyField()
     needs_reordering = serializers.ReadOnlyField()
     
@@ -14,12 +24,48 @@ class InventoryItemSerializer(serializers.ModelSerializer):
         model = InventoryItem
         fields = [
             'id', 'name', 'description', 'item_type', 'item_type_display',
+            'feed_type', 'feed_type_name',
             'quantity', 'unit', 'unit_price', 'total_value',
             'minimum_stock_level', 'reorder_quantity', 'needs_reordering',
             'storage_location', 'expiry_date', 'is_active', 'owner',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    def validate(self, data):
+        """Only feed items can supply a feed type."""
+        item_type = data.get('item_type', getattr(self.instance, 'item_type', None))
+        if data.get('feed_type') and item_type != 'feed':
+            raise serializers.ValidationError({'feed_type': [_("Only feed items can supply a feed type.")]})
+        return data
+
+
+class InventoryStockSerializer(serializers.ModelSerializer):
+    """Serializer for an inventory item annotated by with_stock_at()."""
+    quantity = serializers.DecimalField(source='stock_quantity', max_digits=10, decimal_places=2)
+    unit_price = serializers.DecimalField(source='stock_unit_price', max_digits=10, decimal_places=2)
+    total_value = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = InventoryItem
+        fields = ['id', 'name', 'item_type', 'unit', 'quantity', 'unit_price', 'total_value']
+    
+    def get_total_value(self, obj):
+        """Calculate the value of the stock held on the date."""
+        return obj.stock_quantity * obj.stock_unit_price
+
+
+class InventorySnapshotSerializer(serializers.ModelSerializer):
+    """Serializer for the InventorySnapshot model, shaped like InventoryStockSerializer."""
+    id = serializers.ReadOnlyField(source='item_id')
+    name = serializers.ReadOnlyField(source='item.name')
+    item_type = serializers.ReadOnlyField(source='item.item_type')
+    unit = serializers.ReadOnlyField(source='item.unit')
+    total_value = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = InventorySnapshot
+        fields = ['id', 'name', 'item_type', 'unit', 'quantity', 'unit_price', 'total_value']
 
 
 class InventoryTransactionSerializer(serializers.ModelSerializer):
@@ -31,11 +77,108 @@ class InventoryTransactionSerializer(serializers.ModelSerializer):
         model = InventoryTransaction
         fields = [
             'id', 'item', 'item_name', 'transaction_date', 'transaction_type',
-            'transaction_type_display', 'quantity', 'unit_price',
+            'transaction_type_display', 'quantity', 'unit_price', 'balance_after',
             'reference', 'supplier', 'notes', 'recorded_by',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'balance_after', 'created_at', 'updated_at']
+
+
+class InventoryTransactionBulkListSerializer(serializers.ListSerializer):
+    """
+    List serializer for recording many stock movements at once.
+    Invalid rows are collected in row_errors instead of failing the batch.
+    """
+    
+    def to_internal_value(self, data):
+        """Validate each row and keep the ones that can be written."""
+        if not isinstance(data, list):
+            raise serializers.ValidationError(_("Expected a list of inventory transactions."))
+        if not data:
+            raise serializers.ValidationError(_("No inventory transactions were provided."))
+        
+        self.row_errors = []
+        rows = []
+        for index, item in enumerate(data):
+            try:
+                rows.append((index, self.child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                self.row_errors.append({'index': index, 'errors': exc.detail})
+        
+        # Check access to every referenced item with a single query
+        item_ids = {row['item_id'] for index, row in rows}
+        self.item_owners = dict(self.context['items'].filter(pk__in=item_ids).values_list('pk', 'owner_id'))
+        
+        valid_rows = []
+        for index, row in rows:
+            if row['item_id'] not in self.item_owners:
+                self.row_errors.append({'index': index, 'errors': {'item': [_("Invalid item.")]}})
+            else:
+                valid_rows.append(row)
+        self.row_errors.sort(key=lambda error: error['index'])
+        return valid_rows
+    
+    def create(self, validated_data):
+        """Insert the transactions and apply their movements with one UPDATE."""
+        records = [InventoryTransaction(**row) for row in validated_data]
+        changes = defaultdict(Decimal)
+        purchase_prices = {}
+        # In date order, so each item takes the price of its latest purchase
+        for record in sorted(records, key=lambda record: record.transaction_date):
+            changes[record.item_id] += record.stock_change
+            if record.transaction_type == 'purchase' and record.unit_price:
+                purchase_prices[record.item_id] = record.unit_price
+        
+        # bulk_create() bypasses InventoryTransaction.save(), so the stock is
+        # updated here, summing the movements of each item in the database
+        decimal_field = DecimalField(max_digits=10, decimal_places=2)
+        item_changes = {
+            'quantity': F('quantity') + Case(
+                *[When(pk=item_id, then=Value(change)) for item_id, change in changes.items()],
+                output_field=decimal_field,
+            ),
+            'updated_at': timezone.now(),
+        }
+        if purchase_prices:
+            item_changes['unit_price'] = Case(
+                *[When(pk=item_id, then=Value(price)) for item_id, price in purchase_prices.items()],
+                default=F('unit_price'),
+                output_field=decimal_field,
+            )
+        
+        with transaction.atomic():
+            records = InventoryTransaction.objects.bulk_create(records, batch_size=500)
+            InventoryItem.objects.filter(pk__in=changes).update(**item_changes)
+            InventoryTransaction.objects.rebalance(
+                list(changes), min(record.transaction_date for record in records)
+            )
+            # bulk_create() sends no signals, so refresh the dashboard totals here
+            FarmDailySummary.objects.refresh(
+                SUMMARY_SOURCES[InventoryTransaction],
+                {(self.item_owners[record.item_id], record.transaction_date) for record in records},
+            )
+            if purchase_prices:
+                AnimalProfitability.objects.mark_feed_stale(
+                    InventoryItem.objects.filter(pk__in=purchase_prices, feed_type__isnull=False)
+                )
+        return records
+
+
+class InventoryTransactionBulkSerializer(serializers.ModelSerializer):
+    """Serializer for a single row of a bulk inventory transaction request."""
+    item = serializers.IntegerField(source='item_id')
+    
+    class Meta:
+        model = InventoryTransaction
+        fields = [
+            'item', 'transaction_date', 'transaction_type', 'quantity',
+            'unit_price', 'reference', 'supplier', 'notes'
+        ]
+        extra_kwargs = {
+            'quantity': {'min_value': 0},
+            'unit_price': {'min_value': 0},
+        }
+        list_serializer_class = InventoryTransactionBulkListSerializer
 
 
 class SaleItemSerializer(serializers.ModelSerializer):
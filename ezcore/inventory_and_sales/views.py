@@ -1,39 +1,35 @@
-from rest_framework import viewsets, permissions, filters
+from datetime import timedelta
+
+from rest_framework import viewsets, permissions, filters, serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.utils import timezone
 from ezcore.inventory_and_sales.models import (
-    InventoryItem, InventoryTransaction, Sale, SaleItem, Expense
+    InventoryItem, InventoryTransaction, InventorySnapshot, Sale, SaleItem, Expense
 )
 from .serializers import (
-    InventoryItemSerializer, InventoryTransactionSerializer,
+    InventoryItemSerializer, InventoryStockSerializer, InventorySnapshotSerializer,
+    InventoryTransactionSerializer, InventoryTransactionBulkSerializer,
     SaleSerializer, SaleItemSerializer, ExpenseSerializer
 )
 from ezcore.permissions import IsOwnerOrEmployee, HasFarmAccess
+from ezcore.mixins import ExportMixin, FarmScopedQuerySetMixin
+from ezcore.pagination import KeysetPagination
 from django.http import HttpResponse
 
 
 
-class InventoryItemViewSet(viewsets.ModelViewSet):
+class InventoryItemViewSet(ExportMixin, FarmScopedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and editing inventory items."""
+    queryset = InventoryItem.objects.all()
     serializer_class = InventoryItemSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['item_type', 'is_active']
     search_fields = ['name', 'description', 'storage_location']
     ordering_fields = ['name', 'quantity', 'unit_price', 'expiry_date']
-    
-    def get_queryset(self):
-        """
-        This view should return a list of all inventory items
-        for the currently authenticated user.
-        """
-        user = self.request.user
-        if user.is_staff:
-            return InventoryItem.objects.all()
-        elif user.is_farm_owner:
-            return InventoryItem.objects.filter(owner=user)
-        elif user.employer and user.can_manage_inventory:
-            # Employees can see their employer's inventory if they have permission
-            return InventoryItem.objects.filter(owner=user.employer)
-        return InventoryItem.objects.none()
+    owner_field = 'owner_id'
+    capability = 'inventory'
     
     def get_permissions(self):
         """
@@ -51,30 +47,71 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
         # Employees create inventory for their employer
         elif self.request.user.employer and self.request.user.can_manage_inventory:
             serializer.save(owner=self.request.user.employer)
+    
+    def get_queryset(self):
+        """Annotate the stock on the requested date for the stock-at action."""
+        queryset = super().get_queryset()
+        if self.action == 'stock_at':
+            queryset = queryset.with_stock_at(self.get_date_param(timezone.localdate()))
+        return queryset
+    
+    def get_date_param(self, default):
+        """Return the date query parameter, or default when it is not given."""
+        value = self.request.query_params.get('date')
+        if not value:
+            return default
+        return serializers.DateField().run_validation(value)
+    
+    @action(detail=True, methods=['get'], url_path='stock-at')
+    def stock_at(self, request, pk=None):
+        """Return the item's stock at the end of ?date= (default today) from the ledger."""
+        item = self.get_object()
+        return Response({
+            'date': self.get_date_param(timezone.localdate()),
+            **InventoryStockSerializer(item).data
+        })
+    
+    @action(detail=False, methods=['get'])
+    def valuation(self, request):
+        """
+        Value the farm's stock at the end of ?date= (default the last month
+        end). Items closed on the date are read from their snapshots, the
+        others, e.g. items added after the close, from the transaction ledger.
+        """
+        day = self.get_date_param(timezone.localdate().replace(day=1) - timedelta(days=1))
+        snapshots = self.filter_by_farm(
+            InventorySnapshot.objects.filter(date=day).select_related('item'), 'item__owner_id'
+        )
+        items = self.filter_by_farm(InventoryItem.objects.with_stock_at(day).exclude(snapshots__date=day))
+        snapshot_rows = InventorySnapshotSerializer(snapshots, many=True).data
+        ledger_rows = InventoryStockSerializer(items, many=True).data
+        source = 'mixed' if snapshot_rows and ledger_rows else 'snapshot' if snapshot_rows else 'ledger'
+        rows = sorted(snapshot_rows + ledger_rows, key=lambda row: (row['name'], row['id']))
+        return Response({
+            'date': day,
+            'source': source,
+            'total_value': sum(row['total_value'] for row in rows),
+            'items': rows,
+        })
+
+
+class InventoryTransactionPagination(KeysetPagination):
+    """Keyset pagination for inventory transactions."""
+    date_field = 'transaction_date'
+    max_page_size = 200
 
 
-class InventoryTransactionViewSet(viewsets.ModelViewSet):
+class InventoryTransactionViewSet(ExportMixin, FarmScopedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and editing inventory transactions."""
+    queryset = InventoryTransaction.objects.all()
     serializer_class = InventoryTransactionSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['item', 'transaction_date', 'transaction_type']
     search_fields = ['item__name', 'reference', 'supplier', 'notes']
     ordering_fields = ['transaction_date', 'item__name', 'quantity']
-    
-    def get_queryset(self):
-        """
-        This view should return a list of all inventory transactions
-        for the currently authenticated user's items.
-        """
-        user = self.request.user
-        if user.is_staff:
-            return InventoryTransaction.objects.all()
-        elif user.is_farm_owner:
-            return InventoryTransaction.objects.filter(item__owner=user)
-        elif user.employer and user.can_manage_inventory:
-            # Employees can see their employer's transactions if they have permission
-            return InventoryTransaction.objects.filter(item__owner=user.employer)
-        return InventoryTransaction.objects.none()
+    pagination_class = InventoryTransactionPagination
+    owner_field = 'item__owner_id'
+    capability = 'inventory'
     
     def get_permissions(self):
         """
@@ -87,30 +124,39 @@ class InventoryTransactionViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         serializer.save(recorded_by=self.request.user)
+    
+    def get_item_queryset(self):
+        """Return the inventory items the current user may record movements for."""
+        return self.filter_by_farm(InventoryItem.objects.all(), 'owner_id')
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Record many stock movements in one request.
+        Movements are summed per item and applied with a single UPDATE, and
+        invalid rows are reported by index without aborting the rest.
+        """
+        context = self.get_serializer_context()
+        context['items'] = self.get_item_queryset()
+        serializer = InventoryTransactionBulkSerializer(data=request.data, many=True, context=context)
+        serializer.is_valid(raise_exception=True)
+        records = serializer.save(recorded_by=request.user) if serializer.validated_data else []
+        return Response(
+            {'saved': len(records), 'errors': serializer.row_errors},
+            status=status.HTTP_201_CREATED if records else status.HTTP_400_BAD_REQUEST
+        )
 
 
-class SaleViewSet(viewsets.ModelViewSet):
+class SaleViewSet(ExportMixin, FarmScopedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and editing sales."""
+    queryset = Sale.objects.all()
     serializer_class = SaleSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['sale_date', 'sale_type', 'payment_status']
     search_fields = ['customer_name', 'customer_contact', 'invoice_number', 'notes']
     ordering_fields = ['sale_date', 'total_amount', 'payment_status']
-    
-    def get_queryset(self):
-        """
-        This view should return a list of all sales
-        for the currently authenticated user.
-        """
-        user = self.request.user
-        if user.is_staff:
-            return Sale.objects.all()
-        elif user.is_farm_owner:
-            return Sale.objects.filter(owner=user)
-        elif user.employer and user.can_manage_sales:
-            # Employees can see their employer's sales if they have permission
-            return Sale.objects.filter(owner=user.employer)
-        return Sale.objects.none()
+    owner_field = 'owner_id'
+    capability = 'sales'
     
     def get_permissions(self):
         """
@@ -130,28 +176,16 @@ class SaleViewSet(viewsets.ModelViewSet):
             serializer.save(owner=self.request.user.employer, recorded_by=self.request.user)
 
 
-class SaleItemViewSet(viewsets.ModelViewSet):
+class SaleItemViewSet(ExportMixin, FarmScopedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and editing sale items."""
+    queryset = SaleItem.objects.all()
     serializer_class = SaleItemSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['sale', 'item_type']
     search_fields = ['description']
     ordering_fields = ['sale__sale_date', 'quantity', 'unit_price']
-    
-    def get_queryset(self):
-        """
-        This view should return a list of all sale items
-        for the currently authenticated user's sales.
-        """
-        user = self.request.user
-        if user.is_staff:
-            return SaleItem.objects.all()
-        elif user.is_farm_owner:
-            return SaleItem.objects.filter(sale__owner=user)
-        elif user.employer and user.can_manage_sales:
-            # Employees can see their employer's sale items if they have permission
-            return SaleItem.objects.filter(sale__owner=user.employer)
-        return SaleItem.objects.none()
+    owner_field = 'sale__owner_id'
+    capability = 'sales'
     
     def get_permissions(self):
         """
@@ -163,28 +197,16 @@ class SaleItemViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+class ExpenseViewSet(ExportMixin, FarmScopedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and editing expenses."""
+    queryset = Expense.objects.all()
     serializer_class = ExpenseSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['expense_date', 'expense_type', 'payment_method']
     search_fields = ['vendor', 'receipt_number', 'description']
     ordering_fields = ['expense_date', 'amount', 'expense_type']
-    
-    def get_queryset(self):
-        """
-        This view should return a list of all expenses
-        for the currently authenticated user.
-        """
-        user = self.request.user
-        if user.is_staff:
-            return Expense.objects.all()
-        elif user.is_farm_owner:
-            return Expense.objects.filter(owner=user)
-        elif user.employer and user.can_manage_sales:
-            # Employees can see their employer's expenses if they have permission
-            return Expense.objects.filter(owner=user.employer)
-        return Expense.objects.none()
+    owner_field = 'owner_id'
+    capability = 'sales'
     
     def get_permissions(self):
         """
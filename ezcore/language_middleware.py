@@ -1,48 +1,62 @@
-from django.utils import translation
-from django.utils.deprecation import MiddlewareMixin
-from django.conf import settings
-
-
-class LanguageMiddleware(MiddlewareMixin):
-    """
-    Middleware to set the language based on user preferences or request headers.
-    """
-    
-    def process_request(self, request):
-        """
-        Process the request and set the language based on:
-        1. Language parameter in the request
-        2. User's preferred language (if authenticated)
-        3. Accept-Language header
-        4. Default language from settings
-        """
-        # Check for language parameter in the request
-        language = request.GET.get('lang')
-        
-        # If no language parameter, check authenticated user's preference
-        if not language and request.user.is_authenticated:
-            try:
-                language = request.user.preferred_language
-            except AttributeError:
-                pass
-        
-        # If still no language, use the default
-        if not language:
-            language = settings.LANGUAGE_CODE
-        
-        # Ensure the language is supported
-        if language not in [lang_code for lang_code, lang_name in settings.LANGUAGES]:
-            language = settings.LANGUAGE_CODE
-        
-        # Set the language for this request
-        translation.activate(language)
-        request.LANGUAGE_CODE = language
-        
-        return None
-    
-    def process_response(self, request, response):
-        """
-        Add Content-Language header to the response.
-        """
-        response['Content-Language'] = translation.get_language()
-        return response
+from django.utils import translation
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.conf import settings
+
+from user.authentication import get_header_token
+
+# Worked out once per process rather than on every request
+SUPPORTED_LANGUAGES = frozenset(lang_code for lang_code, lang_name in settings.LANGUAGES)
+DEFAULT_LANGUAGE = translation.get_supported_language_variant(settings.LANGUAGE_CODE)
+
+
+def resolve_language(request):
+    """
+    Return the supported language of a request, from:
+    1. Language parameter in the request
+    2. User's preferred language (from the access token or session)
+    3. Language cookie and Accept-Language header
+    4. Default language from settings
+    """
+    language = request.GET.get('lang')
+    if language in SUPPORTED_LANGUAGES:
+        return language
+
+    # The access token costs no query
+    token = get_header_token(request)
+    language = token.get('preferred_language') if token else None
+    if not language and request.user.is_authenticated:
+        language = getattr(request.user, 'preferred_language', None)
+    if language in SUPPORTED_LANGUAGES:
+        return language
+
+    language = translation.get_language_from_request(request)
+    return language if language in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE
+
+
+class LanguageMiddleware(MiddlewareMixin):
+    """
+    Middleware to set the language based on user preferences or request headers.
+
+    Responses vary on every input of the language, so a shared cache keeps
+    the English and Urdu variants of a response apart.
+    """
+
+    def process_request(self, request):
+        language = resolve_language(request)
+        # LocaleMiddleware has usually activated it already
+        if translation.get_language() != language:
+            translation.activate(language)
+        request.LANGUAGE_CODE = language
+        return None
+
+    def process_response(self, request, response):
+        """
+        Add Content-Language and Vary headers to the response.
+        """
+        response['Content-Language'] = getattr(request, 'LANGUAGE_CODE', None) or translation.get_language()
+        vary = ['Accept-Language', 'Cookie']
+        if 'HTTP_AUTHORIZATION' in request.META:
+            vary.append('Authorization')
+        patch_vary_headers(response, vary)
+        return response
@@ -0,0 +1,95 @@
+import os
+import resource
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from ezanimal.models import AnimalType, Breed
+from ezdairy.models import DairyAnimal, MilkProduction
+from ezdairy.views import MilkProductionViewSet
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    """Raised to discard the generated benchmark data."""
+
+
+def current_rss():
+    """Return the resident set size of this process in MB."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        # Peak instead of current size where /proc is not available
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = 'Measure time and memory of streaming a large milk record export'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=5000000, help='Number of milk records to generate')
+        parser.add_argument('--animals', type=int, default=500, help='Number of dairy animals to spread them over')
+        parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv', help='Export format')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                owner = self.generate(options)
+                self.export(owner, options['format'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write('Benchmark data discarded.')
+
+    def generate(self, options):
+        self.stdout.write(f"Generating {options['records']} milk records...")
+        owner = User.objects.create_user(email='benchmark@ezfarming.local', first_name='Benchmark')
+        animal_type = AnimalType.objects.create(name='Benchmark', farming_type='dairy')
+        breed = Breed.objects.create(animal_type=animal_type, name='Benchmark')
+        animals = DairyAnimal.objects.bulk_create([
+            DairyAnimal(tag_number=f'BD-{index}', animal_type=animal_type, breed=breed, owner=owner)
+            for index in range(options['animals'])
+        ])
+
+        start_date = date(2000, 1, 1)
+        batch = []
+        for index in range(options['records']):
+            batch.append(MilkProduction(
+                animal=animals[index % len(animals)],
+                date=start_date + timedelta(days=index // len(animals)),
+                morning_amount=6,
+                evening_amount=5,
+                total_amount=11,
+            ))
+            if len(batch) == 10000:
+                MilkProduction.objects.bulk_create(batch)
+                batch = []
+        MilkProduction.objects.bulk_create(batch)
+        return owner
+
+    def export(self, owner, export_format):
+        request = APIRequestFactory().get('/api/milk-productions/', {'format': export_format})
+        force_authenticate(request, user=owner)
+        view = MilkProductionViewSet.as_view({'get': 'list'})
+
+        rss_before = peak_rss = current_rss()
+        start = time.perf_counter()
+        response = view(request)
+        size = 0
+        for index, chunk in enumerate(response.streaming_content):
+            size += len(chunk)
+            if index % 10000 == 0:
+                peak_rss = max(peak_rss, current_rss())
+        response.close()
+        elapsed = time.perf_counter() - start
+        peak_rss = max(peak_rss, current_rss())
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{export_format}: {size / 2 ** 20:.1f} MB in {elapsed:.1f} s, '
+            f'RSS {rss_before:.0f} MB before and {peak_rss:.0f} MB at peak'
+        ))
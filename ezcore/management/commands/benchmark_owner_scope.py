@@ -0,0 +1,94 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from ezanimal.models import AnimalType, Breed
+from ezcore.health_and_feed.models import FeedType, FeedingRecord
+from ezdairy.models import DairyAnimal
+from ezmeat.models import MeatAnimal
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    """Raised to discard the generated benchmark data."""
+
+
+class Command(BaseCommand):
+    help = 'Compare farm scoping of feeding records through animal joins against the owner column'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=1000000, help='Number of feeding records to generate')
+        parser.add_argument('--farms', type=int, default=20, help='Number of farms to spread the records over')
+        parser.add_argument('--animals', type=int, default=50, help='Dairy and meat animals per farm')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs per query')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                farm_owner_id = self.generate(options)
+                self.compare(farm_owner_id, options['repeat'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write('Benchmark data discarded.')
+
+    def generate(self, options):
+        self.stdout.write(f"Generating {options['records']} feeding records...")
+        animal_type = AnimalType.objects.create(name='Benchmark', farming_type='both')
+        breed = Breed.objects.create(animal_type=animal_type, name='Benchmark')
+        feed_type = FeedType.objects.create(name='Benchmark', feed_category='forage')
+
+        animals = []
+        for farm in range(options['farms']):
+            owner = User.objects.create_user(email=f'benchmark{farm}@ezfarming.local', first_name='Benchmark')
+            dairy = DairyAnimal.objects.bulk_create([
+                DairyAnimal(tag_number=f'BD-{farm}-{index}', animal_type=animal_type, breed=breed, owner=owner)
+                for index in range(options['animals'])
+            ])
+            meat = MeatAnimal.objects.bulk_create([
+                MeatAnimal(tag_number=f'BM-{farm}-{index}', animal_type=animal_type, breed=breed, gender='male', owner=owner)
+                for index in range(options['animals'])
+            ])
+            animals.extend(('dairy_animal', animal) for animal in dairy)
+            animals.extend(('meat_animal', animal) for animal in meat)
+
+        start_date = date(2020, 1, 1)
+        batch = []
+        for index in range(options['records']):
+            field, animal = random.choice(animals)
+            batch.append(FeedingRecord(
+                date=start_date + timedelta(days=index % 1825),
+                feed_type=feed_type,
+                amount=5,
+                time_of_day='morning',
+                owner_id=animal.owner_id,
+                **{field: animal},
+            ))
+            if len(batch) == 10000:
+                FeedingRecord.objects.bulk_create(batch)
+                batch = []
+        FeedingRecord.objects.bulk_create(batch)
+        return animals[0][1].owner_id
+
+    def compare(self, farm_owner_id, repeat):
+        approaches = {
+            'animal joins (OR)': FeedingRecord.objects.filter(
+                Q(dairy_animal__owner_id=farm_owner_id) | Q(meat_animal__owner_id=farm_owner_id)
+            ),
+            'owner column': FeedingRecord.objects.filter(owner_id=farm_owner_id),
+        }
+        for name, queryset in approaches.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                queryset.count()
+                list(queryset.order_by('-date', 'time_of_day')[:10])
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: best {min(timings) * 1000:.1f} ms, mean {sum(timings) / len(timings) * 1000:.1f} ms'
+            ))
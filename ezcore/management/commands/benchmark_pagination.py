@@ -0,0 +1,119 @@
+import time
+from urllib.parse import parse_qs, urlsplit
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from ezanimal.models import AnimalType, Breed
+from ezdairy.models import DairyAnimal, MilkProduction
+from ezdairy.views import MilkProductionPagination, MilkProductionViewSet
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    """Raised to discard the generated benchmark data."""
+
+
+class OffsetPagination(PageNumberPagination):
+    """Page number pagination with the same ?page_size= as the keyset pages."""
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class Command(BaseCommand):
+    help = 'Compare page number and keyset pagination of milk records at page 1 and a deep page'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=1000000, help='Number of milk records to generate')
+        parser.add_argument('--farms', type=int, default=20, help='Number of farms to spread the records over')
+        parser.add_argument('--animals', type=int, default=50, help='Dairy animals per farm')
+        parser.add_argument('--page', type=int, default=10000, help='Deep page to compare against page 1')
+        parser.add_argument('--page-size', type=int, default=10, help='Rows per page')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs per request')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                owner = self.generate(options)
+                self.compare(owner, options)
+                raise Rollback
+        except Rollback:
+            self.stdout.write('Benchmark data discarded.')
+
+    def generate(self, options):
+        self.stdout.write(f"Generating {options['records']} milk records...")
+        animal_type = AnimalType.objects.create(name='Benchmark', farming_type='dairy')
+        breed = Breed.objects.create(animal_type=animal_type, name='Benchmark')
+        animals = []
+        for farm in range(options['farms']):
+            owner = User.objects.create_user(email=f'benchmark{farm}@ezfarming.local', first_name='Benchmark')
+            animals.extend(DairyAnimal.objects.bulk_create([
+                DairyAnimal(tag_number=f'BD-{farm}-{index}', animal_type=animal_type, breed=breed, owner=owner)
+                for index in range(options['animals'])
+            ]))
+
+        # bulk_create skips save(), so total_amount is set here
+        start_date = date(2000, 1, 1)
+        batch = []
+        for index in range(options['records']):
+            batch.append(MilkProduction(
+                animal=animals[index % len(animals)],
+                date=start_date + timedelta(days=index // len(animals)),
+                morning_amount=5,
+                total_amount=5,
+            ))
+            if len(batch) == 10000:
+                MilkProduction.objects.bulk_create(batch)
+                batch = []
+        MilkProduction.objects.bulk_create(batch)
+        return animals[0].owner
+
+    def compare(self, owner, options):
+        factory = APIRequestFactory(SERVER_NAME='localhost')
+        views = {
+            'keyset': MilkProductionViewSet.as_view({'get': 'list'}),
+            'offset': MilkProductionViewSet.as_view({'get': 'list'}, pagination_class=OffsetPagination),
+        }
+
+        def fetch(params, paging='keyset'):
+            request = factory.get('/api/milk-production/', params)
+            force_authenticate(request, user=owner)
+            response = views[paging](request)
+            response.render()
+            return response
+
+        # Start the keyset page after the last row of the page before it
+        page_size = options['page_size']
+        deep_page = options['page']
+        paginator = MilkProductionPagination()
+        paginator.base_url = '/api/milk-production/'
+        last = MilkProduction.objects.filter(animal__owner=owner).order_by('-date', '-id')[(deep_page - 1) * page_size - 1]
+        cursor = parse_qs(urlsplit(paginator.encode_cursor(last, reverse=False)).query)['cursor'][0]
+        cursor_params = {'page_size': page_size, 'count': 'false', 'cursor': cursor}
+
+        # Both walk the newest records first
+        ordering = '-date'
+        approaches = {
+            'page numbers, page 1': ('offset', {'ordering': ordering, 'page_size': page_size}),
+            f'page numbers, page {deep_page}': ('offset', {'ordering': ordering, 'page_size': page_size, 'page': deep_page}),
+            'keyset, page 1': ('keyset', {'page_size': page_size}),
+            f'keyset, page {deep_page}': ('keyset', dict(cursor_params, count='true')),
+            f'keyset, page {deep_page} without count': ('keyset', cursor_params),
+        }
+        for name, (paging, params) in approaches.items():
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                response = fetch(params, paging)
+                timings.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                self.stdout.write(self.style.ERROR(f'{name}: HTTP {response.status_code}'))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: best {min(timings) * 1000:.1f} ms, mean {sum(timings) / len(timings) * 1000:.1f} ms'
+            ))
@@ -0,0 +1,116 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework import permissions
+from rest_framework.request import Request
+
+from ezanimal.models import AnimalType, Breed
+from ezcore.inventory_and_sales.views import ExpenseViewSet
+from ezcore.permissions import HasFarmAccess, IsOwnerOrEmployee
+from ezcore.reports.views import PnLReportView
+from ezdairy.models import DairyAnimal
+from ezdairy.views import DairyAnimalViewSet
+
+User = get_user_model()
+
+# The view names each User flag used to be checked against
+LEGACY_VIEW_NAMES = [
+    (['AnimalTypeViewSet', 'BreedViewSet', 'DairyAnimalViewSet', 'MeatAnimalViewSet'], 'can_manage_animals'),
+    (['AnimalHealthViewSet', 'VaccinationViewSet'], 'can_manage_health'),
+    (['FeedTypeViewSet', 'FeedingScheduleViewSet', 'FeedingRecordViewSet'], 'can_manage_feeding'),
+    (['InventoryItemViewSet', 'InventoryTransactionViewSet'], 'can_manage_inventory'),
+    (['SaleViewSet', 'ExpenseViewSet'], 'can_manage_sales'),
+    (['DashboardView', 'PnLReportView', 'FeedCostReportView', 'AnimalProfitabilityView'], 'can_view_reports'),
+]
+
+
+class Rollback(Exception):
+    """Raised to discard the generated benchmark data."""
+
+
+def legacy_has_permission(request, view):
+    """HasFarmAccess as it was, dispatching on the view's class name."""
+    user = request.user
+    if not user.is_authenticated:
+        return False
+    if user.is_staff or user.is_farm_owner:
+        return True
+    if user.employer is not None:
+        for names, flag in LEGACY_VIEW_NAMES:
+            if view.__class__.__name__ in names and not getattr(user, flag):
+                return False
+        return request.method in permissions.SAFE_METHODS
+    return False
+
+
+def legacy_has_object_permission(request, view, obj):
+    """IsOwnerOrEmployee as it was, comparing the owner rows."""
+    user = request.user
+    if obj.owner == user:
+        return True
+    if user.employer == obj.owner:
+        if hasattr(obj, 'animal_type') and not user.can_manage_animals:
+            return False
+        return legacy_has_permission(request, view)
+    return False
+
+
+class Command(BaseCommand):
+    help = 'Compare the cost per request of the permission checks before and after the capability bits'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help='Number of requests per timed run')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs per approach')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.compare(*self.generate(), options['requests'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write('Benchmark data discarded.')
+
+    def generate(self):
+        owner = User.objects.create_user(email='benchmark@ezfarming.local', first_name='Benchmark')
+        worker = User.objects.create_user(
+            email='benchmark-worker@ezfarming.local', first_name='Worker', role='worker', employer=owner
+        )
+        animal_type = AnimalType.objects.create(name='Benchmark', farming_type='dairy')
+        breed = Breed.objects.create(animal_type=animal_type, name='Benchmark')
+        animal = DairyAnimal.objects.create(tag_number='B-1', animal_type=animal_type, breed=breed, owner=owner)
+        return worker.pk, animal.pk
+
+    def compare(self, worker_id, animal_id, count, repeat):
+        views = [DairyAnimalViewSet(), ExpenseViewSet(), PnLReportView()]
+        factory = RequestFactory()
+
+        def requests():
+            # A fresh user and object per request, as each request loads them again
+            for index in range(count):
+                request = Request(factory.get('/'))
+                request.user = User.objects.get(pk=worker_id)
+                yield request, views[index % len(views)], DairyAnimal.objects.get(pk=animal_id)
+
+        def legacy(request, view, obj):
+            legacy_has_permission(request, view)
+            legacy_has_object_permission(request, view, obj)
+
+        def capability_bits(request, view, obj):
+            HasFarmAccess().has_permission(request, view)
+            IsOwnerOrEmployee().has_object_permission(request, view, obj)
+
+        for name, check in [('view names', legacy), ('capability bits', capability_bits)]:
+            timings = []
+            for _ in range(repeat):
+                elapsed = 0
+                for request, view, obj in requests():
+                    start = time.perf_counter()
+                    check(request, view, obj)
+                    elapsed += time.perf_counter() - start
+                timings.append(elapsed / count)
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: best {min(timings) * 1e6:.1f} us, mean {sum(timings) / len(timings) * 1e6:.1f} us per request'
+            ))
@@ -0,0 +1,68 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from ezanimal.models import AnimalType, Breed
+from ezdairy.models import DairyAnimal
+from user.authentication import FarmJWTAuthentication
+from user.tokens import FarmTokenObtainPairSerializer
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    """Raised to discard the generated benchmark data."""
+
+
+class Command(BaseCommand):
+    help = 'Compare requests per second on /api/dairy-animals/ with the user loaded from the database or the token'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--animals', type=int, default=50, help='Number of dairy animals on the farm')
+        parser.add_argument('--requests', type=int, default=500, help='Number of requests per timed run')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs per authentication')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                token = self.generate(options)
+                self.compare(token, options['requests'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write('Benchmark data discarded.')
+
+    def generate(self, options):
+        owner = User.objects.create_user(email='benchmark@ezfarming.local', first_name='Benchmark')
+        worker = User.objects.create_user(
+            email='benchmark-worker@ezfarming.local', first_name='Worker', role='worker', employer=owner
+        )
+        animal_type = AnimalType.objects.create(name='Benchmark', farming_type='dairy')
+        breed = Breed.objects.create(animal_type=animal_type, name='Benchmark')
+        DairyAnimal.objects.bulk_create([
+            DairyAnimal(tag_number=f'BD-{index}', animal_type=animal_type, breed=breed, owner=owner)
+            for index in range(options['animals'])
+        ])
+        return str(FarmTokenObtainPairSerializer.get_token(worker).access_token)
+
+    def compare(self, token, count, repeat):
+        client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {token}')
+        approaches = {'user row': JWTAuthentication, 'token user': FarmJWTAuthentication}
+        for name, authentication_class in approaches.items():
+            with mock.patch.object(APIView, 'authentication_classes', [authentication_class, SessionAuthentication]):
+                assert client.get('/api/dairy-animals/').status_code == 200
+                rates = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    for _ in range(count):
+                        client.get('/api/dairy-animals/')
+                    rates.append(count / (time.perf_counter() - start))
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: best {max(rates):.0f} requests/s, mean {sum(rates) / len(rates):.0f} requests/s'
+            ))
@@ -0,0 +1,32 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ezcore.inventory_and_sales.models import InventoryItem, InventorySnapshot
+
+
+class Command(BaseCommand):
+    help = 'Freeze the stock of every inventory item at a month end into inventory snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, help='Closing date (defaults to the last month end)')
+        parser.add_argument('--owner', type=int, help='Only close the items of this farm owner id')
+
+    def handle(self, *args, **options):
+        day = options['date'] or timezone.localdate().replace(day=1) - timedelta(days=1)
+        items = InventoryItem.objects.with_stock_at(day)
+        if options['owner']:
+            items = items.filter(owner_id=options['owner'])
+
+        snapshots = InventorySnapshot.objects.bulk_create(
+            [
+                InventorySnapshot(item=item, date=day, quantity=item.stock_quantity, unit_price=item.stock_unit_price)
+                for item in items.iterator()
+            ],
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['item', 'date'],
+            update_fields=['quantity', 'unit_price'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Saved {len(snapshots)} inventory snapshots for {day}.'))
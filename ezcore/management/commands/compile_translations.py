@@ -0,0 +1,58 @@
+import struct
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ezcore.translations import catalog_messages
+
+HEADER = 'Content-Type: text/plain; charset=UTF-8\nLanguage: {language}\n'
+
+
+def quote(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def write_po(path, language, messages):
+    lines = ['msgid ""', f'msgstr {quote(HEADER.format(language=language))}', '']
+    for msgid, msgstr in sorted(messages.items()):
+        lines += [f'msgid {quote(msgid)}', f'msgstr {quote(msgstr)}', '']
+    path.write_text('\n'.join(lines), encoding='utf-8')
+
+
+def write_mo(path, language, messages):
+    """Write a GNU .mo catalog, as msgfmt would, so no gettext tools are needed at build time."""
+    entries = sorted(
+        [(b'', HEADER.format(language=language).encode())]
+        + [(msgid.encode(), msgstr.encode()) for msgid, msgstr in messages.items()]
+    )
+    ids = strs = b''
+    offsets = []
+    for msgid, msgstr in entries:
+        offsets.append((len(ids), len(msgid), len(strs), len(msgstr)))
+        ids += msgid + b'\0'
+        strs += msgstr + b'\0'
+    ids_start = 7 * 4 + 16 * len(entries)
+    strs_start = ids_start + len(ids)
+    table = [value for id_offset, id_length, str_offset, str_length in offsets
+             for value in (id_length, id_offset + ids_start)]
+    table += [value for id_offset, id_length, str_offset, str_length in offsets
+              for value in (str_length, str_offset + strs_start)]
+    header = struct.pack('<7I', 0x950412de, 0, len(entries), 7 * 4, 7 * 4 + 8 * len(entries), 0, 0)
+    path.write_bytes(header + struct.pack(f'<{len(table)}I', *table) + ids + strs)
+
+
+class Command(BaseCommand):
+    help = 'Compile the tables of ezcore.translations into gettext catalogs'
+
+    def handle(self, *args, **options):
+        locale_path = Path(settings.LOCALE_PATHS[0])
+        for language, name in settings.LANGUAGES:
+            messages = catalog_messages(language)
+            if language == 'en' or not messages:
+                continue
+            directory = locale_path / language / 'LC_MESSAGES'
+            directory.mkdir(parents=True, exist_ok=True)
+            write_po(directory / 'django.po', language, messages)
+            write_mo(directory / 'django.mo', language, messages)
+            self.stdout.write(self.style.SUCCESS(f'{language}: {len(messages)} messages compiled'))
@@ -0,0 +1,50 @@
+import asyncio
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ezmeat.models import MeatAnimal
+
+
+class Command(BaseCommand):
+    help = 'Serve fake chute scale readings over TCP to exercise ingest_scale --connect'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=5555, help='Port to serve readings on')
+        parser.add_argument('--rate', type=int, default=500, help='Readings per second')
+        parser.add_argument('--count', type=int, default=5000, help='Readings to send before closing the connection')
+        parser.add_argument('--unknown', type=float, default=0.01, help='Share of readings with an unknown tag')
+
+    def handle(self, *args, **options):
+        tags = list(MeatAnimal.objects.values_list('tag_number', flat=True))
+        if not tags:
+            raise CommandError('There are no meat animals to emit readings for.')
+        asyncio.run(self.serve(tags, options))
+
+    async def serve(self, tags, options):
+        done = asyncio.Event()
+
+        async def emit(reader, writer):
+            self.stdout.write('Reader connected, emitting...')
+            started = time.perf_counter()
+            for index in range(options['count']):
+                tag = 'UNKNOWN-%d' % index if random.random() < options['unknown'] else random.choice(tags)
+                writer.write(f'{tag},{random.uniform(50, 400):.2f},{timezone.now().isoformat()}\n'.encode())
+                # Pace the readings and let TCP flow control push back on a slow reader
+                await writer.drain()
+                delay = started + (index + 1) / options['rate'] - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elapsed = time.perf_counter() - started
+            writer.close()
+            self.stdout.write(self.style.SUCCESS(
+                f"Sent {options['count']} readings in {elapsed:.2f} s ({options['count'] / elapsed:.0f}/s)."
+            ))
+            done.set()
+
+        server = await asyncio.start_server(emit, '127.0.0.1', options['port'])
+        self.stdout.write(f"Serving readings on 127.0.0.1:{options['port']}.")
+        async with server:
+            await done.wait()
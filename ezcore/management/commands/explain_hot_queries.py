@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ezcore.mixins import FarmScopedQuerySetMixin
+from ez_farming.api_urls import router
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Print the query plan of the first list page of every farm scoped endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help='User to scope the queries for (defaults to the first farm owner)')
+        parser.add_argument('--endpoint', action='append', help='Only explain these route prefixes, e.g. milk-productions')
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['email'])
+        self.stdout.write(f'Query plans on {connection.vendor} for {user.email}')
+
+        for prefix, viewset_class, basename in router.registry:
+            if not issubclass(viewset_class, FarmScopedQuerySetMixin):
+                continue
+            if options['endpoint'] and prefix not in options['endpoint']:
+                continue
+            queryset = self.get_list_queryset(viewset_class, user)
+            self.stdout.write(self.style.SUCCESS(f'\n/api/{prefix}/'))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain())
+
+    def get_user(self, email):
+        if email:
+            try:
+                return User.objects.get(email=email)
+            except User.DoesNotExist:
+                raise CommandError(f'No user with email {email}')
+        user = User.objects.filter(is_farm_owner=True, is_staff=False).order_by('pk').first()
+        if user is None:
+            raise CommandError('No farm owner found, pass --email')
+        return user
+
+    def get_list_queryset(self, viewset_class, user):
+        """
+        Build the queryset the list action runs for the first page, going
+        through the viewset's own scoping and filter backends.
+        """
+        request = Request(APIRequestFactory().get('/'))
+        request.user = user
+        view = viewset_class(request=request, format_kwarg=None, action='list', kwargs={})
+        queryset = view.filter_queryset(view.get_queryset())
+        page_size = view.paginator.get_page_size(request) if view.paginator else None
+        return queryset[:page_size] if page_size else queryset
@@ -0,0 +1,100 @@
+import asyncio
+import signal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ezcore.ingest import ScaleIngestor, TagIndex
+
+User = get_user_model()
+
+
+def host_port(value):
+    host, _, port = value.rpartition(':')
+    return host or '0.0.0.0', int(port)
+
+
+class Command(BaseCommand):
+    help = 'Ingest tag_number,weight,timestamp lines from chute scales and RFID readers into weight records'
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--listen', type=host_port, help='Accept reader connections on [HOST:]PORT')
+        source.add_argument('--connect', type=host_port, help='Connect to a reader serving lines on HOST:PORT')
+        source.add_argument('--device', help='Read a serial device, e.g. /dev/ttyUSB0 configured with stty')
+        parser.add_argument('--batch-size', type=int, default=500, help='Readings written per transaction')
+        parser.add_argument('--flush-interval', type=float, default=1.0, help='Seconds to wait before writing a partial batch')
+        parser.add_argument('--max-pending', type=int, default=5000, help='Readings queued before readers are paused')
+        parser.add_argument('--dead-letter', default='scale_dead_letter.csv', help='CSV file for unknown tags and bad lines')
+        parser.add_argument('--health', action='store_true', help='Record dairy animal weights on routine health checks')
+        parser.add_argument('--recorded-by', type=int, help='User id to record the weigh-ins as')
+        parser.add_argument('--duration', type=float, help='Stop after this many seconds instead of running until interrupted')
+
+    def handle(self, *args, **options):
+        recorded_by = None
+        if options['recorded_by']:
+            recorded_by = User.objects.filter(pk=options['recorded_by']).first()
+            if recorded_by is None:
+                raise CommandError(f"No user with id {options['recorded_by']}.")
+
+        index = TagIndex()
+        index.load()
+        self.stdout.write(f'Loaded {len(index.animals)} tags.')
+        ingestor = ScaleIngestor(
+            index,
+            batch_size=options['batch_size'],
+            flush_interval=options['flush_interval'],
+            max_pending=options['max_pending'],
+            dead_letter=options['dead_letter'],
+            record_health=options['health'],
+            recorded_by=recorded_by,
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        asyncio.run(self.run(ingestor, options))
+        self.stdout.write(self.style.SUCCESS(
+            f'Received {ingestor.received} readings, wrote {ingestor.written}, '
+            f"rejected {ingestor.rejected} to {options['dead_letter']}."
+        ))
+
+    async def run(self, ingestor, options):
+        writer = asyncio.create_task(ingestor.run_writer())
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        if options['duration']:
+            loop.call_later(options['duration'], stop.set)
+
+        readers = set()
+        server = None
+        if options['listen']:
+            def accept(stream_reader, stream_writer):
+                reader = asyncio.create_task(ingestor.read_stream(stream_reader, stream_writer))
+                readers.add(reader)
+                reader.add_done_callback(readers.discard)
+
+            server = await asyncio.start_server(accept, *options['listen'])
+            self.stdout.write(f"Listening on {options['listen'][0]}:{options['listen'][1]}.")
+        elif options['connect']:
+            try:
+                stream_reader, stream_writer = await asyncio.open_connection(*options['connect'])
+            except OSError as exc:
+                writer.cancel()
+                raise CommandError(f'Could not connect to the reader: {exc}')
+            readers.add(asyncio.create_task(ingestor.read_stream(stream_reader, stream_writer)))
+        else:
+            readers.add(asyncio.create_task(ingestor.read_device(options['device'])))
+
+        stopped = asyncio.create_task(stop.wait())
+        if server is None:
+            # A single source ends the run when it closes
+            await asyncio.wait([stopped, *readers], return_when=asyncio.FIRST_COMPLETED)
+        else:
+            await stopped
+            server.close()
+        stopped.cancel()
+        for reader in list(readers):
+            reader.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+        await ingestor.close()
+        await writer
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ezcore.analytics.models import AnimalProfitability
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-animal profitability ledger from the underlying records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', type=int, help='Only rebuild the animals of this farm owner id')
+        parser.add_argument('--stale', action='store_true', help='Only recompute stale or missing rows')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            written = AnimalProfitability.objects.refresh(owner_id=options['owner'], stale_only=options['stale'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {written} animals in {time.perf_counter() - started:.2f} s.'
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ezcore.dashboard.models import FarmDailySummary, SUMMARY_SOURCES
+
+
+class Command(BaseCommand):
+    help = 'Recompute the farm daily summaries behind the dashboard from the underlying records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', type=int, help='Only rebuild the summaries of this farm owner id')
+
+    def handle(self, *args, **options):
+        summaries = FarmDailySummary.objects.all()
+        if options['owner']:
+            summaries = summaries.filter(owner_id=options['owner'])
+
+        with transaction.atomic():
+            deleted, _ = summaries.delete()
+            for source in SUMMARY_SOURCES.values():
+                FarmDailySummary.objects.refresh(source, owner_id=options['owner'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {deleted} summaries and rebuilt {summaries.count()}.'
+        ))
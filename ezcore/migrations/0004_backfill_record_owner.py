@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_owner(apps, schema_editor):
+    """Copy the owner of each record's animal onto the record."""
+    DairyAnimal = apps.get_model('ezdairy', 'DairyAnimal')
+    MeatAnimal = apps.get_model('ezmeat', 'MeatAnimal')
+    for model_name in ('AnimalHealth', 'Vaccination', 'FeedingRecord'):
+        model = apps.get_model('ezcore', model_name)
+        model.objects.filter(dairy_animal__isnull=False).update(
+            owner_id=Subquery(DairyAnimal.objects.filter(pk=OuterRef('dairy_animal_id')).values('owner_id')[:1])
+        )
+        model.objects.filter(meat_animal__isnull=False).update(
+            owner_id=Subquery(MeatAnimal.objects.filter(pk=OuterRef('meat_animal_id')).values('owner_id')[:1])
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezcore', '0003_animalhealth_owner_feedingrecord_owner_and_more'),
+        ('ezdairy', '0002_alter_lactation_options_alter_milkproduction_options_and_more'),
+        ('ezmeat', '0002_alter_weightrecord_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_owner, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 14:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezcore', '0004_backfill_record_owner'),
+        ('ezdairy', '0002_alter_lactation_options_alter_milkproduction_options_and_more'),
+        ('ezmeat', '0002_alter_weightrecord_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='animalhealth',
+            index=models.Index(fields=['owner', '-record_date'], name='ezcore_health_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['owner', '-expense_date'], name='ezcore_expense_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedingrecord',
+            index=models.Index(fields=['owner', '-date', 'time_of_day'], name='ezcore_feeding_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedingrecord',
+            index=models.Index(fields=['-date', 'time_of_day'], name='ezcore_feeding_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['owner', 'name'], name='ezcore_invitem_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorytransaction',
+            index=models.Index(fields=['item', '-transaction_date'], name='ezcore_invtx_item_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['owner', '-sale_date'], name='ezcore_sale_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vaccination',
+            index=models.Index(fields=['owner', '-vaccination_date'], name='ezcore_vacc_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vaccination',
+            index=models.Index(condition=models.Q(('next_due_date__isnull', False)), fields=['next_due_date'], name='ezcore_vacc_due_idx'),
+        ),
+    ]
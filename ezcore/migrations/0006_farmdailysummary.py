@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 14:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezcore', '0005_animalhealth_ezcore_health_owner_date_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FarmDailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='date')),
+                ('milk_total', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='milk total')),
+                ('milk_records', models.PositiveIntegerField(default=0, verbose_name='milk records')),
+                ('weight_gain', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='weight gain')),
+                ('weight_gain_days', models.PositiveIntegerField(default=0, verbose_name='weight gain days')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='revenue')),
+                ('expenses', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='expenses')),
+                ('stock_usage_value', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='stock usage value')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries', to=settings.AUTH_USER_MODEL, verbose_name='owner')),
+            ],
+            options={
+                'verbose_name': 'farm daily summary',
+                'verbose_name_plural': 'farm daily summaries',
+                'ordering': ['-date'],
+                'unique_together': {('owner', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 15:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezcore', '0006_farmdailysummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventorytransaction',
+            name='balance_after',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10, null=True, verbose_name='balance after'),
+        ),
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='date')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='quantity')),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='unit price')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='ezcore.inventoryitem', verbose_name='item')),
+            ],
+            options={
+                'verbose_name': 'inventory snapshot',
+                'verbose_name_plural': 'inventory snapshots',
+                'ordering': ['-date', 'item'],
+                'unique_together': {('item', 'date')},
+            },
+        ),
+    ]
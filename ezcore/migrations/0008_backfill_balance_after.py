@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def backfill_balance_after(apps, schema_editor):
+    """Replay each item's transactions in date order to fill in balance_after."""
+    InventoryItem = apps.get_model('ezcore', 'InventoryItem')
+    InventoryTransaction = apps.get_model('ezcore', 'InventoryTransaction')
+    incoming_types = ['purchase', 'adjustment', 'transfer']
+    for item in InventoryItem.objects.only('quantity').iterator():
+        records = list(item.transactions.order_by('transaction_date', 'id'))
+        changes = [
+            record.quantity if record.transaction_type in incoming_types else -record.quantity
+            for record in records
+        ]
+        # The opening stock is the current quantity less every recorded movement
+        balance = item.quantity - sum(changes)
+        for record, change in zip(records, changes):
+            balance += change
+            record.balance_after = balance
+        InventoryTransaction.objects.bulk_update(records, ['balance_after'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezcore', '0007_inventory_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_balance_after, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-18 16:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezcore', '0008_backfill_balance_after'),
+        ('ezdairy', '0003_dairyanimal_ezdairy_animal_owner_tag_idx_and_more'),
+        ('ezmeat', '0004_meatanimal_expected_ready_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnimalProfitability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('animal_kind', models.CharField(choices=[('dairy', 'Dairy'), ('meat', 'Meat')], max_length=10, verbose_name='animal kind')),
+                ('acquisition_cost', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='acquisition cost')),
+                ('feed_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='feed amount (kg)')),
+                ('feed_cost', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='feed cost')),
+                ('health_cost', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='health cost')),
+                ('vaccination_cost', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='vaccination cost')),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='total cost')),
+                ('milk_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='milk amount')),
+                ('milk_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='milk revenue')),
+                ('sale_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='sale revenue')),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='total revenue')),
+                ('profit', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='profit')),
+                ('is_stale', models.BooleanField(default=False, verbose_name='stale')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+                ('dairy_animal', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='profitability', to='ezdairy.dairyanimal', verbose_name='dairy animal')),
+                ('meat_animal', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='profitability', to='ezmeat.meatanimal', verbose_name='meat animal')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='animal_profitability', to=settings.AUTH_USER_MODEL, verbose_name='owner')),
+            ],
+            options={
+                'verbose_name': 'animal profitability',
+                'verbose_name_plural': 'animal profitability',
+                'ordering': ['profit'],
+                'indexes': [models.Index(fields=['owner', 'profit'], name='ezcore_profit_owner_idx')],
+            },
+        ),
+    ]
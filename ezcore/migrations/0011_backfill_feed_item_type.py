@@ -0,0 +1,24 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Lower
+
+
+def link_feed_items(apps, schema_editor):
+    """Link each feed item to the feed type of the same name, ignoring case."""
+    FeedType = apps.get_model('ezcore', 'FeedType')
+    InventoryItem = apps.get_model('ezcore', 'InventoryItem')
+    feed_types = FeedType.objects.annotate(lower_name=Lower('name')).filter(lower_name=Lower(OuterRef('name')))
+    InventoryItem.objects.filter(item_type='feed', feed_type__isnull=True).update(
+        feed_type_id=Subquery(feed_types.values('pk')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezcore', '0010_inventoryitem_feed_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_feed_items, migrations.RunPython.noop),
+    ]
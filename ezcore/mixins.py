@@ -0,0 +1,217 @@
+from functools import reduce
+import hashlib
+import operator
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from ezcore.permissions import get_farm_owner_id, has_capability
+from ezcore.reference import REFERENCE_CACHE_TIMEOUT, get_reference_version
+from ezcore.renderers import CSVRenderer, XLSXRenderer, iter_csv, write_xlsx
+
+
+# Related paths per serializer class, computed once per process
+_related_paths_cache = {}
+
+
+def get_related_paths(serializer_class, model):
+    """
+    Work out the select_related and prefetch_related paths needed by a
+    serializer from the source of its fields, e.g. a field with
+    source='animal.tag_number' needs 'animal' to be selected.
+    """
+    if serializer_class in _related_paths_cache:
+        return _related_paths_cache[serializer_class]
+
+    select_related, prefetch_related = set(), set()
+    for field in serializer_class().fields.values():
+        if field.source == '*':
+            continue
+        parts = field.source.split('.')
+        if isinstance(field, serializers.ListSerializer):
+            prefetch_related.add('__'.join(parts))
+            continue
+        # Only the last part of a dotted source is read from the related object,
+        # unless the field is a nested serializer of the relation itself.
+        if not isinstance(field, serializers.BaseSerializer):
+            parts = parts[:-1]
+
+        path, current_model = [], model
+        for part in parts:
+            try:
+                model_field = current_model._meta.get_field(part)
+            except FieldDoesNotExist:
+                break
+            if not (model_field.many_to_one or model_field.one_to_one) or not model_field.concrete:
+                break
+            path.append(part)
+            current_model = model_field.related_model
+        if path:
+            select_related.add('__'.join(path))
+
+    paths = (sorted(select_related), sorted(prefetch_related))
+    _related_paths_cache[serializer_class] = paths
+    return paths
+
+
+class FarmScopedQuerySetMixin:
+    """
+    Limit a viewset's queryset to the farm of the current user.
+
+    Viewsets declare the lookup to the owner's id in owner_field (a list of
+    lookups is OR-ed together) and the area of the farm employees need the
+    capability of in capability, see ezcore.permissions.CAPABILITIES.
+    Related objects read by the serializer are selected automatically.
+    """
+    owner_field = 'owner_id'
+    capability = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select_related, prefetch_related = get_related_paths(self.get_serializer_class(), queryset.model)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return self.filter_by_farm(queryset)
+
+    def get_farm_owner_id(self):
+        """Return the id of the farm owner for the current request."""
+        return get_farm_owner_id(self.request)
+
+    def filter_by_farm(self, queryset, owner_field=None, capability=None):
+        """Filter a queryset down to the records the current user may see."""
+        user = self.request.user
+        if user.is_staff:
+            return queryset
+
+        capability = capability or self.capability
+        farm_owner_id = self.get_farm_owner_id()
+        if farm_owner_id is None:
+            return queryset.none()
+        # Employees also need the capability of this viewset
+        if not has_capability(self.request, capability):
+            return queryset.none()
+
+        owner_field = owner_field or self.owner_field
+        lookups = [owner_field] if isinstance(owner_field, str) else owner_field
+        return queryset.filter(reduce(operator.or_, [Q(**{lookup: farm_owner_id}) for lookup in lookups]))
+
+
+class ReferenceDataMixin:
+    """
+    Serve a small, rarely changing lookup table shared by every farm.
+
+    JSON lists and details are cached per version of the reference data
+    (see ezcore.reference), language and URL, and carry a strong ETag and
+    Last-Modified, so a warm request reads nothing from the database and a
+    client revalidating what it already has gets a 304. The signals in
+    ezcore.signals move the version on every write, which every worker
+    sees as long as they share the default cache.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select_related, prefetch_related = get_related_paths(self.get_serializer_class(), queryset.model)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        # Exports and the browsable API are rendered per request
+        if request.accepted_renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+
+        version = get_reference_version()
+        # The absolute URI, as the pagination links in the body carry the host
+        key = f'ezcore:reference:{version}:{translation.get_language()}:{request.build_absolute_uri()}'
+        etag = f'"{hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()}"'
+        last_modified = version // 1_000_000
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            data = cache.get(key)
+            if data is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cache.set(key, response.data, REFERENCE_CACHE_TIMEOUT)
+            else:
+                response = Response(data)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Clients keep their copy but check it is current on every use
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class ExportMixin:
+    """
+    Let a viewset's list be downloaded with ?format=csv or ?format=xlsx.
+
+    The export honours the filter, search and ordering parameters of the
+    list, skips pagination and reads the queryset in chunks, so memory use
+    does not grow with the number of rows.
+    """
+    export_chunk_size = 2000
+
+    def get_renderers(self):
+        return super().get_renderers() + [CSVRenderer(), XLSXRenderer()]
+
+    def list(self, request, *args, **kwargs):
+        export_format = request.accepted_renderer.format
+        if export_format in ('csv', 'xlsx'):
+            return self.export(export_format)
+        return super().list(request, *args, **kwargs)
+
+    def get_export_rows(self, serializer, header):
+        """
+        Yield one list of serialized values per object in the filtered
+        queryset, in the order of header. Keys a serializer adds to only
+        some rows are left out, so every row lines up with the header.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        for instance in queryset.iterator(chunk_size=self.export_chunk_size):
+            data = serializer.to_representation(instance)
+            yield [data.get(name) for name in header]
+
+    def export(self, export_format):
+        serializer = self.get_serializer()
+        fields = [field for field in serializer.fields.values() if not field.write_only]
+        header = [field.field_name for field in fields]
+        rows = self.get_export_rows(serializer, header)
+        filename = f'{self.basename}.{export_format}'
+
+        if export_format == 'csv':
+            response = StreamingHttpResponse(iter_csv(header, rows), content_type=CSVRenderer.media_type)
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+
+        # Spreadsheet numbers instead of the API's decimal strings
+        decimal_columns = [isinstance(field, serializers.DecimalField) for field in fields]
+        rows = (
+            [Decimal(value) if is_decimal and value is not None else value
+             for value, is_decimal in zip(row, decimal_columns)]
+            for row in rows
+        )
+        return FileResponse(
+            write_xlsx(header, rows), as_attachment=True, filename=filename,
+            content_type=XLSXRenderer.media_type,
+        )
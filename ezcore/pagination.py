@@ -0,0 +1,149 @@
+from base64 import b64decode, b64encode
+from datetime import date
+from urllib import parse
+
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate time series on (date field, id) by filtering past the last key
+    of the previous page instead of using an OFFSET, so every page takes the
+    same time however deep it is.
+
+    Pages are linked with an opaque ?cursor=. ?page_size= is capped by
+    max_page_size and ?count=false skips the COUNT query. Requests ordered
+    by anything other than the date field fall back to page numbers.
+    """
+    date_field = 'date'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering_query_param = api_settings.ORDERING_PARAM
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fallback = None
+        descending = self.get_direction(request)
+        if descending is None:
+            self.fallback = PageNumberPagination()
+            self.fallback.page_size = self.get_page_size(request)
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.count = queryset.count() if self.include_count(request) else None
+        key, reverse = self.decode_cursor(request)
+
+        # Walking back to the previous page reads the keys in the other direction
+        fetch_descending = descending != reverse
+        ordering = [
+            f"{'-' if fetch_descending else ''}{self.date_field}",
+            f"{'-' if fetch_descending else ''}id",
+        ]
+        queryset = queryset.order_by(*ordering)
+        if key is not None:
+            queryset = queryset.filter(self.past_key(key, fetch_descending))
+        results = list(queryset[:self.page_size + 1])
+
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, key is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        response = {}
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_direction(self, request):
+        """Return whether the keys run newest first, or None for another ordering."""
+        ordering = request.query_params.get(self.ordering_query_param)
+        if not ordering or ordering == f'-{self.date_field}':
+            return True
+        if ordering == self.date_field:
+            return False
+        return None
+
+    def include_count(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() not in ('false', '0')
+
+    def past_key(self, key, descending):
+        """Return the filter for rows after key in the given direction."""
+        key_date, key_id = key
+        lookup = 'lt' if descending else 'gt'
+        return Q(**{f'{self.date_field}__{lookup}': key_date}) | Q(
+            **{self.date_field: key_date, f'id__{lookup}': key_id}
+        )
+
+    def decode_cursor(self, request):
+        """Return the (date, id) key and direction flag carried by the cursor."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            tokens = parse.parse_qs(b64decode(encoded.encode('ascii')).decode('ascii'), strict_parsing=True)
+            key = (date.fromisoformat(tokens['d'][0]), int(tokens['i'][0]))
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return key, reverse
+
+    def encode_cursor(self, instance, reverse):
+        tokens = {'d': getattr(instance, self.date_field).isoformat(), 'i': instance.pk}
+        if reverse:
+            tokens['r'] = '1'
+        encoded = b64encode(parse.urlencode(tokens).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
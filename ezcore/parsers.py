@@ -0,0 +1,42 @@
+import csv
+from io import StringIO
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+def iter_csv_rows(lines):
+    """
+    Yield the rows of CSV text lines as dicts. Headers are lower-cased with
+    spaces turned into underscores, blank cells are left out of their row
+    and blank lines are skipped.
+    """
+    reader = csv.reader(lines)
+    header = [column.strip().lower().replace(' ', '_') for column in next(reader, [])]
+    for row in reader:
+        cells = {column: value.strip() for column, value in zip(header, row) if value.strip()}
+        if cells:
+            yield cells
+
+
+def read_csv_rows(content):
+    """Return the rows of a whole CSV document, given as text or UTF-8 bytes, as dicts."""
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError as exc:
+            raise ParseError(f'CSV parse error - {exc}')
+    return list(iter_csv_rows(StringIO(content)))
+
+
+class CSVParser(BaseParser):
+    """Parse a text/csv request body into a list of rows keyed by the header."""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        content = stream.read()
+        if encoding.lower().replace('-', '') != 'utf8':
+            content = content.decode(encoding)
+        return read_csv_rows(content)
@@ -1,4 +1,60 @@
 from rest_framework import permissions
+from rest_framework_simplejwt.tokens import Token
+
+from user.roles import ALL_CAPABILITIES, CAPABILITIES
+
+
+def get_token_claim(request, claim):
+    """Return a claim of the request's JWT access token, or None without one."""
+    # What authentication found; reading .auth would authenticate a request
+    # given only a user again
+    token = getattr(request, '_auth', None)
+    return token.get(claim) if isinstance(token, Token) else None
+
+
+def get_capabilities(request):
+    """
+    Return the capability bits of the request's user, from the access
+    token when it carries them, else from the user. The result is cached
+    on the request. Farm owners have them all.
+    """
+    if not hasattr(request, '_capabilities'):
+        capabilities = get_token_claim(request, 'capabilities')
+        if capabilities is None:
+            user = request.user
+            capabilities = ALL_CAPABILITIES if getattr(user, 'is_farm_owner', False) else getattr(user, 'capabilities', 0)
+        request._capabilities = capabilities
+    return request._capabilities
+
+
+def has_capability(request, capability):
+    """Return whether the request's user has a capability; None needs none."""
+    bit = CAPABILITIES[capability] if capability else 0
+    return get_capabilities(request) & bit == bit
+
+
+def get_farm_owner_id(request):
+    """
+    Return the id of the farm owner whose data the request's user works on.
+    Farm owners get their own id, employees their employer's id and anyone
+    else None. The result is cached on the request.
+    """
+    if not hasattr(request, '_farm_owner_id'):
+        farm_owner_id = get_token_claim(request, 'farm_owner_id')
+        if farm_owner_id is None:
+            user = request.user
+            # employer_id avoids loading the employer row
+            farm_owner_id = user.pk if getattr(user, 'is_farm_owner', False) else getattr(user, 'employer_id', None)
+        request._farm_owner_id = farm_owner_id
+    return request._farm_owner_id
+
+
+def employee_may(request, view):
+    """
+    Return whether an employee may make a request to a view: employees may
+    only read, and only in the area of the farm their role covers.
+    """
+    return request.method in permissions.SAFE_METHODS and has_capability(request, getattr(view, 'capability', None))
 
 
 class IsOwnerOrEmployee(permissions.BasePermission):
@@ -9,71 +65,22 @@ class IsOwnerOrEmployee(permissions.BasePermission):
         # Check if user is authenticated
         if not request.user.is_authenticated:
             return False
-        
+
         # Admin can do anything
         if request.user.is_staff:
             return True
-        
-        # Check if object has an owner field
-        if hasattr(obj, 'owner'):
-            # Owner can do anything with their objects
-            if obj.owner == request.user:
-                return True
-            
-            # Employee can access if they work for the owner and have appropriate permissions
-            if hasattr(request.user, 'employer') and request.user.employer == obj.owner:
-                # For read operations, check specific permissions based on object type
-                if request.method in permissions.SAFE_METHODS:
-                    # Animal-related permissions
-                    if hasattr(obj, 'animal_type') and not request.user.can_manage_animals:
-                        return False
-                    
-                    # Health-related permissions
-                    if view.__class__.__name__ in ['AnimalHealthViewSet', 'VaccinationViewSet'] and not request.user.can_manage_health:
-                        return False
-                    
-                    # Feeding-related permissions
-                    if view.__class__.__name__ in ['FeedingScheduleViewSet', 'FeedingRecordViewSet'] and not request.user.can_manage_feeding:
-                        return False
-                    
-                    # Inventory-related permissions
-                    if view.__class__.__name__ in ['InventoryItemViewSet', 'InventoryTransactionViewSet'] and not request.user.can_manage_inventory:
-                        return False
-                    
-                    # Sales-related permissions
-                    if view.__class__.__name__ in ['SaleViewSet', 'ExpenseViewSet'] and not request.user.can_manage_sales:
-                        return False
-                    
-                    # Default to allow if no specific check failed
-                    return True
-                
-                # For write operations, check specific permissions based on object type
-                else:
-                    # Animal-related permissions
-                    if hasattr(obj, 'animal_type') and not request.user.can_manage_animals:
-                        return False
-                    
-                    # Health-related permissions
-                    if view.__class__.__name__ in ['AnimalHealthViewSet', 'VaccinationViewSet'] and not request.user.can_manage_health:
-                        return False
-                    
-                    # Feeding-related permissions
-                    if view.__class__.__name__ in ['FeedingScheduleViewSet', 'FeedingRecordViewSet'] and not request.user.can_manage_feeding:
-                        return False
-                    
-                    # Inventory-related permissions
-                    if view.__class__.__name__ in ['InventoryItemViewSet', 'InventoryTransactionViewSet'] and not request.user.can_manage_inventory:
-                        return False
-                    
-                    # Sales-related permissions
-                    if view.__class__.__name__ in ['SaleViewSet', 'ExpenseViewSet'] and not request.user.can_manage_sales:
-                        return False
-                    
-                    # Default to deny for write operations if no specific check passed
-                    return False
-        
-        # If we get here, deny access
-        return False
+
+        # owner_id avoids loading the owner row
+        owner_id = getattr(obj, 'owner_id', None)
+        if owner_id is None:
+            return False
+
+        # Owner can do anything with their objects
+        if owner_id == request.user.pk:
+            return True
+
+        # Employees of the owner are limited by their capabilities
+        return owner_id == getattr(request.user, 'employer_id', None) and employee_may(request, view)
 
 
 class HasFarmAccess(permissions.BasePermission):
@@ -84,66 +91,10 @@ class HasFarmAccess(permissions.BasePermission):
         # Check if user is authenticated
         if not request.user.is_authenticated:
             return False
-        
-        # Admin can do anything
-        if request.user.is_staff:
-            return True
-        
-        # Farm owners can do anything with their farm
-        if request.user.is_farm_owner:
+
+        # Admin can do anything, and farm owners can do anything with their farm
+        if request.user.is_staff or request.user.is_farm_owner:
             return True
-        
-        # Employees need to check specific permissions based on view type
-        if hasattr(request.user, 'employer') and request.user.employer is not None:
-            # For read operations, check specific permissions based on view type
-            if request.method in permissions.SAFE_METHODS:
-                # Animal-related permissions
-                if view.__class__.__name__ in ['AnimalTypeViewSet', 'BreedViewSet', 'DairyAnimalViewSet', 'MeatAnimalViewSet'] and not request.user.can_manage_animals:
-                    return False
-                
-                # Health-related permissions
-                if view.__class__.__name__ in ['AnimalHealthViewSet', 'VaccinationViewSet'] and not request.user.can_manage_health:
-                    return False
-                
-                # Feeding-related permissions
-                if view.__class__.__name__ in ['FeedTypeViewSet', 'FeedingScheduleViewSet', 'FeedingRecordViewSet'] and not request.user.can_manage_feeding:
-                    return False
-                
-                # Inventory-related permissions
-                if view.__class__.__name__ in ['InventoryItemViewSet', 'InventoryTransactionViewSet'] and not request.user.can_manage_inventory:
-                    return False
-                
-                # Sales-related permissions
-                if view.__class__.__name__ in ['SaleViewSet', 'ExpenseViewSet'] and not request.user.can_manage_sales:
-                    return False
-                
-                # Default to allow if no specific check failed
-                return True
-            
-            # For write operations, check specific permissions based on view type
-            else:
-                # Animal-related permissions
-                if view.__class__.__name__ in ['AnimalTypeViewSet', 'BreedViewSet', 'DairyAnimalViewSet', 'MeatAnimalViewSet'] and not request.user.can_manage_animals:
-                    return False
-                
-                # Health-related permissions
-                if view.__class__.__name__ in ['AnimalHealthViewSet', 'VaccinationViewSet'] and not request.user.can_manage_health:
-                    return False
-                
-                # Feeding-related permissions
-                if view.__class__.__name__ in ['FeedTypeViewSet', 'FeedingScheduleViewSet', 'FeedingRecordViewSet'] and not request.user.can_manage_feeding:
-                    return False
-                
-                # Inventory-related permissions
-                if view.__class__.__name__ in ['InventoryItemViewSet', 'InventoryTransactionViewSet'] and not request.user.can_manage_inventory:
-                    return False
-                
-                # Sales-related permissions
-                if view.__class__.__name__ in ['SaleViewSet', 'ExpenseViewSet'] and not request.user.can_manage_sales:
-                    return False
-                
-                # Default to deny for write operations if no specific check passed
-                return False
-        
-        # If we get here, deny access
-        return False
+
+        # Employees are limited by their capabilities
+        return get_farm_owner_id(request) is not None and employee_may(request, view)
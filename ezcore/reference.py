@@ -0,0 +1,51 @@
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from ezanimal.models import Breed
+
+# Animal types, breeds and feed types share one version: the time of the
+# last write to any of them, in microseconds. Unlike a counter it does not
+# start over when the cache is flushed, so an old ETag never matches again.
+# The version lives in the default cache, so the worker processes only see
+# each other's writes when that cache is shared (see CACHES in settings).
+REFERENCE_VERSION_KEY = 'ezcore:reference:version'
+REFERENCE_CACHE_TIMEOUT = 60 * 60 * 24
+
+BREED_AVERAGE_FIELDS = (
+    'average_weight', 'average_milk_production', 'lactation_period',
+    'average_meat_yield', 'growth_rate', 'gestation_period', 'maturity_age',
+)
+BreedAverages = namedtuple('BreedAverages', BREED_AVERAGE_FIELDS)
+
+# {breed_id: BreedAverages} of every breed, and the version it was loaded at
+_breed_averages = {}
+_breed_averages_version = None
+
+
+def forget_reference_data():
+    """Invalidate the cached reference tables of every process sharing the cache, e.g. after a breed is changed."""
+    cache.set(REFERENCE_VERSION_KEY, time.time_ns() // 1000, None)
+
+
+def get_reference_version():
+    """Return the current version of the reference tables."""
+    return cache.get_or_set(REFERENCE_VERSION_KEY, lambda: time.time_ns() // 1000, None)
+
+
+def get_breed_averages(breed_ids=()):
+    """
+    Return {breed_id: BreedAverages} of every breed. The breeds are loaded
+    into the process on first use and again only after the shared version
+    moves, or when one of breed_ids is missing.
+    """
+    global _breed_averages, _breed_averages_version
+    version = get_reference_version()
+    if version != _breed_averages_version or not _breed_averages.keys() >= set(breed_ids):
+        _breed_averages = {
+            row[0]: BreedAverages(*row[1:])
+            for row in Breed.objects.order_by().values_list('pk', *BREED_AVERAGE_FIELDS)
+        }
+        _breed_averages_version = version
+    return _breed_averages
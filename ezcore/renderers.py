@@ -0,0 +1,85 @@
+import csv
+import json
+from tempfile import TemporaryFile
+
+from openpyxl import Workbook
+from rest_framework.renderers import BaseRenderer
+
+
+class Echo:
+    """File-like object that hands back whatever is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def cell_value(value):
+    """Flatten a serialized value into something a spreadsheet cell can hold."""
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def iter_csv(header, rows):
+    """Yield a CSV document line by line."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([cell_value(value) for value in row])
+
+
+def write_xlsx(header, rows):
+    """
+    Write rows to a temporary XLSX file and return it rewound. The workbook
+    is write-only, so rows are flushed to disk instead of kept in memory.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    for row in rows:
+        sheet.append([cell_value(value) for value in row])
+    output = TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def error_rows(data):
+    """Turn an error response body into (field, error) rows."""
+    if isinstance(data, dict):
+        return [[key, value] for key, value in data.items()]
+    return [['detail', data]]
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Renderer that makes ?format=csv available. List exports are streamed by
+    ExportMixin; this only renders other responses such as errors.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return ''.join(iter_csv(['field', 'error'], error_rows(data))).encode(self.charset)
+
+
+class XLSXRenderer(BaseRenderer):
+    """
+    Renderer that makes ?format=xlsx available. List exports are written by
+    ExportMixin; this only renders other responses such as errors.
+    """
+    media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    format = 'xlsx'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with write_xlsx(['field', 'error'], error_rows(data)) as output:
+            return output.read()
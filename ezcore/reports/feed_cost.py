@@ -0,0 +1,98 @@
+from decimal import Decimal
+
+import pandas as pd
+from django.db.models import Sum
+
+from ezcore.db import month_of
+from ezcore.health_and_feed.costing import value_feeding
+from ezcore.health_and_feed.models import FeedingRecord
+from ezcore.reports.pnl import to_money
+from ezdairy.models import DairyAnimal, MilkProduction
+from ezmeat.models import MeatAnimal, WeightRecord
+
+# What a kind of animal produces from its feed, and the unit costs are given per
+OUTPUTS = {'dairy': ('milk', 'cost_per_litre'), 'meat': ('weight_gain', 'cost_per_kg_gain')}
+GROUPS = {'animal': 'tag_number', 'breed': 'breed__name'}
+ANIMAL_MODELS = {'dairy': DairyAnimal, 'meat': MeatAnimal}
+
+
+def to_unit_cost(cost, output):
+    return Decimal(f'{cost / output:.4f}') if output > 0 else None
+
+
+def feeding_costs(owner_id, kind, start, end):
+    """
+    Return a data frame of the feed amount and cost of each animal of a
+    kind per month. Feeding records are summed per animal, feed type and
+    month in the database, so pandas prices one row per combination
+    rather than one per record.
+    """
+    animal_field = f'{kind}_animal'
+    rows = FeedingRecord.objects.filter(
+        owner_id=owner_id, date__range=(start, end), **{f'{animal_field}__isnull': False}
+    ).values_list(animal_field, 'feed_type', month_of('date')).order_by().annotate(amount=Sum('amount'))
+    feeding = pd.DataFrame.from_records(list(rows), columns=['animal_id', 'feed_type_id', 'month', 'amount'])
+    feeding['owner_id'] = owner_id
+    return value_feeding(feeding).groupby(['animal_id', 'month'])[['amount', 'cost']].sum()
+
+
+def milk_output(owner_id, start, end):
+    """Return a series of the litres each dairy animal gave per month."""
+    rows = MilkProduction.objects.filter(animal__owner_id=owner_id, date__range=(start, end)).values_list(
+        'animal', month_of('date')
+    ).order_by().annotate(output=Sum('total_amount'))
+    frame = pd.DataFrame.from_records(list(rows), columns=['animal_id', 'month', 'output'])
+    return frame.astype({'output': float}).set_index(['animal_id', 'month'])['output']
+
+
+def gain_output(owner_id, start, end):
+    """
+    Return a series of the kilograms each meat animal gained per month,
+    counting the gain between two weigh-ins in the month of the later one.
+    """
+    rows = WeightRecord.objects.filter(animal__owner_id=owner_id, date__lte=end).values_list('animal', 'date', 'weight')
+    frame = pd.DataFrame.from_records(list(rows), columns=['animal_id', 'date', 'weight'])
+    frame = frame.astype({'weight': float}).sort_values(['animal_id', 'date'])
+    frame['output'] = frame.groupby('animal_id')['weight'].diff()
+    frame = frame[frame['output'].notna() & (frame['date'] >= start)]
+    frame['month'] = pd.to_datetime(frame['date']).dt.strftime('%Y-%m')
+    return frame.groupby(['animal_id', 'month'])['output'].sum()
+
+
+def format_row(values, output_field, unit_cost_field):
+    return {
+        'feed_amount': to_money(values['amount']),
+        'feed_cost': to_money(values['cost']),
+        output_field: to_money(values['output']),
+        unit_cost_field: to_unit_cost(values['cost'], values['output']),
+    }
+
+
+def feed_cost_report(owner_id, kind, start, end, by='animal'):
+    """
+    Return the feed cost per litre of milk or kilogram of gain of a farm's
+    dairy or meat animals between start and end, per month and per animal
+    or breed, with feeding valued by ezcore.health_and_feed.costing.
+    """
+    output_field, unit_cost_field = OUTPUTS[kind]
+    output = milk_output(owner_id, start, end) if kind == 'dairy' else gain_output(owner_id, start, end)
+    table = feeding_costs(owner_id, kind, start, end).join(output, how='outer').fillna(0.0)
+
+    animals = pd.DataFrame.from_records(
+        list(ANIMAL_MODELS[kind].objects.filter(owner_id=owner_id).values_list('pk', GROUPS[by])),
+        columns=['animal_id', by],
+    ).set_index('animal_id')
+    table = table.reset_index().join(animals, on='animal_id')
+    table = table.groupby([by, 'month'])[['amount', 'cost', 'output']].sum()
+    totals = table.sum() if not table.empty else pd.Series({'amount': 0.0, 'cost': 0.0, 'output': 0.0})
+    return {
+        'kind': kind,
+        'by': by,
+        'from': start,
+        'to': end,
+        'rows': [
+            {by: key, 'month': month, **format_row(values, output_field, unit_cost_field)}
+            for (key, month), values in table.iterrows()
+        ],
+        'totals': format_row(totals, output_field, unit_cost_field),
+    }
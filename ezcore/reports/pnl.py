@@ -0,0 +1,134 @@
+from decimal import Decimal
+
+import pandas as pd
+from django.core.cache import cache
+from django.db.models import Count, Sum
+
+from ezcore.inventory_and_sales.models import Expense, Sale
+
+PERIODS = {'month': 'M', 'quarter': 'Q'}
+BREAKDOWNS = {'sale_type': 'revenue', 'expense_type': 'expenses'}
+CACHE_TIMEOUT = 3600
+
+
+def pnl_cache_key(owner_id, *params):
+    """Return the cache key of a report, versioned so any sale or expense write retires it."""
+    version = cache.get_or_set(f'reports:pnl:version:{owner_id}', 1, None)
+    return ':'.join(['reports:pnl', str(owner_id), str(version), *map(str, params)])
+
+
+def forget_pnl_reports(owner_id):
+    """Invalidate every cached profit and loss report of an owner."""
+    try:
+        cache.incr(f'reports:pnl:version:{owner_id}')
+    except ValueError:
+        cache.set(f'reports:pnl:version:{owner_id}', 1, None)
+
+
+def to_money(value):
+    return Decimal(f'{value:.2f}')
+
+
+def query_totals(owner_id, start, end, by):
+    """
+    Aggregate revenue, payments and expenses per day in the database.
+    Return (sales, expenses) data frames with one row per day, and per sale
+    or expense type when that is the breakdown.
+
+    Days rather than TruncMonth/TruncQuarter are grouped on, as SQLite
+    truncates dates with a Python function called for every row; a year
+    is still at most a few hundred rows for pandas to roll up.
+    """
+    sale_keys = ['sale_date'] + (['sale_type'] if by == 'sale_type' else [])
+    expense_keys = ['expense_date'] + (['expense_type'] if by == 'expense_type' else [])
+    # Cancelled sales earn nothing, as on the dashboard
+    sales = Sale.objects.filter(owner_id=owner_id, sale_date__range=(start, end)).exclude(
+        payment_status='cancelled'
+    ).values(*sale_keys).order_by().annotate(
+        revenue=Sum('total_amount'), amount_paid=Sum('amount_paid'), sales=Count('pk')
+    )
+    expenses = Expense.objects.filter(owner_id=owner_id, expense_date__range=(start, end)).values(
+        *expense_keys
+    ).order_by().annotate(expenses=Sum('amount'))
+    return (
+        pd.DataFrame.from_records(list(sales), columns=sale_keys + ['revenue', 'amount_paid', 'sales']),
+        pd.DataFrame.from_records(list(expenses), columns=expense_keys + ['expenses']),
+    )
+
+
+def build_pnl(sales, expenses, start, end, group, by):
+    """
+    Roll the daily totals up into one row per period between start and
+    end, empty periods included, with a column per type when broken down.
+    """
+    freq = PERIODS[group]
+    periods = pd.period_range(start, end, freq=freq)
+    for frame, date_field in ((sales, 'sale_date'), (expenses, 'expense_date')):
+        frame['period'] = pd.PeriodIndex(pd.to_datetime(frame.pop(date_field)), freq=freq)
+        for column in frame.columns.difference(['period', 'sale_type', 'expense_type']):
+            frame[column] = frame[column].astype(float)
+
+    table = pd.DataFrame(index=periods)
+    table[['revenue', 'amount_paid', 'sales']] = sales.groupby('period')[['revenue', 'amount_paid', 'sales']].sum()
+    table['expenses'] = expenses.groupby('period')['expenses'].sum()
+    table = table.fillna(0)
+    table['outstanding'] = table['revenue'] - table['amount_paid']
+    table['profit'] = table['revenue'] - table['expenses']
+
+    breakdown = None
+    if by is not None:
+        frame = sales if by == 'sale_type' else expenses
+        if frame.empty:
+            breakdown = pd.DataFrame(index=periods)
+        else:
+            breakdown = frame.pivot_table(
+                index='period', columns=by, values=BREAKDOWNS[by], aggfunc='sum', fill_value=0
+            ).reindex(periods, fill_value=0)
+    return table, breakdown
+
+
+def format_row(values, breakdown_values, by):
+    row = {
+        'revenue': to_money(values['revenue']),
+        'amount_paid': to_money(values['amount_paid']),
+        'outstanding': to_money(values['outstanding']),
+        'expenses': to_money(values['expenses']),
+        'profit': to_money(values['profit']),
+        'margin_percent': round(values['profit'] / values['revenue'] * 100, 1) if values['revenue'] else None,
+        'sales': int(values['sales']),
+    }
+    if by is not None:
+        row[by] = {column: to_money(value) for column, value in breakdown_values.items()}
+    return row
+
+
+def pnl_report(owner_id, start, end, group='month', by=None):
+    """
+    Return the profit and loss of a farm between start and end, per month
+    or quarter and optionally broken down by sale or expense type. Reports
+    are cached per owner and parameters until a sale or expense changes.
+    """
+    key = pnl_cache_key(owner_id, start, end, group, by)
+    report = cache.get(key)
+    if report is not None:
+        return report
+
+    table, breakdown = build_pnl(*query_totals(owner_id, start, end, by), start, end, group, by)
+    empty = pd.Series(dtype=float)
+    report = {
+        'from': start,
+        'to': end,
+        'group': group,
+        'by': by,
+        'periods': [
+            {
+                'period': str(period),
+                'start': period.start_time.date(),
+                **format_row(values, breakdown.loc[period] if breakdown is not None else empty, by),
+            }
+            for period, values in table.iterrows()
+        ],
+        'totals': format_row(table.sum(), breakdown.sum() if breakdown is not None else empty, by),
+    }
+    cache.set(key, report, CACHE_TIMEOUT)
+    return report
@@ -0,0 +1,84 @@
+from datetime import date
+
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import permissions, serializers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ezcore.mixins import get_farm_owner_id
+from ezcore.permissions import HasFarmAccess
+from ezcore.reports.feed_cost import GROUPS, OUTPUTS, feed_cost_report
+from ezcore.reports.pnl import BREAKDOWNS, PERIODS, pnl_report
+
+
+class ReportPeriodSerializer(serializers.Serializer):
+    """The from and to query parameters of a report."""
+
+    def get_fields(self):
+        # 'from' is a keyword, so it cannot be declared on the class
+        fields = super().get_fields()
+        fields['from'] = serializers.DateField(required=False, source='start')
+        fields['to'] = serializers.DateField(required=False, source='end')
+        return fields
+
+    def validate(self, data):
+        """Default to the twelve months up to today."""
+        data.setdefault('end', timezone.localdate())
+        if 'start' not in data:
+            month = data['end'].year * 12 + data['end'].month - 12
+            data['start'] = date(month // 12, month % 12 + 1, 1)
+        if data['start'] > data['end']:
+            raise serializers.ValidationError({'from': [_("The start date must not be after the end date.")]})
+        if (data['end'] - data['start']).days > 366 * 10:
+            raise serializers.ValidationError({'from': [_("Reports cover at most ten years.")]})
+        return data
+
+
+class PnLReportParamsSerializer(ReportPeriodSerializer):
+    """Query parameters of the profit and loss report."""
+    group = serializers.ChoiceField(choices=list(PERIODS), default='month')
+    by = serializers.ChoiceField(choices=list(BREAKDOWNS), required=False)
+
+
+class FeedCostReportParamsSerializer(ReportPeriodSerializer):
+    """Query parameters of the feed cost report."""
+    kind = serializers.ChoiceField(choices=list(OUTPUTS), default='dairy')
+    by = serializers.ChoiceField(choices=list(GROUPS), default='animal')
+
+
+class PnLReportView(APIView):
+    """
+    Profit and loss of the current user's farm per month or quarter, from
+    sales and expenses aggregated in the database and pivoted with pandas.
+    Optionally broken down by sale_type or expense_type.
+    """
+    permission_classes = [permissions.IsAuthenticated, HasFarmAccess]
+    capability = 'reports'
+
+    def get(self, request):
+        params = PnLReportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        return Response(pnl_report(
+            get_farm_owner_id(request), data['start'], data['end'], data['group'], data.get('by')
+        ))
+
+
+class FeedCostReportView(APIView):
+    """
+    Feed cost per litre of milk (kind=dairy) or per kilogram of weight gain
+    (kind=meat) of the current user's farm, per month and per animal or
+    breed. Feeding is valued at the weighted average purchase price of the
+    inventory items linked to each feed type.
+    """
+    permission_classes = [permissions.IsAuthenticated, HasFarmAccess]
+    capability = 'reports'
+
+    def get(self, request):
+        params = FeedCostReportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        return Response(feed_cost_report(
+            get_farm_owner_id(request), data['kind'], data['start'], data['end'], data['by']
+        ))
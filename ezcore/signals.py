@@ -0,0 +1,331 @@
+from threading import local
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from ezanimal.models import AnimalType, Breed
+from ezcore.analytics.models import AnimalProfitability
+from ezcore.dashboard.models import FarmDailySummary, SUMMARY_SOURCES
+from ezcore.health_and_feed.models import AnimalHealth, Vaccination, FeedingRecord, FeedType
+from ezcore.inventory_and_sales.models import Expense, InventoryItem, InventoryTransaction, Sale, SaleItem
+from ezcore.reference import forget_reference_data
+from ezcore.reports.pnl import forget_pnl_reports
+from ezdairy.forecasting import FORECAST_FIELDS, forecast_milk
+from ezdairy.models import DairyAnimal, Lactation, MilkProduction
+from ezdairy.recording import forget_dairy_tags
+from ezmeat.growth import FORECAST_FIELDS as GROWTH_FORECAST_FIELDS, forecast_growth
+from ezmeat.models import MeatAnimal, WeightRecord
+
+# MeatAnimal fields the growth forecast depends on
+GROWTH_INPUTS = {
+    'breed', 'target_weight', 'breed_avg_daily_gain', 'breed_avg_finishing_weight', 'breed_avg_days_to_finish'
+}
+
+# The dairy and meat animal fields of the records animal profitability is built from
+LEDGER_SOURCES = {
+    FeedingRecord: ('dairy_animal_id', 'meat_animal_id'),
+    AnimalHealth: ('dairy_animal_id', 'meat_animal_id'),
+    Vaccination: ('dairy_animal_id', 'meat_animal_id'),
+    SaleItem: ('dairy_animal_id', 'meat_animal_id'),
+    MilkProduction: ('animal_id', None),
+}
+
+# {refit function name: (animal ids, since)} of the forecasts to refit when
+# the current transaction commits, per thread as each has its own connection
+_pending_refits = local()
+
+
+def refit_on_commit(refit, animal_id, since=None):
+    """
+    Refit an animal's forecasts with refit(animal_ids, since=since) once
+    the current transaction commits, or at once outside of one. Records
+    saved in one transaction share a single refit from the earliest since;
+    a since of None refits every record of the animals.
+    """
+    animal_ids, earliest = getattr(_pending_refits, refit.__name__, (set(), since))
+    animal_ids.add(animal_id)
+    earliest = None if since is None or earliest is None else min(earliest, since)
+    setattr(_pending_refits, refit.__name__, (animal_ids, earliest))
+    # Each record registers the refit, as a rolled back savepoint drops its
+    # callbacks; the first to run takes the pending animals of all of them
+    transaction.on_commit(lambda: flush_refit(refit))
+
+
+def flush_refit(refit):
+    """Run a refit queued by refit_on_commit(), unless it already ran."""
+    animal_ids, since = _pending_refits.__dict__.pop(refit.__name__, (None, None))
+    if not animal_ids:
+        return
+    if since is None:
+        refit(animal_ids)
+    else:
+        refit(animal_ids, since=since)
+
+
+@receiver(post_save, sender=DairyAnimal)
+@receiver(post_save, sender=MeatAnimal)
+def sync_record_owner(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the owner copied onto health, vaccination and feeding records in sync."""
+    if created or (update_fields is not None and 'owner' not in update_fields):
+        return
+    animal_field = 'dairy_animal' if sender is DairyAnimal else 'meat_animal'
+    for model in (AnimalHealth, Vaccination, FeedingRecord):
+        model.objects.filter(**{animal_field: instance}).exclude(
+            owner_id=instance.owner_id
+        ).update(owner_id=instance.owner_id)
+
+
+@receiver(post_save, sender=DairyAnimal)
+@receiver(post_delete, sender=DairyAnimal)
+def forget_dairy_tag_map(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached parlour tag maps when a dairy animal's tag or owner may have changed."""
+    if update_fields is not None and not {'tag_number', 'owner'} & set(update_fields):
+        return
+    forget_dairy_tags()
+
+
+@receiver(post_save, sender=AnimalType)
+@receiver(post_delete, sender=AnimalType)
+@receiver(post_save, sender=Breed)
+@receiver(post_delete, sender=Breed)
+@receiver(post_save, sender=FeedType)
+@receiver(post_delete, sender=FeedType)
+def forget_reference_tables(sender, instance, **kwargs):
+    """Drop the cached animal types, breeds and feed types when one of them changes."""
+    forget_reference_data()
+    # Another process may cache the old rows again before this commits
+    transaction.on_commit(forget_reference_data)
+
+
+@receiver(post_save, sender=MilkProduction)
+@receiver(post_delete, sender=MilkProduction)
+def refresh_milk_forecast(sender, instance, raw=False, **kwargs):
+    """Refit the lactation a milk record falls in, and any after it, on commit."""
+    if raw:
+        return
+    since = instance.date
+    # A record moved to another day may have left an earlier lactation
+    previous_key = getattr(instance, '_summary_key', None)
+    if previous_key:
+        since = min(since, previous_key[1])
+    refit_on_commit(forecast_milk, instance.animal_id, since)
+    # Outside a transaction the refit has run, so e.g. the API can return it
+    if 'created' in kwargs and not transaction.get_connection().in_atomic_block:
+        instance.refresh_from_db(fields=FORECAST_FIELDS)
+
+
+@receiver(pre_save, sender=MilkProduction)
+def remember_milk_amount(sender, instance, raw=False, **kwargs):
+    """Note the lactation day and amount an existing milk record counted before it changes."""
+    if raw or instance.pk is None:
+        return
+    instance._previous_milk = MilkProduction.objects.filter(pk=instance.pk).values_list(
+        'animal_id', 'date', 'total_amount'
+    ).first()
+
+
+@receiver(post_save, sender=MilkProduction)
+@receiver(post_delete, sender=MilkProduction)
+def update_lactation_rollup(sender, instance, raw=False, **kwargs):
+    """
+    Apply a milk record's change to the totals and peaks of the lactations
+    it falls in. New records are a single UPDATE; the peak is only
+    recomputed when the record holding it drops, moves or is deleted.
+    """
+    if raw:
+        return
+    lactations = Lactation.objects.filter(animal_id=instance.animal_id)
+    if 'created' not in kwargs:
+        lactations.add_milk(instance.date, -instance.total_amount)
+        lactations.covering(instance.date).filter(peak_date=instance.date).recompute_peaks()
+        return
+
+    previous = getattr(instance, '_previous_milk', None)
+    if previous is None:
+        lactations.add_milk(instance.date, instance.total_amount, instance.total_amount)
+        return
+    animal_id, day, amount = previous
+    if (animal_id, day) == (instance.animal_id, instance.date):
+        if amount != instance.total_amount:
+            lactations.add_milk(day, instance.total_amount - amount, instance.total_amount)
+            if instance.total_amount < amount:
+                lactations.covering(day).filter(peak_date=day).recompute_peaks()
+        return
+    previous_lactations = Lactation.objects.filter(animal_id=animal_id)
+    previous_lactations.add_milk(day, -amount)
+    previous_lactations.covering(day).filter(peak_date=day).recompute_peaks()
+    lactations.add_milk(instance.date, instance.total_amount, instance.total_amount)
+
+
+@receiver(post_save, sender=Lactation)
+def refresh_lactation_rollup(sender, instance, raw=False, **kwargs):
+    """Recompute a lactation's totals and peak when its window may have changed."""
+    if raw:
+        return
+    Lactation.objects.filter(pk=instance.pk).recompute()
+    instance.refresh_from_db(fields=Lactation.ROLLUP_FIELDS)
+
+
+@receiver(post_save, sender=Lactation)
+@receiver(post_delete, sender=Lactation)
+def refresh_lactation_forecast(sender, instance, raw=False, **kwargs):
+    """Refit an animal's milk forecasts when its lactation windows change."""
+    if raw:
+        return
+    forecast_milk([instance.animal_id])
+
+
+@receiver(post_save, sender=WeightRecord)
+@receiver(post_delete, sender=WeightRecord)
+def refresh_growth_forecast(sender, instance, raw=False, **kwargs):
+    """Refit an animal's growth on commit when one of its weigh-ins changes."""
+    if raw:
+        return
+    refit_on_commit(forecast_growth, instance.animal_id)
+    if 'created' in kwargs and not transaction.get_connection().in_atomic_block:
+        instance.refresh_from_db(fields=GROWTH_FORECAST_FIELDS)
+
+
+@receiver(post_save, sender=MeatAnimal)
+def refresh_ready_forecast(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Refit an animal's growth when its target or breed averages may have changed."""
+    if raw or (update_fields is not None and not GROWTH_INPUTS & set(update_fields)):
+        return
+    forecast_growth([instance.pk])
+    instance.refresh_from_db(fields=['expected_ready_date', *GROWTH_INPUTS - {'breed', 'target_weight'}])
+
+
+def remember_summary_key(sender, instance, raw=False, **kwargs):
+    """Note which dashboard day an existing record counted towards before it changes."""
+    if raw or instance.pk is None:
+        return
+    instance._summary_key = SUMMARY_SOURCES[sender].get_stored_key(instance.pk)
+
+
+def refresh_daily_summary(sender, instance, raw=False, **kwargs):
+    """Recompute the dashboard totals of the days a record counts towards."""
+    if raw:
+        return
+    source = SUMMARY_SOURCES[sender]
+    keys = source.get_affected_keys(source.get_key(instance))
+    previous_key = getattr(instance, '_summary_key', None)
+    if previous_key and previous_key not in keys:
+        keys += source.get_affected_keys(previous_key)
+    FarmDailySummary.objects.refresh(source, keys)
+
+
+@receiver(post_save, sender=Sale)
+@receiver(post_delete, sender=Sale)
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+def forget_owner_reports(sender, instance, raw=False, **kwargs):
+    """Retire the cached profit and loss reports of the farms a sale or expense counts towards."""
+    if raw:
+        return
+    forget_pnl_reports(instance.owner_id)
+    previous_key = getattr(instance, '_summary_key', None)
+    if previous_key and previous_key[0] != instance.owner_id:
+        forget_pnl_reports(previous_key[0])
+
+
+def remember_ledger_animals(sender, instance, raw=False, **kwargs):
+    """Note the animals an existing record counted against before it changes."""
+    if raw or instance.pk is None:
+        return
+    dairy_field, meat_field = LEDGER_SOURCES[sender]
+    stored = sender.objects.filter(pk=instance.pk).values(*filter(None, LEDGER_SOURCES[sender])).first()
+    if stored:
+        instance._ledger_animals = (stored[dairy_field], stored.get(meat_field))
+
+
+def mark_ledger_stale(sender, instance, raw=False, **kwargs):
+    """Flag the profitability of the animals a record counts against for recomputation."""
+    if raw:
+        return
+    dairy_field, meat_field = LEDGER_SOURCES[sender]
+    dairy_ids = [getattr(instance, dairy_field)]
+    meat_ids = [getattr(instance, meat_field)] if meat_field else []
+    previous = getattr(instance, '_ledger_animals', None)
+    if previous:
+        dairy_ids.append(previous[0])
+        meat_ids.append(previous[1])
+    AnimalProfitability.objects.mark_stale(dairy_ids, meat_ids)
+
+
+@receiver(post_save, sender=SaleItem)
+@receiver(post_delete, sender=SaleItem)
+def mark_milk_value_stale(sender, instance, raw=False, **kwargs):
+    """Milk sales set a farm's milk price, which values the milk of each of its dairy animals."""
+    if raw or instance.item_type != 'milk':
+        return
+    AnimalProfitability.objects.filter(
+        owner__in=Sale.objects.filter(pk=instance.sale_id).values('owner'), animal_kind='dairy', is_stale=False
+    ).update(is_stale=True)
+
+
+@receiver(post_save, sender=Sale)
+def mark_sale_ledger_stale(sender, instance, created, raw=False, **kwargs):
+    """Recount the animals and milk of a sale that may have been cancelled or moved to another farm."""
+    if raw or created:
+        return
+    items = list(instance.items.values_list('item_type', 'dairy_animal_id', 'meat_animal_id'))
+    AnimalProfitability.objects.mark_stale([item[1] for item in items], [item[2] for item in items])
+    if any(item[0] == 'milk' for item in items):
+        owner_ids = {instance.owner_id}
+        previous_key = getattr(instance, '_summary_key', None)
+        if previous_key:
+            owner_ids.add(previous_key[0])
+        AnimalProfitability.objects.filter(owner__in=owner_ids, animal_kind='dairy', is_stale=False).update(
+            is_stale=True
+        )
+
+
+@receiver(post_save, sender=DairyAnimal)
+@receiver(post_save, sender=MeatAnimal)
+def mark_animal_ledger_stale(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Recount an animal whose acquisition price or owner may have changed."""
+    if raw or created or (update_fields is not None and not {'acquisition_price', 'owner'} & set(update_fields)):
+        return
+    animal_field = 'dairy_animal' if sender is DairyAnimal else 'meat_animal'
+    AnimalProfitability.objects.filter(**{animal_field: instance}).update(is_stale=True)
+
+
+@receiver(post_save, sender=InventoryItem)
+def mark_feed_price_stale(sender, instance, raw=False, **kwargs):
+    """Recount the feed cost of a farm's animals when its feed stock may have been relinked or repriced."""
+    if raw or instance.item_type != 'feed':
+        return
+    AnimalProfitability.objects.mark_feed_stale(InventoryItem.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=InventoryTransaction)
+def restore_item_stock(sender, instance, origin=None, **kwargs):
+    """Take a deleted transaction's movement back out of its item's stock and later balances."""
+    # Deleting the item takes its transactions along with it
+    if isinstance(origin, InventoryItem):
+        return
+    InventoryTransaction.move_stock(instance.item_id, -instance.stock_change)
+    InventoryTransaction.objects.rebalance([instance.item_id], instance.transaction_date)
+
+
+@receiver(post_save, sender=InventoryTransaction)
+@receiver(post_delete, sender=InventoryTransaction)
+def mark_purchase_price_stale(sender, instance, raw=False, **kwargs):
+    """Feed is valued at the average price it was bought at, so a purchase reprices it."""
+    if raw or instance.transaction_type != 'purchase' or not instance.unit_price:
+        return
+    AnimalProfitability.objects.mark_feed_stale(
+        InventoryItem.objects.filter(pk=instance.item_id, feed_type__isnull=False)
+    )
+
+
+for ledger_model in LEDGER_SOURCES:
+    pre_save.connect(remember_ledger_animals, sender=ledger_model)
+    post_save.connect(mark_ledger_stale, sender=ledger_model)
+    post_delete.connect(mark_ledger_stale, sender=ledger_model)
+
+for summary_model in SUMMARY_SOURCES:
+    pre_save.connect(remember_summary_key, sender=summary_model)
+    post_save.connect(refresh_daily_summary, sender=summary_model)
+    post_delete.connect(refresh_daily_summary, sender=summary_model)
@@ -1,3 +1,910 @@
-from django.test import TestCase
+import asyncio
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from threading import Barrier, Thread
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from ezanimal.models import AnimalType, Breed
+from ezcore.analytics.models import AnimalProfitability
+from ezcore.checks import check_shared_cache
+from ezcore.dashboard.models import FarmDailySummary
+from ezcore.health_and_feed.models import AnimalHealth, FeedType, FeedingRecord, Vaccination
+from ezcore.ingest import ScaleIngestor, TagIndex, parse_reading
+from ezcore.inventory_and_sales.models import InventoryItem, InventorySnapshot, InventoryTransaction, Sale, SaleItem, Expense
+from ezcore.inventory_and_sales.views import ExpenseViewSet
+from ezcore.mixins import get_farm_owner_id
+from ezcore.permissions import (
+    ALL_CAPABILITIES, CAPABILITIES, HasFarmAccess, IsOwnerOrEmployee, get_capabilities, has_capability
+)
+from ezcore.reference import get_breed_averages
+from ezdairy.models import DairyAnimal, MilkProduction
+from ezdairy.views import DairyAnimalViewSet
+from ezmeat.models import MeatAnimal, WeightRecord
+from user.models import User
+
+
+class FarmScopedQuerySetMixinTests(TestCase):
+    """Tests for the farm scoping shared by the viewsets."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.other_owner = User.objects.create_user(email='other@example.com', password='pass', first_name='Other')
+        cls.worker = User.objects.create_user(
+            email='worker@example.com', password='pass', first_name='Worker', role='worker', employer=cls.owner
+        )
+        animal_type = AnimalType.objects.create(name='Cow', farming_type='dairy')
+        breed = Breed.objects.create(animal_type=animal_type, name='Holstein')
+        for tag_number, owner in [('D-1', cls.owner), ('D-2', cls.owner), ('X-1', cls.other_owner)]:
+            DairyAnimal.objects.create(tag_number=tag_number, animal_type=animal_type, breed=breed, owner=owner)
+        InventoryItem.objects.create(
+            name='Hay', item_type='feed', quantity=10, unit='kg', unit_price=5, owner=cls.owner
+        )
+
+    def test_farm_owner_id_is_resolved_without_queries_and_cached(self):
+        request = RequestFactory().get('/')
+        request.user = User.objects.get(pk=self.worker.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_farm_owner_id(request), self.owner.pk)
+        request.user = self.owner
+        self.assertEqual(get_farm_owner_id(request), self.owner.pk)
+        self.assertEqual(request._farm_owner_id, self.owner.pk)
+
+    def test_employee_sees_employer_records(self):
+        client = APIClient()
+        client.force_authenticate(self.worker)
+        response = client.get(reverse('dairy-animal-list'))
+        self.assertEqual(sorted(row['tag_number'] for row in response.data['results']), ['D-1', 'D-2'])
+
+    def test_other_farm_records_are_hidden(self):
+        client = APIClient()
+        client.force_authenticate(self.other_owner)
+        response = client.get(reverse('inventory-item-list'))
+        self.assertEqual(response.data['count'], 0)
+        client.force_authenticate(self.owner)
+        response = client.get(reverse('inventory-item-list'))
+        self.assertEqual(response.data['count'], 1)
+
+
+class FarmPermissionTests(TestCase):
+    """Tests for the capability checks of HasFarmAccess and IsOwnerOrEmployee."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.vet = User.objects.create_user(
+            email='vet@example.com', password='pass', first_name='Vet', role='veterinarian', employer=cls.owner
+        )
+        animal_type = AnimalType.objects.create(name='Cow', farming_type='dairy')
+        breed = Breed.objects.create(animal_type=animal_type, name='Holstein')
+        cls.cow = DairyAnimal.objects.create(tag_number='D-1', animal_type=animal_type, breed=breed, owner=cls.owner)
+
+    def make_request(self, user, method='get'):
+        request = Request(getattr(RequestFactory(), method)('/'))
+        request.user = User.objects.get(pk=user.pk)
+        return request
+
+    def test_capabilities_are_compiled_once_per_request(self):
+        request = self.make_request(self.vet)
+        self.assertEqual(get_capabilities(request), CAPABILITIES['animals'] | CAPABILITIES['health'])
+        self.assertEqual(get_capabilities(self.make_request(self.owner)), ALL_CAPABILITIES)
+        request.user.capabilities = 0
+        self.assertTrue(has_capability(request, 'health'))
+        self.assertFalse(has_capability(request, 'sales'))
+        self.assertTrue(has_capability(request, None))
+
+    def test_employees_read_their_areas_only(self):
+        permission = HasFarmAccess()
+        request = self.make_request(self.vet)
+        self.assertTrue(permission.has_permission(request, DairyAnimalViewSet()))
+        self.assertFalse(permission.has_permission(request, ExpenseViewSet()))
+        self.assertFalse(permission.has_permission(self.make_request(self.vet, 'post'), DairyAnimalViewSet()))
+        self.assertTrue(permission.has_permission(self.make_request(self.owner, 'post'), ExpenseViewSet()))
+
+    def test_object_owner_is_compared_without_queries(self):
+        permission = IsOwnerOrEmployee()
+        cow = DairyAnimal.objects.get(pk=self.cow.pk)
+        requests = [self.make_request(user, 'patch') for user in (self.owner, self.vet)]
+        with self.assertNumQueries(0):
+            self.assertTrue(permission.has_object_permission(requests[0], DairyAnimalViewSet(), cow))
+            self.assertFalse(permission.has_object_permission(requests[1], DairyAnimalViewSet(), cow))
+
+
+class LanguageTests(TestCase):
+    """Tests for the language resolution and the compiled translation catalogs."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        animal_type = AnimalType.objects.create(name='Cow', farming_type='dairy')
+        breed = Breed.objects.create(animal_type=animal_type, name='Holstein')
+        DairyAnimal.objects.create(tag_number='D-1', animal_type=animal_type, breed=breed, owner=cls.owner)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_urdu_and_english_variants(self):
+        response = self.client.get(reverse('dairy-animal-list'), HTTP_ACCEPT_LANGUAGE='ur')
+        self.assertEqual(response['Content-Language'], 'ur')
+        self.assertEqual(response.data['results'][0]['status_display'], 'فعال')
+        self.assertTrue({'Accept-Language', 'Cookie'} <= {value.strip() for value in response['Vary'].split(',')})
+        response = self.client.get(reverse('dairy-animal-list'), {'lang': 'en'}, HTTP_ACCEPT_LANGUAGE='ur')
+        self.assertEqual((response['Content-Language'], response.data['results'][0]['status_display']), ('en', 'Active'))
+        self.assertEqual(self.client.get(reverse('dairy-animal-list'), {'lang': 'fr'})['Content-Language'], 'en')
+
+    def test_catalog_matches_the_translation_tables(self):
+        with TemporaryDirectory() as locale_path, self.settings(LOCALE_PATHS=[locale_path]):
+            call_command('compile_translations', stdout=StringIO())
+            committed = Path(__file__).resolve().parent.parent / 'locale' / 'ur' / 'LC_MESSAGES' / 'django.mo'
+            self.assertEqual((Path(locale_path) / 'ur' / 'LC_MESSAGES' / 'django.mo').read_bytes(), committed.read_bytes())
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    """Tests for the deployment check on the cache the worker processes share."""
+
+    def test_local_cache_is_reported(self):
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['ezcore.W001'])
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379/1'}}
+        with self.settings(CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class ReferenceDataTests(TestCase):
+    """Tests for the cached animal types, breeds and feed types."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.animal_type = AnimalType.objects.create(name='Cow', farming_type='dairy')
+        cls.breed = Breed.objects.create(animal_type=cls.animal_type, name='Holstein', average_milk_production=Decimal('20'))
+        FeedType.objects.create(name='Hay', feed_category='forage')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_warm_list_reads_nothing_and_revalidates(self):
+        response = self.client.get(reverse('breed-list'))
+        self.assertEqual(response.data['results'][0]['animal_type_name'], 'Cow')
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            cached = self.client.get(reverse('breed-list'))
+            not_modified = self.client.get(reverse('breed-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((cached['ETag'], cached.json()), (etag, response.json()))
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], etag)
+
+    def test_write_changes_the_etag_and_the_data(self):
+        etag = self.client.get(reverse('animal-type-list'))['ETag']
+        self.animal_type.name = 'Cattle'
+        self.animal_type.save()
+        response = self.client.get(reverse('animal-type-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['results'][0]['name'], 'Cattle')
+        self.assertEqual(self.client.get(reverse('breed-list')).data['results'][0]['animal_type_name'], 'Cattle')
+
+    def test_languages_and_exports_are_kept_apart(self):
+        english = self.client.get(reverse('feed-type-list'), {'lang': 'en'})
+        urdu = self.client.get(reverse('feed-type-list'), {'lang': 'ur'})
+        self.assertNotEqual(english['ETag'], urdu['ETag'])
+        export = self.client.get(reverse('feed-type-list'), {'format': 'csv'})
+        self.assertEqual(export.status_code, 200)
+        self.assertNotIn('ETag', export)
+
+    def test_breed_averages_are_loaded_once_per_version(self):
+        get_breed_averages()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_breed_averages([self.breed.pk])[self.breed.pk].average_milk_production, Decimal('20'))
+        self.breed.average_milk_production = Decimal('25')
+        self.breed.save()
+        self.assertEqual(get_breed_averages()[self.breed.pk].average_milk_production, Decimal('25'))
+
+
+class RecordOwnerTests(TestCase):
+    """Tests for the owner copied onto health and feeding records."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.other_owner = User.objects.create_user(email='other@example.com', password='pass', first_name='Other')
+        animal_type = AnimalType.objects.create(name='Cow', farming_type='both')
+        breed = Breed.objects.create(animal_type=animal_type, name='Sahiwal')
+        cls.dairy_animal = DairyAnimal.objects.create(tag_number='D-1', animal_type=animal_type, breed=breed, owner=cls.owner)
+        cls.meat_animal = MeatAnimal.objects.create(
+            tag_number='M-1', animal_type=animal_type, breed=breed, gender='male', owner=cls.other_owner
+        )
+        cls.feed_type = FeedType.objects.create(name='Hay', feed_category='forage')
+
+    def test_owner_is_copied_from_either_animal(self):
+        health = AnimalHealth.objects.create(dairy_animal=self.dairy_animal, record_date=date(2025, 1, 1), record_type='illness')
+        feeding = FeedingRecord.objects.create(
+            meat_animal=self.meat_animal, date=date(2025, 1, 1), feed_type=self.feed_type, amount=2, time_of_day='morning'
+        )
+        self.assertEqual(health.owner_id, self.owner.pk)
+        self.assertEqual(feeding.owner_id, self.other_owner.pk)
+
+    def test_owner_follows_animal_transfer(self):
+        feeding = FeedingRecord.objects.create(
+            dairy_animal=self.dairy_animal, date=date(2025, 1, 1), feed_type=self.feed_type, amount=2, time_of_day='morning'
+        )
+        self.dairy_animal.owner = self.other_owner
+        self.dairy_animal.save()
+        feeding.refresh_from_db()
+        self.assertEqual(feeding.owner_id, self.other_owner.pk)
+
+    def test_feeding_records_are_scoped_by_owner_column(self):
+        FeedingRecord.objects.create(
+            dairy_animal=self.dairy_animal, date=date(2025, 1, 1), feed_type=self.feed_type, amount=2, time_of_day='morning'
+        )
+        FeedingRecord.objects.create(
+            meat_animal=self.meat_animal, date=date(2025, 1, 1), feed_type=self.feed_type, amount=2, time_of_day='morning'
+        )
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get(reverse('feeding-record-list'))
+        self.assertEqual([row['dairy_animal_tag'] for row in response.data['results']], ['D-1'])
+
+
+class ExplainHotQueriesTests(TestCase):
+    """Tests for the explain_hot_queries management command."""
+
+    def test_feeding_records_use_owner_date_index(self):
+        User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        out = StringIO()
+        call_command('explain_hot_queries', endpoint=['feeding-records'], stdout=out)
+        self.assertIn('/api/feeding-records/', out.getvalue())
+        if 'sqlite' in out.getvalue():
+            self.assertIn('ezcore_feeding_owner_date_idx', out.getvalue())
+
+
+class DashboardTests(TestCase):
+    """Tests for the dashboard and the daily summaries behind it."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.today = timezone.localdate()
+        animal_type = AnimalType.objects.create(name='Cow', farming_type='both')
+        breed = Breed.objects.create(animal_type=animal_type, name='Sahiwal')
+        cls.cow = DairyAnimal.objects.create(tag_number='D-1', animal_type=animal_type, breed=breed, owner=cls.owner)
+        DairyAnimal.objects.create(
+            tag_number='D-2', animal_type=animal_type, breed=breed, owner=cls.owner, status='dry'
+        )
+        cls.steer = MeatAnimal.objects.create(
+            tag_number='M-1', animal_type=animal_type, breed=breed, gender='male', owner=cls.owner
+        )
+        cls.item = InventoryItem.objects.create(
+            name='Hay', item_type='feed', quantity=20, unit='kg', unit_price=5,
+            minimum_stock_level=15, owner=cls.owner
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def create_records(self):
+        for days_ago, amount in [(0, '10'), (3, '12'), (20, '8'), (40, '50')]:
+            MilkProduction.objects.create(
+                animal=self.cow, date=self.today - timedelta(days=days_ago), morning_amount=Decimal(amount)
+            )
+        for days_ago, weight in [(20, '200'), (10, '210'), (0, '215')]:
+            WeightRecord.objects.create(
+                animal=self.steer, date=self.today - timedelta(days=days_ago), weight=Decimal(weight)
+            )
+        Sale.objects.create(sale_date=self.today, sale_type='milk', total_amount=500, owner=self.owner)
+        Sale.objects.create(
+            sale_date=self.today, sale_type='milk', total_amount=900, payment_status='cancelled', owner=self.owner
+        )
+        Expense.objects.create(expense_date=self.today - timedelta(days=10), expense_type='feed', amount=200, owner=self.owner)
+        InventoryTransaction.objects.create(
+            item=self.item, transaction_date=self.today, transaction_type='usage', quantity=10
+        )
+        InventoryTransaction.objects.create(
+            item=self.item, transaction_date=self.today, transaction_type='wastage', quantity=2, unit_price=7
+        )
+
+    def test_dashboard_reads_incremental_summaries(self):
+        self.create_records()
+        # Summary aggregate, two herd counts and the low stock count.
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['herd'], {'dairy': {'active': 1, 'dry': 1}, 'meat': {'growing': 1}})
+        self.assertEqual(response.data['milk'], {'today': 10, 'last_7_days': 22, 'last_30_days': 30})
+        self.assertEqual(response.data['average_daily_gain'], Decimal('0.75'))
+        self.assertEqual(response.data['finance']['last_7_days'], {'revenue': 500, 'expenses': 0, 'margin': 500})
+        self.assertEqual(response.data['finance']['last_30_days']['margin'], 300)
+        self.assertEqual(response.data['stock'], {'low_stock_count': 1, 'usage_value_30_days': 64})
+
+    def test_summaries_follow_updates_and_deletes(self):
+        self.create_records()
+        record = MilkProduction.objects.get(animal=self.cow, date=self.today)
+        record.date = self.today - timedelta(days=1)
+        record.save()
+        WeightRecord.objects.get(animal=self.steer, date=self.today - timedelta(days=10)).delete()
+        summaries = {summary.date: summary for summary in FarmDailySummary.objects.filter(owner=self.owner)}
+        self.assertEqual(summaries[self.today].milk_total, 0)
+        self.assertEqual(summaries[self.today - timedelta(days=1)].milk_total, 10)
+        self.assertEqual(summaries[self.today - timedelta(days=10)].weight_gain, 0)
+        self.assertEqual(summaries[self.today].weight_gain, 15)
+        self.assertEqual(summaries[self.today].weight_gain_days, 20)
+
+    def test_rebuild_matches_incremental_summaries(self):
+        self.create_records()
+        fields = ['date', 'milk_total', 'milk_records', 'weight_gain', 'weight_gain_days', 'revenue', 'expenses', 'stock_usage_value']
+        incremental = list(FarmDailySummary.objects.exclude(
+            milk_records=0, weight_gain_days=0, revenue=0, expenses=0, stock_usage_value=0
+        ).values(*fields))
+        call_command('rebuild_summaries', stdout=StringIO())
+        self.assertEqual(list(FarmDailySummary.objects.values(*fields)), incremental)
+
+
+class PnLReportTests(TestCase):
+    """Tests for the profit and loss report."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.other_owner = User.objects.create_user(email='other@example.com', password='pass', first_name='Other')
+        cls.clerk = User.objects.create_user(
+            email='clerk@example.com', password='pass', first_name='Clerk', role='worker', employer=cls.owner
+        )
+        for day, sale_type, amount, paid, status in [
+            (date(2025, 1, 5), 'milk', 500, 500, 'paid'),
+            (date(2025, 1, 20), 'animal', 1500, 1000, 'partial'),
+            (date(2025, 1, 25), 'milk', 900, 0, 'cancelled'),
+            (date(2025, 3, 2), 'milk', 400, 0, 'pending'),
+        ]:
+            Sale.objects.create(
+                sale_date=day, sale_type=sale_type, total_amount=amount, amount_paid=paid,
+                payment_status=status, owner=cls.owner
+            )
+        Sale.objects.create(sale_date=date(2025, 1, 5), sale_type='milk', total_amount=7000, owner=cls.other_owner)
+        for day, expense_type, amount in [(date(2025, 1, 10), 'feed', 300), (date(2025, 2, 10), 'labor', 250)]:
+            Expense.objects.create(expense_date=day, expense_type=expense_type, amount=amount, owner=cls.owner)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = reverse('report-pnl')
+
+    def test_monthly_report(self):
+        response = self.client.get(self.url, {'from': '2025-01-01', 'to': '2025-04-30'})
+        self.assertEqual(response.status_code, 200)
+        periods = response.data['periods']
+        self.assertEqual([row['period'] for row in periods], ['2025-01', '2025-02', '2025-03', '2025-04'])
+        january = periods[0]
+        self.assertEqual((january['revenue'], january['amount_paid'], january['outstanding']), (Decimal('2000'), Decimal('1500'), Decimal('500')))
+        self.assertEqual((january['expenses'], january['profit'], january['margin_percent']), (Decimal('300'), Decimal('1700'), 85.0))
+        self.assertEqual(periods[1]['profit'], Decimal('-250'))
+        self.assertIsNone(periods[3]['margin_percent'])
+        totals = response.data['totals']
+        self.assertEqual((totals['revenue'], totals['expenses'], totals['sales']), (Decimal('2400'), Decimal('550'), 3))
+
+    def test_quarterly_breakdowns(self):
+        response = self.client.get(self.url, {'from': '2025-01-01', 'to': '2025-06-30', 'group': 'quarter', 'by': 'sale_type'})
+        self.assertEqual([row['period'] for row in response.data['periods']], ['2025Q1', '2025Q2'])
+        self.assertEqual(response.data['periods'][0]['sale_type'], {'animal': Decimal('1500'), 'milk': Decimal('900')})
+        self.assertEqual(response.data['periods'][1]['sale_type'], {'animal': Decimal('0'), 'milk': Decimal('0')})
+
+        response = self.client.get(self.url, {'from': '2025-01-01', 'to': '2025-03-31', 'by': 'expense_type'})
+        self.assertEqual(response.data['totals']['expense_type'], {'feed': Decimal('300'), 'labor': Decimal('250')})
+
+    def test_report_is_cached_until_sales_or_expenses_change(self):
+        params = {'from': '2025-01-01', 'to': '2025-03-31'}
+        self.client.get(self.url, params)
+        with self.assertNumQueries(0):
+            self.client.get(self.url, params)
+        Expense.objects.create(expense_date=date(2025, 3, 1), expense_type='feed', amount=50, owner=self.owner)
+        self.assertEqual(self.client.get(self.url, params).data['totals']['expenses'], Decimal('600'))
+
+    def test_invalid_parameters_and_access(self):
+        self.assertEqual(self.client.get(self.url, {'group': 'week'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'from': '2025-03-01', 'to': '2025-01-01'}).status_code, 400)
+        self.client.force_authenticate(self.clerk)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.clerk.role = 'accountant'
+        self.clerk.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['periods']), 12)
+
+
+class AnimalProfitabilityTests(TestCase):
+    """Tests for the per-animal profitability ledger."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.other_owner = User.objects.create_user(email='other@example.com', password='pass', first_name='Other')
+        animal_type = AnimalType.objects.create(name='Cow', farming_type='both')
+        breed = Breed.objects.create(animal_type=animal_type, name='Sahiwal')
+        cls.cow = DairyAnimal.objects.create(
+            tag_number='D-1', animal_type=animal_type, breed=breed, acquisition_price=800, owner=cls.owner
+        )
+        cls.steer = MeatAnimal.objects.create(
+            tag_number='M-1', animal_type=animal_type, breed=breed, gender='male', acquisition_price=500, owner=cls.owner
+        )
+        MeatAnimal.objects.create(
+            tag_number='M-2', animal_type=animal_type, breed=breed, gender='male', acquisition_price=450, owner=cls.other_owner
+        )
+        cls.hay = FeedType.objects.create(name='Hay', feed_category='forage')
+        cls.hay_stock = InventoryItem.objects.create(
+            name='Bales', item_type='feed', feed_type=cls.hay, quantity=1000, unit='kg',
+            unit_price=Decimal('0.50'), owner=cls.owner
+        )
+        for animal in ({'dairy_animal': cls.cow}, {'meat_animal': cls.steer}):
+            FeedingRecord.objects.create(
+                **animal, date=date(2025, 1, 1), feed_type=cls.hay, amount=100, time_of_day='morning'
+            )
+        AnimalHealth.objects.create(dairy_animal=cls.cow, record_date=date(2025, 1, 2), record_type='illness', cost=60)
+        Vaccination.objects.create(meat_animal=cls.steer, vaccine_name='FMD', vaccination_date=date(2025, 1, 3), cost=15)
+        MilkProduction.objects.create(
+            animal=cls.cow, date=date(2025, 1, 4), morning_amount=Decimal('300'), evening_amount=Decimal('100')
+        )
+        milk_sale = Sale.objects.create(sale_date=date(2025, 1, 5), sale_type='milk', total_amount=200, owner=cls.owner)
+        SaleItem.objects.create(
+            sale=milk_sale, item_type='milk', description='Milk', quantity=400, unit='l', unit_price=Decimal('0.50')
+        )
+        steer_sale = Sale.objects.create(sale_date=date(2025, 2, 1), sale_type='animal', total_amount=900, owner=cls.owner)
+        SaleItem.objects.create(
+            sale=steer_sale, item_type='meat_animal', description='Steer', quantity=1, unit='head',
+            unit_price=900, meat_animal_id=cls.steer.pk
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = reverse('animal-profitability')
+
+    def get_rows(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return {row['tag_number']: row for row in response.data['results']}
+
+    def test_costs_and_revenue_per_animal(self):
+        rows = self.get_rows()
+        self.assertEqual(list(rows), ['D-1', 'M-1'])
+        cow, steer = rows['D-1'], rows['M-1']
+        self.assertEqual((cow['feed_amount'], cow['feed_cost'], cow['health_cost']), ('100.00', '50.00', '60.00'))
+        self.assertEqual((cow['total_cost'], cow['milk_revenue'], cow['profit']), ('910.00', '200.00', '-710.00'))
+        self.assertEqual((steer['vaccination_cost'], steer['sale_revenue'], steer['profit']), ('15.00', '900.00', '335.00'))
+        self.assertEqual(list(self.get_rows(animal_kind='meat')), ['M-1'])
+
+    def test_changed_records_are_recomputed_on_read(self):
+        self.get_rows()
+        health = AnimalHealth.objects.create(
+            meat_animal=self.steer, record_date=date(2025, 1, 10), record_type='treatment', cost=35
+        )
+        self.assertTrue(AnimalProfitability.objects.get(meat_animal=self.steer).is_stale)
+        self.assertFalse(AnimalProfitability.objects.get(dairy_animal=self.cow).is_stale)
+        self.assertEqual(self.get_rows()['M-1']['profit'], '300.00')
+
+        # Moving a record recounts both animals
+        health.meat_animal, health.dairy_animal = None, self.cow
+        health.save()
+        rows = self.get_rows()
+        self.assertEqual((rows['M-1']['profit'], rows['D-1']['health_cost']), ('335.00', '95.00'))
+
+        self.hay_stock.unit_price = 1
+        self.hay_stock.save()
+        self.assertEqual(AnimalProfitability.objects.filter(is_stale=True).count(), 2)
+        self.assertEqual(self.get_rows()['M-1']['feed_cost'], '100.00')
+
+    def test_refresh_queries_do_not_grow_with_the_herd(self):
+        with self.assertNumQueries(18):
+            AnimalProfitability.objects.refresh()
+        animal_type, breed = self.cow.animal_type, self.cow.breed
+        for number in range(20):
+            DairyAnimal.objects.create(tag_number=f'D-{number + 2}', animal_type=animal_type, breed=breed, owner=self.owner)
+        AnimalProfitability.objects.update(is_stale=True)
+        with self.assertNumQueries(18):
+            self.assertEqual(AnimalProfitability.objects.refresh(), 23)
+        with self.assertNumQueries(2):
+            self.assertEqual(AnimalProfitability.objects.refresh(), 0)
+
+    def test_report_access(self):
+        clerk = User.objects.create_user(
+            email='clerk@example.com', password='pass', first_name='Clerk', role='worker', employer=self.owner
+        )
+        self.client.force_authenticate(clerk)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        clerk.role = 'accountant'
+        clerk.save()
+        self.assertEqual(list(self.get_rows()), ['D-1', 'M-1'])
+
+
+class FeedCostReportTests(TestCase):
+    """Tests for the feed cost report and the feed costing it is built on."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        animal_type = AnimalType.objects.create(name='Cow', farming_type='both')
+        sahiwal = Breed.objects.create(animal_type=animal_type, name='Sahiwal')
+        friesian = Breed.objects.create(animal_type=animal_type, name='Friesian')
+        cows = [
+            DairyAnimal.objects.create(tag_number=tag, animal_type=animal_type, breed=breed, owner=cls.owner)
+            for tag, breed in (('D-1', sahiwal), ('D-2', friesian))
+        ]
+        steer = MeatAnimal.objects.create(
+            tag_number='M-1', animal_type=animal_type, breed=sahiwal, gender='male', owner=cls.owner
+        )
+        hay = FeedType.objects.create(name='Hay', feed_category='forage')
+        stock = InventoryItem.objects.create(
+            name='Bales', item_type='feed', feed_type=hay, quantity=0, unit='kg', unit_price=Decimal('0.50'), owner=cls.owner
+        )
+        for day, price in ((date(2025, 1, 1), '0.30'), (date(2025, 2, 10), '0.50')):
+            InventoryTransaction.objects.create(
+                item=stock, transaction_date=day, transaction_type='purchase', quantity=100, unit_price=Decimal(price)
+            )
+        for animal, day, amount in [
+            ({'dairy_animal': cows[0]}, date(2024, 12, 20), 10),
+            ({'dairy_animal': cows[0]}, date(2025, 1, 15), 100),
+            ({'dairy_animal': cows[0]}, date(2025, 2, 20), 100),
+            ({'dairy_animal': cows[1]}, date(2025, 1, 20), 50),
+            ({'meat_animal': steer}, date(2025, 1, 10), 200),
+        ]:
+            FeedingRecord.objects.create(**animal, date=day, feed_type=hay, amount=amount, time_of_day='morning')
+        for cow, day, amount in [(cows[0], date(2025, 1, 5), '200'), (cows[0], date(2025, 2, 1), '200'), (cows[1], date(2025, 1, 6), '100')]:
+            MilkProduction.objects.create(animal=cow, date=day, morning_amount=Decimal(amount))
+        for day, weight in ((date(2024, 12, 31), '200'), (date(2025, 1, 31), '230')):
+            WeightRecord.objects.create(animal=steer, date=day, weight=Decimal(weight))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = reverse('report-feed-cost')
+
+    def get_report(self, **params):
+        response = self.client.get(self.url, {'from': '2024-12-01', 'to': '2025-02-28', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_cost_per_litre_uses_average_purchase_price_to_date(self):
+        report = self.get_report()
+        rows = {(row['animal'], row['month']): row for row in report['rows']}
+        # Before the first purchase, feed is valued at the item's unit price
+        self.assertEqual(rows['D-1', '2024-12']['feed_cost'], Decimal('5.00'))
+        self.assertIsNone(rows['D-1', '2024-12']['cost_per_litre'])
+        self.assertEqual((rows['D-1', '2025-01']['feed_cost'], rows['D-1', '2025-01']['cost_per_litre']), (Decimal('30.00'), Decimal('0.1500')))
+        # (100 x 0.30 + 100 x 0.50) / 200 kg bought by the end of February
+        self.assertEqual((rows['D-1', '2025-02']['feed_cost'], rows['D-1', '2025-02']['cost_per_litre']), (Decimal('40.00'), Decimal('0.2000')))
+        self.assertEqual(report['totals']['milk'], Decimal('500.00'))
+        self.assertEqual(report['totals']['feed_cost'], Decimal('90.00'))
+
+    def test_grouped_by_breed_and_per_kg_gain(self):
+        rows = self.get_report(by='breed')['rows']
+        self.assertEqual([(row['breed'], row['month']) for row in rows], [
+            ('Friesian', '2025-01'), ('Sahiwal', '2024-12'), ('Sahiwal', '2025-01'), ('Sahiwal', '2025-02'),
+        ])
+        report = self.get_report(kind='meat')
+        self.assertEqual(report['rows'], [{
+            'animal': 'M-1', 'month': '2025-01', 'feed_amount': Decimal('200.00'), 'feed_cost': Decimal('60.00'),
+            'weight_gain': Decimal('30.00'), 'cost_per_kg_gain': Decimal('2.0000'),
+        }])
+
+    def test_empty_period(self):
+        report = self.get_report(**{'from': '2023-01-01', 'to': '2023-06-30'})
+        self.assertEqual(report['rows'], [])
+        self.assertEqual(report['totals']['feed_cost'], Decimal('0.00'))
+        self.assertEqual(self.client.get(self.url, {'kind': 'goat'}).status_code, 400)
+
+
+class InventoryStockTests(TestCase):
+    """Tests for stock movements applied by inventory transactions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.other_owner = User.objects.create_user(email='other@example.com', password='pass', first_name='Other')
+        cls.hay = InventoryItem.objects.create(name='Hay', item_type='feed', quantity=100, unit='kg', unit_price=5, owner=cls.owner)
+        cls.bran = InventoryItem.objects.create(name='Bran', item_type='feed', quantity=50, unit='kg', unit_price=8, owner=cls.owner)
+        cls.foreign_item = InventoryItem.objects.create(
+            name='Salt', item_type='supplies', quantity=10, unit='kg', unit_price=2, owner=cls.other_owner
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_save_applies_movement_and_purchase_price(self):
+        record = InventoryTransaction.objects.create(
+            item=self.hay, transaction_date=date(2025, 1, 1), transaction_type='purchase', quantity=20, unit_price=6
+        )
+        self.assertEqual(record.item.quantity, 120)
+        self.assertEqual(record.item.unit_price, 6)
+        InventoryTransaction.objects.create(
+            item=self.hay, transaction_date=date(2025, 1, 2), transaction_type='wastage', quantity=5
+        )
+        self.hay.refresh_from_db()
+        self.assertEqual(self.hay.quantity, 115)
+
+    def test_bulk_groups_movements_per_item(self):
+        rows = [
+            {'item': self.hay.pk, 'transaction_date': '2025-01-01', 'transaction_type': 'usage', 'quantity': '10'},
+            {'item': self.hay.pk, 'transaction_date': '2025-01-02', 'transaction_type': 'usage', 'quantity': '15'},
+            {'item': self.bran.pk, 'transaction_date': '2025-01-01', 'transaction_type': 'purchase', 'quantity': '30', 'unit_price': '9'},
+            {'item': self.hay.pk, 'transaction_date': '2025-01-02', 'transaction_type': 'purchase', 'quantity': '40'},
+        ]
+        # Item access check, then SAVEPOINT, INSERT, one UPDATE for all items,
+        # ledger rebalance (balances, transactions and update), dashboard
+        # refresh (aggregate and upsert), profitability feed price UPDATE and
+        # RELEASE.
+        with self.assertNumQueries(11):
+            response = self.client.post(reverse('inventory-transaction-bulk'), rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'saved': 4, 'errors': []})
+        self.hay.refresh_from_db()
+        self.bran.refresh_from_db()
+        self.assertEqual((self.hay.quantity, self.hay.unit_price), (115, 5))
+        self.assertEqual((self.bran.quantity, self.bran.unit_price), (80, 9))
+
+    def test_bulk_takes_the_price_of_the_latest_purchase(self):
+        rows = [
+            {'item': self.bran.pk, 'transaction_date': '2025-01-09', 'transaction_type': 'purchase', 'quantity': '5', 'unit_price': '10'},
+            {'item': self.bran.pk, 'transaction_date': '2025-01-02', 'transaction_type': 'purchase', 'quantity': '5', 'unit_price': '7'},
+        ]
+        self.client.post(reverse('inventory-transaction-bulk'), rows, format='json')
+        self.bran.refresh_from_db()
+        self.assertEqual((self.bran.quantity, self.bran.unit_price), (60, 10))
+
+    def record(self, day, transaction_type, quantity, **kwargs):
+        return InventoryTransaction.objects.create(
+            item=self.hay, transaction_date=date(2025, 1, day), transaction_type=transaction_type,
+            quantity=quantity, **kwargs
+        )
+
+    def test_backdated_transaction_shifts_later_balances(self):
+        self.record(10, 'usage', 10)
+        self.record(20, 'purchase', 30)
+        self.record(5, 'wastage', 5)
+        balances = list(InventoryTransaction.objects.order_by('transaction_date').values_list('balance_after', flat=True))
+        self.assertEqual(balances, [95, 85, 115])
+        self.hay.refresh_from_db()
+        self.assertEqual(self.hay.quantity, 115)
+
+    def test_editing_and_deleting_restate_the_ledger(self):
+        first = self.record(10, 'usage', 10)
+        self.record(20, 'purchase', 30)
+        first.quantity = 4
+        first.save()
+        self.assertEqual(self.balances(), [96, 126])
+        first.transaction_date = date(2025, 1, 25)
+        first.save()
+        self.assertEqual(self.balances(), [130, 126])
+        first.item = self.bran
+        first.save()
+        self.assertEqual(self.balances(), [130])
+        self.bran.refresh_from_db()
+        first.refresh_from_db()
+        self.assertEqual((self.bran.quantity, first.balance_after), (46, 46))
+        first.delete()
+        self.bran.refresh_from_db()
+        self.assertEqual(self.bran.quantity, 50)
+        self.record(5, 'wastage', 5).delete()
+        self.hay.refresh_from_db()
+        self.assertEqual((self.hay.quantity, self.balances()), (130, [130]))
+
+    def test_deleting_an_item_with_transactions(self):
+        self.record(10, 'usage', 10)
+        self.hay.delete()
+        self.assertFalse(InventoryTransaction.objects.exists())
+
+    def balances(self):
+        return list(InventoryTransaction.objects.filter(item=self.hay).order_by('transaction_date').values_list(
+            'balance_after', flat=True
+        ))
+
+    def test_stock_at_reads_the_ledger(self):
+        self.record(2, 'purchase', 10, unit_price=4)
+        self.record(10, 'usage', 20)
+        self.record(20, 'purchase', 30, unit_price=6)
+        url = reverse('inventory-item-stock-at', args=[self.hay.pk])
+        expected = {'2025-01-01': ('100.00', 6), '2025-01-15': ('90.00', 4), '2025-01-31': ('120.00', 6)}
+        for day, (quantity, unit_price) in expected.items():
+            with self.assertNumQueries(1):
+                response = self.client.get(url, {'date': day})
+            self.assertEqual((response.data['quantity'], response.data['total_value']), (quantity, Decimal(quantity) * unit_price))
+        self.assertEqual(self.client.get(url, {'date': 'soon'}).status_code, 400)
+
+    def test_valuation_uses_snapshots_of_closed_months(self):
+        self.record(10, 'usage', 10)
+        url = reverse('inventory-item-valuation')
+        response = self.client.get(url, {'date': '2025-01-31'})
+        self.assertEqual(response.data['source'], 'ledger')
+        self.assertEqual(response.data['total_value'], 90 * 5 + 50 * 8)
+
+        call_command('close_inventory_month', date='2025-01-31', stdout=StringIO())
+        self.assertEqual(InventorySnapshot.objects.filter(date=date(2025, 1, 31)).count(), 3)
+        # A late entry changes the ledger but not the closed month
+        self.record(12, 'usage', 20)
+        response = self.client.get(url, {'date': '2025-01-31'})
+        self.assertEqual(response.data['source'], 'snapshot')
+        self.assertEqual(response.data['total_value'], 90 * 5 + 50 * 8)
+        self.assertEqual([row['name'] for row in response.data['items']], ['Bran', 'Hay'])
+
+        # An item added after the close is valued from the ledger next to the snapshots
+        InventoryItem.objects.create(name='Oats', item_type='feed', quantity=40, unit='kg', unit_price=3, owner=self.owner)
+        response = self.client.get(url, {'date': '2025-01-31'})
+        self.assertEqual(response.data['source'], 'mixed')
+        self.assertEqual(response.data['total_value'], 90 * 5 + 50 * 8 + 40 * 3)
+        self.assertEqual([row['name'] for row in response.data['items']], ['Bran', 'Hay', 'Oats'])
+
+    def test_bulk_reports_row_errors_without_aborting(self):
+        rows = [
+            {'item': self.hay.pk, 'transaction_date': '2025-01-01', 'transaction_type': 'usage', 'quantity': '10'},
+            {'item': self.foreign_item.pk, 'transaction_date': '2025-01-01', 'transaction_type': 'usage', 'quantity': '1'},
+            {'item': self.hay.pk, 'transaction_date': '2025-01-01', 'transaction_type': 'usage', 'quantity': '-3'},
+        ]
+        response = self.client.post(reverse('inventory-transaction-bulk'), rows, format='json')
+        self.assertEqual(response.data['saved'], 1)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.foreign_item.refresh_from_db()
+        self.assertEqual(self.foreign_item.quantity, 10)
+
+
+class ConcurrentStockTests(TransactionTestCase):
+    """Tests that stock movements recorded at the same time are not lost."""
+
+    threads = 8
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Threads cannot share an in-memory database; run these on PostgreSQL.')
+        owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        self.item = InventoryItem.objects.create(name='Hay', item_type='feed', quantity=100, unit='kg', unit_price=5, owner=owner)
+
+    def run_in_threads(self, target):
+        barrier = Barrier(self.threads)
+        errors = []
+
+        def worker(index):
+            try:
+                barrier.wait()
+                target(index)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=worker, args=(index,)) for index in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_concurrent_usage_is_not_lost(self):
+        def record_usage(index):
+            # Each worker loads its own copy of the item, as separate requests would
+            item = InventoryItem.objects.get(pk=self.item.pk)
+            InventoryTransaction.objects.create(
+                item=item, transaction_date=date(2025, 1, 1), transaction_type='usage', quantity=3
+            )
+
+        self.run_in_threads(record_usage)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 100 - 3 * self.threads)
+        self.assertEqual(InventoryTransaction.objects.count(), self.threads)
+
+    def test_concurrent_bulk_requests_are_not_lost(self):
+        owner = self.item.owner
+
+        def record_bulk(index):
+            client = APIClient()
+            client.force_authenticate(owner)
+            rows = [
+                {'item': self.item.pk, 'transaction_date': '2025-01-01', 'transaction_type': 'purchase', 'quantity': '2'},
+                {'item': self.item.pk, 'transaction_date': '2025-01-01', 'transaction_type': 'usage', 'quantity': '1'},
+            ]
+            response = client.post(reverse('inventory-transaction-bulk'), rows, format='json')
+            assert response.status_code == 201, response.data
+
+        self.run_in_threads(record_bulk)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 100 + self.threads)
+
+
+class ScaleIngestTests(TestCase):
+    """Tests for the chute scale ingest service."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        animal_type = AnimalType.objects.create(name='Cattle', farming_type='both')
+        breed = Breed.objects.create(animal_type=animal_type, name='Angus')
+        cls.steers = MeatAnimal.objects.bulk_create([
+            MeatAnimal(tag_number=f'S-{index}', animal_type=animal_type, breed=breed, gender='male', owner=cls.owner)
+            for index in range(5)
+        ])
+        cls.cow = DairyAnimal.objects.create(tag_number='C-1', animal_type=animal_type, breed=breed, owner=cls.owner)
+
+    def setUp(self):
+        dead_letter = NamedTemporaryFile(suffix='.csv', delete=False)
+        dead_letter.close()
+        self.dead_letter = Path(dead_letter.name)
+        self.addCleanup(self.dead_letter.unlink)
+
+    def ingest(self, lines, rate=500, **kwargs):
+        """Serve lines from a local fake emitter at rate per second and ingest them over TCP."""
+        index = TagIndex()
+        index.load()
+        ingestor = ScaleIngestor(index, dead_letter=self.dead_letter, flush_interval=0.05, **kwargs)
+
+        async def emit(reader, writer):
+            for number, line in enumerate(lines):
+                writer.write(f'{line}\n'.encode())
+                await writer.drain()
+                if number % 50 == 49:
+                    await asyncio.sleep(50 / rate)
+            writer.close()
+
+        async def run():
+            server = await asyncio.start_server(emit, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                writer = asyncio.create_task(ingestor.run_writer())
+                await ingestor.read_stream(*await asyncio.open_connection('127.0.0.1', port))
+                await ingestor.close()
+                await writer
+
+        # async_to_sync runs the ORM calls on this thread, inside the test transaction
+        async_to_sync(run)()
+        return ingestor
+
+    def test_parse_reading(self):
+        reading = parse_reading('S-1, 250.5, 2025-01-01T08:00:00+00:00\n')
+        self.assertEqual((reading.tag_number, reading.weight), ('S-1', Decimal('250.5')))
+        self.assertEqual(parse_reading('S-1,250,1735718400').timestamp, reading.timestamp.replace(hour=8))
+        for line in ('S-1', 'S-1,heavy,2025-01-01', 'S-1,-3,2025-01-01', 'S-1,250,yesterday'):
+            with self.assertRaises(ValueError):
+                parse_reading(line)
+
+    def test_readings_are_written_in_batches(self):
+        lines = [
+            f'S-{number % 5},{200 + number},2025-01-0{1 + number // 250}T{8 + number % 250 // 60:02d}:{number % 60:02d}:00+00:00'
+            for number in range(500)
+        ]
+        lines += ['X-9,250,2025-01-01T08:00:00+00:00', 'garbage']
+        ingestor = self.ingest(lines, batch_size=100, max_pending=50)
+
+        self.assertEqual((ingestor.received, ingestor.written, ingestor.rejected), (502, 500, 2))
+        self.assertEqual(WeightRecord.objects.count(), 10)
+        # The last reading of each animal's day wins, and the latest day sets current_weight
+        record = WeightRecord.objects.get(animal=self.steers[0], date=date(2025, 1, 1))
+        self.assertEqual(record.weight, Decimal('445'))
+        self.steers[0].refresh_from_db()
+        self.assertEqual(self.steers[0].current_weight, Decimal('695'))
+        dead_letters = self.dead_letter.read_text().splitlines()
+        self.assertEqual(len(dead_letters), 2)
+        self.assertIn('unknown tag', dead_letters[0])
+
+    def test_dairy_weights_go_to_health_checks(self):
+        lines = ['C-1,480,2025-01-01T08:00:00+00:00', 'C-1,482,2025-01-01T09:00:00+00:00']
+        ingestor = self.ingest(lines)
+        self.assertEqual(ingestor.rejected, 2)
+        self.assertFalse(AnimalHealth.objects.exists())
+
+        self.ingest(lines, record_health=True)
+        self.ingest(['C-1,484,2025-01-01T10:00:00+00:00'], record_health=True)
+        health = AnimalHealth.objects.get()
+        self.assertEqual((health.weight, health.record_type, health.owner), (Decimal('484'), 'routine_check', self.owner))
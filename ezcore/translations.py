@@ -163,3 +163,28 @@ UI_TRANSLATIONS = {
         'import': 'درآمد کریں',
     }
 }
+
+# The tables compiled into the gettext catalogs by compile_translations
+TRANSLATION_TABLES = [
+    ANIMAL_TYPE_TRANSLATIONS,
+    FARMING_TYPE_TRANSLATIONS,
+    ANIMAL_STATUS_TRANSLATIONS,
+    FEED_TYPE_TRANSLATIONS,
+    HEALTH_RECORD_TRANSLATIONS,
+    EXPENSE_TYPE_TRANSLATIONS,
+    UI_TRANSLATIONS,
+]
+
+
+def catalog_messages(language):
+    """
+    Return {English text: translation} of a language from the tables. The
+    English text is what the models and views pass to gettext, so the
+    compiled catalog translates them without a runtime lookup here.
+    """
+    messages = {}
+    for table in TRANSLATION_TABLES:
+        for key, text in table['en'].items():
+            if key in table.get(language, {}):
+                messages.setdefault(text, table[language][key])
+    return messages
@@ -49,7 +49,7 @@ class MilkProductionAdmin(admin.ModelAdmin):
             'fields': ('notes',)
         }),
     )
-    readonly_fields = ('total_amount',)
+    readonly_fields = ('total_amount', 'expected_amount', 'expected_next_week', 'expected_next_month')
     raw_id_fields = ('animal', 'recorded_by')
 
 
@@ -73,4 +73,5 @@ class LactationAdmin(admin.ModelAdmin):
             'fields': ('notes',)
         }),
     )
+    readonly_fields = ('total_production', 'peak_production', 'peak_date')
     raw_id_fields = ('animal',)
@@ -0,0 +1,178 @@
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+from ezcore.db import update_rows
+from ezcore.reference import get_breed_averages
+from ezdairy.models import DairyAnimal, Lactation, MilkProduction
+
+# Wood's lactation curve: y(t) = a * t**b * exp(-c * t), t in days in milk
+DEFAULT_SHAPE = (0.2, 0.004)
+STANDARD_LACTATION_DAYS = 305
+MIN_RECORDS = 5
+FORECAST_FIELDS = ('expected_amount', 'expected_next_week', 'expected_next_month')
+FORECAST_OFFSETS = (0, 7, 30)
+MAX_AMOUNT = 9999.99
+
+
+def fit_wood_curves(groups, days, yields, group_count):
+    """
+    Fit Wood's curve to every group at once by least squares on
+    log y = log a + b log t - c t.
+
+    groups, days and yields are parallel arrays with one entry per record.
+    Return (log_a, b, c, fitted) arrays with one entry per group; fitted is
+    False where there were too few records or the curve never declines.
+    """
+    positive = yields > 0
+    groups, days, log_yields = groups[positive], days[positive], np.log(yields[positive])
+    columns = (np.ones_like(days), np.log(days), -days)
+
+    # Normal equations of every group, summed with bincount instead of a loop over groups
+    normal = np.empty((group_count, 3, 3))
+    rhs = np.empty((group_count, 3))
+    for i in range(3):
+        rhs[:, i] = np.bincount(groups, weights=columns[i] * log_yields, minlength=group_count)
+        for j in range(i, 3):
+            normal[:, i, j] = normal[:, j, i] = np.bincount(
+                groups, weights=columns[i] * columns[j], minlength=group_count
+            )
+
+    fitted = normal[:, 0, 0] >= MIN_RECORDS
+    fitted[fitted] &= np.linalg.cond(normal[fitted]) < 1e12
+    normal[~fitted] = np.eye(3)
+    rhs[~fitted] = 0
+    log_a, b, c = np.linalg.solve(normal, rhs[..., None])[..., 0].T
+    fitted &= np.isfinite(log_a) & np.isfinite(b) & np.isfinite(c) & (b > -1) & (c > 0)
+    return log_a, b, c, fitted
+
+
+def default_curve_scale(levels):
+    """Return log a of the default curve shape averaging levels per day over a standard lactation."""
+    b, c = DEFAULT_SHAPE
+    days = np.arange(1, STANDARD_LACTATION_DAYS + 1)
+    with np.errstate(divide='ignore'):
+        return np.log(levels) - np.log(np.mean(days ** b * np.exp(-c * days)))
+
+
+def forecast_lactations(groups, days, yields, lactation_levels, record_levels):
+    """
+    Return expected daily yields for each record on its own day and 7 and
+    30 days later, as an array of shape (records, 3).
+
+    groups holds each record's lactation index, or -1 when the record falls
+    before the animal's first lactation. lactation_levels is the daily
+    average each lactation falls back on without a usable fit, and
+    record_levels the flat yield expected of records outside a lactation.
+    """
+    in_lactation = groups >= 0
+    lactation_groups = groups[in_lactation]
+    lactation_days = days[in_lactation]
+    log_a, b, c, fitted = fit_wood_curves(
+        lactation_groups, lactation_days, yields[in_lactation], len(lactation_levels)
+    )
+
+    # Lactations without a usable fit follow the default shape scaled to their level
+    log_a = np.where(fitted, log_a, default_curve_scale(lactation_levels))
+    b = np.where(fitted, b, DEFAULT_SHAPE[0])
+    c = np.where(fitted, c, DEFAULT_SHAPE[1])
+
+    forecasts = np.empty((len(groups), len(FORECAST_OFFSETS)))
+    for column, offset in enumerate(FORECAST_OFFSETS):
+        t = lactation_days + offset
+        forecasts[in_lactation, column] = np.exp(
+            log_a[lactation_groups] + b[lactation_groups] * np.log(t) - c[lactation_groups] * t
+        )
+    # Without a lactation start there is no curve to follow, so expect a flat yield
+    forecasts[~in_lactation] = record_levels[~in_lactation, None]
+    return np.clip(np.round(forecasts, 2), 0, MAX_AMOUNT)
+
+
+def forecast_milk(animal_ids=None, since=None):
+    """
+    Fill expected_amount, expected_next_week and expected_next_month of
+    milk records from a Wood's curve fitted per lactation.
+
+    Only the animals in animal_ids are refitted when it is given, and only
+    the lactations still running on or after since. Return the number of
+    records whose forecasts changed.
+    """
+    animals = DairyAnimal.objects.all()
+    lactations = Lactation.objects.order_by('animal_id', 'start_date')
+    records = MilkProduction.objects.order_by()
+    if animal_ids is not None:
+        animals = animals.filter(pk__in=animal_ids)
+        lactations = lactations.filter(animal_id__in=animal_ids)
+        records = records.filter(animal_id__in=animal_ids)
+
+    animal_rows = list(animals.values_list('pk', 'breed_avg_milk_production', 'breed_id'))
+    breed_averages = get_breed_averages(breed_id for pk, own_average, breed_id in animal_rows)
+    breed_levels = {
+        pk: own_average or breed_averages[breed_id].average_milk_production
+        for pk, own_average, breed_id in animal_rows
+    }
+    lactation_rows = list(lactations.values_list('animal_id', 'start_date'))
+    lactation_animals = np.array([animal_id for animal_id, start in lactation_rows], dtype=np.int64)
+    lactation_starts = np.array([start.toordinal() for animal_id, start in lactation_rows], dtype=np.int64)
+    # A lactation runs until the animal's next one starts
+    lactation_ends = np.full(len(lactation_rows), np.iinfo(np.int64).max)
+    same_animal = lactation_animals[1:] == lactation_animals[:-1]
+    lactation_ends[:-1][same_animal] = lactation_starts[1:][same_animal]
+
+    if since is not None:
+        since = since.toordinal()
+        running = lactation_ends > since
+        first_day = min(lactation_starts[running & (lactation_starts <= since)], default=since)
+        records = records.filter(date__gte=date.fromordinal(int(first_day)))
+
+    rows = list(records.values_list('pk', 'animal_id', 'date', 'total_amount', *FORECAST_FIELDS))
+    if not rows:
+        return 0
+    pks, record_animals, dates, yields, *stored = (list(column) for column in zip(*rows))
+    record_animals = np.array(record_animals, dtype=np.int64)
+    dates = np.array([day.toordinal() for day in dates], dtype=np.int64)
+    yields = np.array(yields, dtype=float)
+
+    # Match each record to the latest lactation of its animal starting on or before it
+    lactation_keys = lactation_animals * 10 ** 6 + lactation_starts
+    groups = np.searchsorted(lactation_keys, record_animals * 10 ** 6 + dates, side='right') - 1
+    matched = groups >= 0
+    matched[matched] = lactation_animals[groups[matched]] == record_animals[matched]
+    groups[~matched] = -1
+    days = np.zeros(len(rows))
+    days[matched] = dates[matched] - lactation_starts[groups[matched]] + 1
+
+    keep = np.ones(len(rows), dtype=bool)
+    if since is not None:
+        # Earlier lactations of other animals were only loaded in part, so leave them be
+        keep = dates >= since
+        keep[matched] = lactation_ends[groups[matched]] > since
+
+    # Fall back on the breed average, else the lactation's own mean yield
+    lactation_counts = np.bincount(groups[matched], minlength=len(lactation_rows))
+    lactation_totals = np.bincount(groups[matched], weights=yields[matched], minlength=len(lactation_rows))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        own_levels = lactation_totals / lactation_counts
+    lactation_breed_levels = np.array([float(breed_levels.get(pk) or 'nan') for pk in lactation_animals])
+    record_levels = np.array([float(breed_levels.get(pk) or 'nan') for pk in record_animals])
+    lactation_levels = np.where(np.isnan(lactation_breed_levels), own_levels, lactation_breed_levels)
+
+    forecasts = forecast_lactations(groups, days, yields, lactation_levels, record_levels)
+    stored = np.array(
+        [[float('nan') if value is None else float(value) for value in column] for column in stored], dtype=float
+    ).T
+    missing = np.isnan(forecasts)
+    changed = keep & ((np.abs(forecasts - stored) >= 0.005) | (np.isnan(stored) != missing)).any(axis=1)
+
+    rows = [
+        [None if missing[index, column] else Decimal(f'{forecasts[index, column]:.2f}') for column in range(len(FORECAST_FIELDS))]
+        + [pks[index]]
+        for index in np.flatnonzero(changed)
+    ]
+    if rows:
+        with transaction.atomic():
+            update_rows(MilkProduction, FORECAST_FIELDS, rows)
+    return len(rows)
+
@@ -0,0 +1,38 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from ezdairy.forecasting import forecast_lactations
+
+
+class Command(BaseCommand):
+    help = 'Time the vectorised lactation curve fit on a synthetic herd'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--animals', type=int, default=10000, help='Number of lactations to fit')
+        parser.add_argument('--days', type=int, default=300, help='Milk records per lactation')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs')
+
+    def handle(self, *args, **options):
+        animals, days_in_milk = options['animals'], options['days']
+        rng = np.random.default_rng(0)
+        groups = np.repeat(np.arange(animals), days_in_milk)
+        days = np.tile(np.arange(1, days_in_milk + 1), animals).astype(float)
+        a = rng.uniform(15, 30, animals)[groups]
+        b = rng.uniform(0.1, 0.3, animals)[groups]
+        c = rng.uniform(0.002, 0.006, animals)[groups]
+        yields = a * days ** b * np.exp(-c * days) * rng.lognormal(0, 0.05, len(groups))
+        levels = np.full(animals, 20.0)
+
+        timings = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            forecasts = forecast_lactations(groups, days, yields, levels, levels[groups])
+            timings.append(time.perf_counter() - start)
+
+        error = np.abs(forecasts[:, 0] - yields) / yields
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(groups)} records: best {min(timings):.2f} s, mean {sum(timings) / len(timings):.2f} s, '
+            f'median error {np.median(error) * 100:.1f}%'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from ezdairy.forecasting import forecast_milk
+from ezdairy.models import DairyAnimal
+
+
+class Command(BaseCommand):
+    help = 'Refit the lactation curves of the herd and fill the expected milk amounts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', type=int, help='Only forecast the animals of this farm owner id')
+
+    def handle(self, *args, **options):
+        animal_ids = None
+        if options['owner']:
+            animal_ids = list(DairyAnimal.objects.filter(owner_id=options['owner']).values_list('pk', flat=True))
+
+        updated = forecast_milk(animal_ids)
+        self.stdout.write(self.style.SUCCESS(f'Updated the forecasts of {updated} milk records.'))
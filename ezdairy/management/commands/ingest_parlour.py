@@ -0,0 +1,63 @@
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ezcore.parsers import iter_csv_rows
+from ezdairy.recording import SESSION_FIELDS
+from ezdairy.serializers import MilkSessionSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Merge a parlour meter export of one milking session into the milk records, matching cows by tag number'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with tag_number and amount columns, or - to read standard input")
+        parser.add_argument('--session', choices=sorted(SESSION_FIELDS), required=True, help='Milking session of the export')
+        parser.add_argument('--owner', type=int, help='Only match the tags of this farm owner id')
+        parser.add_argument('--date', help='Milking date (YYYY-MM-DD) for rows without a date column')
+        parser.add_argument('--recorded-by', type=int, help='User id to record the yields as')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows merged per transaction')
+
+    def handle(self, *args, **options):
+        recorded_by = None
+        if options['recorded_by']:
+            recorded_by = User.objects.filter(pk=options['recorded_by']).first()
+            if recorded_by is None:
+                raise CommandError(f"No user with id {options['recorded_by']}.")
+        context = {'session': options['session'], 'owner_id': options['owner']}
+        if options['date']:
+            try:
+                context['date'] = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--date must be in YYYY-MM-DD format.')
+
+        started = time.perf_counter()
+        saved = rejected = 0
+        if options['path'] == '-':
+            csv_file = sys.stdin
+        else:
+            csv_file = open(options['path'], newline='', encoding='utf-8-sig')
+        with csv_file:
+            rows = iter_csv_rows(csv_file)
+            # Rows are read and merged a batch at a time, so a stream never has to fit in memory
+            offset = 0
+            while batch := list(islice(rows, options['batch_size'])):
+                serializer = MilkSessionSerializer(data=batch, many=True, context=context)
+                if not serializer.is_valid():
+                    raise CommandError(serializer.errors)
+                if serializer.validated_data:
+                    saved += serializer.save(recorded_by=recorded_by)
+                for error in serializer.row_errors:
+                    self.stderr.write(f"Row {offset + error['index'] + 2}: {error['errors']}")
+                rejected += len(serializer.row_errors)
+                offset += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Merged {saved} {options['session']} yields in {time.perf_counter() - started:.2f} s, rejected {rejected}."
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from ezdairy.models import Lactation
+
+
+class Command(BaseCommand):
+    help = 'Recompute lactation totals and peaks from the milk records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', type=int, help='Only recompute the lactations of this farm owner id')
+
+    def handle(self, *args, **options):
+        lactations = Lactation.objects.all()
+        if options['owner']:
+            lactations = lactations.filter(animal__owner_id=options['owner'])
+
+        updated = lactations.recompute()
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {updated} lactations.'))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 14:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezanimal', '0002_animaltype_birth_date'),
+        ('ezdairy', '0002_alter_lactation_options_alter_milkproduction_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dairyanimal',
+            index=models.Index(fields=['owner', 'tag_number'], name='ezdairy_animal_owner_tag_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dairyanimal',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['owner', 'status'], name='ezdairy_animal_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lactation',
+            index=models.Index(condition=models.Q(('end_date__isnull', True)), fields=['animal', '-start_date'], name='ezdairy_lactation_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='milkproduction',
+            index=models.Index(fields=['-date'], name='ezdairy_milk_date_idx'),
+        ),
+    ]
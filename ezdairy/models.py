@@ -1,9 +1,40 @@
+from datetime import date
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import Case, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from ezanimal.models import AnimalType, Breed
 from user.models import User
 
 
+def liters(amount):
+    """Return an amount of milk as a decimal SQL value, whatever its Python type."""
+    return Value(Decimal(str(amount)), output_field=models.DecimalField(max_digits=10, decimal_places=2))
+
+
+class DairyAnimalQuerySet(models.QuerySet):
+    """Custom queryset for dairy animals."""
+    
+    def with_production_summary(self):
+        """
+        Annotate each animal with its latest milk record and open lactation
+        so that list views do not need a query per animal.
+        """
+        latest_milk = MilkProduction.objects.filter(animal=OuterRef('pk')).order_by('-date')
+        open_lactation = Lactation.objects.filter(
+            animal=OuterRef('pk'), end_date__isnull=True
+        ).order_by('-start_date')
+        return self.select_related('animal_type', 'breed', 'owner').annotate(
+            latest_milk_date=Subquery(latest_milk.values('date')[:1]),
+            latest_milk_amount=Subquery(latest_milk.values('total_amount')[:1]),
+            latest_milk_expected_amount=Subquery(latest_milk.values('expected_amount')[:1]),
+            current_lactation_number=Subquery(open_lactation.values('lactation_number')[:1]),
+            current_lactation_start_date=Subquery(open_lactation.values('start_date')[:1]),
+        )
+
+
 class DairyAnimal(models.Model):
     """Model for dairy animals."""
     
@@ -40,10 +71,16 @@ class DairyAnimal(models.Model):
     # New fields for breed-based defaults
     breed_avg_milk_production = models.DecimalField(_('breed average milk production (liters/day)'), max_digits=6, decimal_places=2, blank=True, null=True)
     
+    objects = DairyAnimalQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('dairy animal')
         verbose_name_plural = _('dairy animals')
         ordering = ['tag_number']
+        indexes = [
+            models.Index(fields=['owner', 'tag_number'], name='ezdairy_animal_owner_tag_idx'),
+            models.Index(fields=['owner', 'status'], condition=Q(is_active=True), name='ezdairy_animal_active_idx'),
+        ]
     
     def __str__(self):
         return f"{self.tag_number} - {self.name or 'Unnamed'}"
@@ -81,6 +118,10 @@ class MilkProduction(models.Model):
         verbose_name_plural = _('milk productions')
         ordering = ['-date']
         unique_together = ['animal', 'date']
+        # The unique (animal, date) index serves per-animal history
+        indexes = [
+            models.Index(fields=['-date'], name='ezdairy_milk_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.animal.tag_number} - {self.date} - {self.total_amount}L"
@@ -97,9 +138,68 @@ class MilkProduction(models.Model):
         return ((self.total_amount - self.expected_amount) / self.expected_amount) * 100
 
 
+class LactationQuerySet(models.QuerySet):
+    """
+    Custom queryset for lactations. A lactation's milk records are those of
+    its animal dated from start_date up to end_date, or onwards while open.
+    """
+    
+    def covering(self, day):
+        """Return the lactations whose window contains day."""
+        return self.filter(Q(end_date__isnull=True) | Q(end_date__gte=day), start_date__lte=day)
+    
+    def add_milk(self, day, delta, amount=None):
+        """
+        Add delta liters to the total of the lactations covering day, and
+        raise their peak to amount on day if it is higher, in one UPDATE.
+        delta and amount may be ints, floats or decimals.
+        """
+        updates = {
+            'total_production': Coalesce('total_production', Value(Decimal('0'))) + liters(delta),
+        }
+        if amount is not None:
+            amount = liters(amount)
+            higher = Q(peak_production__isnull=True) | Q(peak_production__lt=amount)
+            updates['peak_production'] = Case(When(higher, then=amount), default=F('peak_production'))
+            updates['peak_date'] = Case(When(higher, then=Value(day)), default=F('peak_date'))
+        return self.covering(day).update(**updates)
+    
+    def window_records(self):
+        """Return the milk records of the outer lactation, for use in a subquery."""
+        return MilkProduction.objects.filter(
+            animal=OuterRef('animal'),
+            date__gte=OuterRef('start_date'),
+            date__lte=Coalesce(OuterRef('end_date'), Value(date.max)),
+        ).order_by()
+    
+    def recompute_peaks(self):
+        """Recompute peak_production and peak_date from the milk records in one UPDATE."""
+        peak = self.window_records().order_by('-total_amount', 'date')
+        return self.update(
+            peak_production=Subquery(peak.values('total_amount')[:1]),
+            peak_date=Subquery(peak.values('date')[:1]),
+        )
+    
+    def recompute(self):
+        """
+        Recompute total_production, peak_production and peak_date from the
+        milk records with one UPDATE over grouped subqueries.
+        """
+        total = self.window_records().values('animal').annotate(total=Sum('total_amount')).values('total')
+        peak = self.window_records().order_by('-total_amount', 'date')
+        return self.update(
+            total_production=Coalesce(Subquery(total), Value(Decimal('0'))),
+            peak_production=Subquery(peak.values('total_amount')[:1]),
+            peak_date=Subquery(peak.values('date')[:1]),
+        )
+
+
 class Lactation(models.Model):
     """Model for lactation records."""
     
+    # Maintained from the milk records by ezcore.signals
+    ROLLUP_FIELDS = ('total_production', 'peak_production', 'peak_date')
+    
     animal = models.ForeignKey(DairyAnimal, on_delete=models.CASCADE, related_name='lactations', verbose_name=_('animal'))
     lactation_number = models.PositiveIntegerField(_('lactation number'))
     start_date = models.DateField(_('start date'))
@@ -116,11 +216,16 @@ class Lactation(models.Model):
     expected_peak_production = models.DecimalField(_('expected peak production (liters/day)'), max_digits=6, decimal_places=2, blank=True, null=True)
     expected_duration_days = models.PositiveIntegerField(_('expected duration (days)'), blank=True, null=True)
     
+    objects = LactationQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('lactation')
         verbose_name_plural = _('lactations')
         ordering = ['-start_date']
         unique_together = ['animal', 'lactation_number']
+        indexes = [
+            models.Index(fields=['animal', '-start_date'], condition=Q(end_date__isnull=True), name='ezdairy_lactation_open_idx'),
+        ]
     
     def __str__(self):
         return f"{self.animal.tag_number} - Lactation {self.lactation_number}"
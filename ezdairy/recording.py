@@ -0,0 +1,100 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ezcore.analytics.models import AnimalProfitability
+from ezcore.dashboard.models import FarmDailySummary, SUMMARY_SOURCES
+from ezcore.db import upsert_rows
+from ezdairy.forecasting import forecast_milk
+from ezdairy.models import DairyAnimal, Lactation, MilkProduction
+
+SESSION_FIELDS = {'morning': ('morning_amount', 'evening_amount'), 'evening': ('evening_amount', 'morning_amount')}
+TAG_CACHE_VERSION_KEY = 'ezdairy:tags:version'
+TAG_CACHE_TIMEOUT = 3600
+
+
+def refresh_milk_derived(keys, animal_owners):
+    """
+    Refresh what depends on milk records written in bulk, which sends no
+    signals: the dashboard totals, lactation rollups, forecasts and
+    profitability of the (animal_id, date) keys. animal_owners maps each
+    animal to its owner.
+    """
+    if not keys:
+        return
+    FarmDailySummary.objects.refresh(
+        SUMMARY_SOURCES[MilkProduction], {(animal_owners[animal_id], day) for animal_id, day in keys}
+    )
+    animal_ids = {animal_id for animal_id, day in keys}
+    dates = [day for animal_id, day in keys]
+    Lactation.objects.filter(animal_id__in=animal_ids, start_date__lte=max(dates)).filter(
+        Q(end_date__isnull=True) | Q(end_date__gte=min(dates))
+    ).recompute()
+    forecast_milk(animal_ids, since=min(dates))
+    AnimalProfitability.objects.mark_stale(dairy_ids=animal_ids)
+
+
+def forget_dairy_tags():
+    """Invalidate every cached tag map, e.g. after a dairy animal is added or retagged."""
+    try:
+        cache.incr(TAG_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(TAG_CACHE_VERSION_KEY, 1, None)
+
+
+def get_dairy_tags(owner_id, tags):
+    """
+    Return {tag_number: (animal_id, owner_id)} for the given tags among the
+    dairy animals of owner_id, or of every owner when it is None.
+
+    The owner's whole tag map is cached, so each parlour session costs no
+    query once warm; a tag missing from the cached map reloads it once.
+    """
+    key = f"ezdairy:tags:{cache.get_or_set(TAG_CACHE_VERSION_KEY, 1, None)}:{owner_id or 'all'}"
+    tag_map = cache.get(key)
+    if tag_map is None or not set(tags) <= tag_map.keys():
+        animals = DairyAnimal.objects.all()
+        if owner_id is not None:
+            animals = animals.filter(owner_id=owner_id)
+        tag_map = {tag_number: (pk, owner) for pk, tag_number, owner in animals.values_list('pk', 'tag_number', 'owner_id')}
+        cache.set(key, tag_map, TAG_CACHE_TIMEOUT)
+    return {tag: tag_map[tag] for tag in tags if tag in tag_map}
+
+
+def merge_session(session, rows, animal_owners):
+    """
+    Write one milking session's yields into the morning or evening column
+    of each animal's (animal, date) record with a single upsert, leaving
+    the other session's amount alone and recomputing total_amount in SQL.
+
+    rows are dicts with animal_id, date, amount, and optionally
+    fat_content, protein_content and recorded_by.
+    """
+    amount_field, other_field = SESSION_FIELDS[session]
+    now = timezone.now()
+    fields = (
+        'animal', 'date', 'time_of_day', amount_field, other_field, 'total_amount',
+        'fat_content', 'protein_content', 'recorded_by', 'created_at', 'updated_at',
+    )
+    values = [
+        [
+            row['animal_id'], row['date'], session, row['amount'], 0, row['amount'],
+            row.get('fat_content'), row.get('protein_content'),
+            getattr(row.get('recorded_by'), 'pk', None), now, now,
+        ]
+        for row in rows
+    ]
+    with transaction.atomic():
+        upsert_rows(MilkProduction, fields, values, ['animal', 'date'], {
+            amount_field: f'{{new}}.{amount_field}',
+            'total_amount': f'{{new}}.{amount_field} + {{old}}.{other_field}',
+            # A record holding the other session's milk now covers both
+            'time_of_day': "CASE WHEN {old}.time_of_day = {new}.time_of_day THEN {old}.time_of_day ELSE 'both' END",
+            'fat_content': 'COALESCE({new}.fat_content, {old}.fat_content)',
+            'protein_content': 'COALESCE({new}.protein_content, {old}.protein_content)',
+            'recorded_by': '{new}.recorded_by_id',
+            'updated_at': '{new}.updated_at',
+        })
+        refresh_milk_derived({(row['animal_id'], row['date']) for row in rows}, animal_owners)
+    return len(values)
@@ -1,6 +1,8 @@
 from rest_framework import serializers
+from django.db import transaction
 from ezdairy.models import DairyAnimal, MilkProduction, Lactation
 from ezanimal.serializers import AnimalTypeSerializer, BreedSerializer
+from ezdairy.recording import get_dairy_tags, merge_session, refresh_milk_derived
 from django.utils.translation import gettext_lazy as _
 
 
@@ -27,23 +29,40 @@ class DairyAnimalSerializer(serializers.ModelSerializer):
         """Add additional calculated fields to the serialized representation."""
         representation = super().to_representation(instance)
         
+        # Use the annotations from DairyAnimalQuerySet.with_production_summary()
+        # when present, otherwise fall back to querying the related records.
+        if hasattr(instance, 'latest_milk_date'):
+            latest_milk_date = instance.latest_milk_date
+            latest_milk_amount = instance.latest_milk_amount
+            expected_milk_amount = instance.latest_milk_expected_amount
+            lactation_number = instance.current_lactation_number
+            lactation_start_date = instance.current_lactation_start_date
+        else:
+            latest_milk = instance.milk_records.order_by('-date').first()
+            latest_milk_date = latest_milk.date if latest_milk else None
+            latest_milk_amount = latest_milk.total_amount if latest_milk else None
+            expected_milk_amount = latest_milk.expected_amount if latest_milk else None
+            current_lactation = instance.lactations.filter(end_date__isnull=True).first()
+            lactation_number = current_lactation.lactation_number if current_lactation else None
+            lactation_start_date = current_lactation.start_date if current_lactation else None
+        
         # Add latest milk production data if available
-        latest_milk = instance.milk_records.order_by('-date').first()
-        if latest_milk:
-            representation['latest_milk_date'] = latest_milk.date
-            representation['latest_milk_amount'] = latest_milk.total_amount
-            representation['expected_milk_amount'] = latest_milk.expected_amount
+        if latest_milk_date:
+            representation['latest_milk_date'] = latest_milk_date
+            representation['latest_milk_amount'] = latest_milk_amount
+            representation['expected_milk_amount'] = expected_milk_amount
             
             # Add variance if expected amount is available
-            if latest_milk.expected_amount:
-                representation['milk_variance_percent'] = latest_milk.production_variance
+            if expected_milk_amount:
+                representation['milk_variance_percent'] = (
+                    (latest_milk_amount - expected_milk_amount) / expected_milk_amount
+                ) * 100
         
         # Add current lactation data if available
-        current_lactation = instance.lactations.filter(end_date__isnull=True).first()
-        if current_lactation:
-            representation['current_lactation_number'] = current_lactation.lactation_number
-            representation['lactation_start_date'] = current_lactation.start_date
-            representation['days_in_lactation'] = (latest_milk.date - current_lactation.start_date).days if latest_milk else None
+        if lactation_start_date:
+            representation['current_lactation_number'] = lactation_number
+            representation['lactation_start_date'] = lactation_start_date
+            representation['days_in_lactation'] = (latest_milk_date - lactation_start_date).days if latest_milk_date else None
         
         return representation
 
@@ -65,7 +84,11 @@ class MilkProductionSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'expected_amount', 'expected_next_week',
             'expected_next_month', 'production_variance_percent'
         ]
-        read_only_fields = ['id', 'total_amount', 'created_at', 'updated_at']
+        # The expected amounts are forecast by ezdairy.forecasting
+        read_only_fields = [
+            'id', 'total_amount', 'created_at', 'updated_at',
+            'expected_amount', 'expected_next_week', 'expected_next_month'
+        ]
     
     def get_production_variance_percent(self, obj):
         """Get the variance between actual and expected production as a percentage."""
@@ -80,6 +103,157 @@ class MilkProductionSerializer(serializers.ModelSerializer):
         return data
 
 
+class MilkProductionBulkListSerializer(serializers.ListSerializer):
+    """
+    List serializer for recording a whole milking session at once.
+    Invalid rows are collected in row_errors instead of failing the batch.
+    """
+    
+    def to_internal_value(self, data):
+        """Validate each row and keep the ones that can be written."""
+        if not isinstance(data, list):
+            raise serializers.ValidationError(_("Expected a list of milk records."))
+        if not data:
+            raise serializers.ValidationError(_("No milk records were provided."))
+        
+        self.row_errors = []
+        rows = []
+        for index, item in enumerate(data):
+            try:
+                rows.append((index, self.child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                self.row_errors.append({'index': index, 'errors': exc.detail})
+        
+        # Check access to every referenced animal with a single query
+        animal_ids = {row['animal_id'] for index, row in rows}
+        self.animal_owners = dict(self.context['animals'].filter(pk__in=animal_ids).values_list('pk', 'owner_id'))
+        
+        valid_rows = []
+        seen = set()
+        for index, row in rows:
+            key = (row['animal_id'], row['date'])
+            if row['animal_id'] not in self.animal_owners:
+                self.row_errors.append({'index': index, 'errors': {'animal': [_("Invalid animal.")]}})
+            elif key in seen:
+                self.row_errors.append({'index': index, 'errors': {'non_field_errors': [_("Duplicate animal and date in this batch.")]}})
+            else:
+                seen.add(key)
+                valid_rows.append(row)
+        self.row_errors.sort(key=lambda error: error['index'])
+        return valid_rows
+    
+    def create(self, validated_data):
+        """Insert or replace the records for each (animal, date) in one transaction."""
+        records = [MilkProduction(**row) for row in validated_data]
+        # bulk_create() bypasses MilkProduction.save(), so fill the total here
+        for record in records:
+            record.total_amount = record.morning_amount + record.evening_amount
+        
+        with transaction.atomic():
+            records = MilkProduction.objects.bulk_create(
+                records,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['animal', 'date'],
+                update_fields=[
+                    'time_of_day', 'morning_amount', 'evening_amount', 'total_amount',
+                    'fat_content', 'protein_content', 'notes', 'recorded_by', 'updated_at'
+                ],
+            )
+            # bulk_create() sends no signals, so refresh the dashboard totals,
+            # lactation rollups and forecasts here
+            refresh_milk_derived({(record.animal_id, record.date) for record in records}, self.animal_owners)
+        return records
+
+
+class MilkProductionBulkSerializer(serializers.ModelSerializer):
+    """Serializer for a single row of a bulk milk recording request."""
+    animal = serializers.IntegerField(source='animal_id')
+    
+    class Meta:
+        model = MilkProduction
+        fields = [
+            'animal', 'date', 'time_of_day', 'morning_amount', 'evening_amount',
+            'fat_content', 'protein_content', 'notes'
+        ]
+        extra_kwargs = {
+            'morning_amount': {'min_value': 0},
+            'evening_amount': {'min_value': 0},
+        }
+        # Existing (animal, date) rows are replaced, so skip the per-row unique check
+        validators = []
+        list_serializer_class = MilkProductionBulkListSerializer
+
+
+class MilkSessionListSerializer(serializers.ListSerializer):
+    """
+    List serializer for the yields of one parlour milking session.
+    Invalid rows are collected in row_errors instead of failing the batch.
+    """
+    
+    def to_internal_value(self, data):
+        """Validate each row, resolve its tag and keep the ones that can be written."""
+        if not isinstance(data, list):
+            raise serializers.ValidationError(_("Expected a list of session yields."))
+        if not data:
+            raise serializers.ValidationError(_("No session yields were provided."))
+        
+        self.row_errors = []
+        rows = []
+        for index, item in enumerate(data):
+            try:
+                rows.append((index, self.child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                self.row_errors.append({'index': index, 'errors': exc.detail})
+        
+        tags = get_dairy_tags(self.context['owner_id'], {row['tag_number'] for index, row in rows})
+        self.animal_owners = dict(tags.values())
+        
+        valid_rows = []
+        seen = set()
+        for index, row in rows:
+            tag_number = row.pop('tag_number')
+            if tag_number not in tags:
+                self.row_errors.append({'index': index, 'errors': {'tag_number': [_("Unknown tag number.")]}})
+                continue
+            row['animal_id'] = tags[tag_number][0]
+            key = (row['animal_id'], row['date'])
+            if key in seen:
+                self.row_errors.append({'index': index, 'errors': {'non_field_errors': [_("Duplicate animal and date in this batch.")]}})
+            else:
+                seen.add(key)
+                valid_rows.append(row)
+        self.row_errors.sort(key=lambda error: error['index'])
+        return valid_rows
+    
+    def create(self, validated_data):
+        """Merge the yields into the session's column of each (animal, date) record."""
+        return merge_session(self.context['session'], validated_data, self.animal_owners)
+
+
+class MilkSessionSerializer(serializers.Serializer):
+    """
+    Serializer for one cow's yield in a parlour meter export. Rows take the
+    request's default date when they carry none.
+    """
+    tag_number = serializers.CharField(max_length=50)
+    amount = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0)
+    date = serializers.DateField(required=False, input_formats=['iso-8601', '%d/%m/%Y'])
+    fat_content = serializers.DecimalField(max_digits=4, decimal_places=2, min_value=0, required=False, allow_null=True)
+    protein_content = serializers.DecimalField(max_digits=4, decimal_places=2, min_value=0, required=False, allow_null=True)
+    
+    class Meta:
+        list_serializer_class = MilkSessionListSerializer
+    
+    def validate(self, data):
+        """Fill in the default date."""
+        if 'date' not in data:
+            if self.context.get('date') is None:
+                raise serializers.ValidationError({'date': [_("This field is required.")]})
+            data['date'] = self.context['date']
+        return data
+
+
 class LactationSerializer(serializers.ModelSerializer):
     """Serializer for the Lactation model."""
     animal_tag = serializers.ReadOnlyField(source='animal.tag_number')
@@ -96,7 +270,8 @@ class LactationSerializer(serializers.ModelSerializer):
             'expected_total_production', 'expected_peak_production', 
             'expected_duration_days', 'production_variance_percent'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        # Totals and peaks are maintained from the milk records
+        read_only_fields = ['id', 'created_at', 'updated_at', 'total_production', 'peak_production', 'peak_date']
     
     def get_duration_days(self, obj):
         """Get the duration of the lactation in days."""
@@ -1,3 +1,538 @@
+import csv
+import math
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest.mock import patch
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from openpyxl import load_workbook
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ezanimal.models import AnimalType, Breed
+from ezcore.reference import get_breed_averages
+from ezdairy.forecasting import forecast_milk
+from ezdairy.models import DairyAnimal, MilkProduction, Lactation
+from ezdairy.views import MilkProductionPagination
+from user.models import User
+
+
+class DairyAnimalListTests(TestCase):
+    """Tests for the dairy animal list endpoint."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.animal_type = AnimalType.objects.create(name='Cow', farming_type='dairy')
+        cls.breed = Breed.objects.create(animal_type=cls.animal_type, name='Holstein')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def create_animal(self, tag_number):
+        animal = DairyAnimal.objects.create(
+            tag_number=tag_number, animal_type=self.animal_type, breed=self.breed, owner=self.owner
+        )
+        MilkProduction.objects.create(animal=animal, date=date(2025, 1, 1), morning_amount=Decimal('5'), evening_amount=Decimal('4'))
+        record = MilkProduction.objects.create(
+            animal=animal, date=date(2025, 1, 2), morning_amount=Decimal('6'), evening_amount=Decimal('4'),
+        )
+        Lactation.objects.create(animal=animal, lactation_number=1, start_date=date(2024, 1, 1), end_date=date(2024, 10, 1))
+        Lactation.objects.create(animal=animal, lactation_number=2, start_date=date(2024, 12, 1))
+        # Overwrite the forecast with a round figure, bypassing the signals
+        MilkProduction.objects.filter(pk=record.pk).update(expected_amount=Decimal('8'))
+        return animal
+
+    def test_list_includes_latest_milk_and_lactation(self):
+        self.create_animal('D-1')
+        response = self.client.get(reverse('dairy-animal-list'))
+        self.assertEqual(response.status_code, 200)
+        row = response.data['results'][0]
+        self.assertEqual(row['latest_milk_date'], date(2025, 1, 2))
+        self.assertEqual(row['latest_milk_amount'], Decimal('10'))
+        self.assertEqual(row['expected_milk_amount'], Decimal('8'))
+        self.assertEqual(row['milk_variance_percent'], Decimal('25'))
+        self.assertEqual(row['current_lactation_number'], 2)
+        self.assertEqual(row['days_in_lactation'], 32)
+        self.assertEqual(row['breed_name'], 'Holstein')
+
+    def test_list_query_count_does_not_grow_with_herd(self):
+        for index in range(5):
+            self.create_animal(f'D-{index}')
+        # One COUNT for pagination and one SELECT for the page.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('dairy-animal-list'))
+        self.assertEqual(response.data['count'], 5)
+
+
+class MilkProductionBulkTests(TestCase):
+    """Tests for the bulk milk recording endpoint."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.other_owner = User.objects.create_user(email='other@example.com', password='pass', first_name='Other')
+        animal_type = AnimalType.objects.create(name='Cow', farming_type='dairy')
+        breed = Breed.objects.create(animal_type=animal_type, name='Holstein')
+        cls.animals = [
+            DairyAnimal.objects.create(tag_number=f'D-{index}', animal_type=animal_type, breed=breed, owner=cls.owner)
+            for index in range(3)
+        ]
+        cls.foreign_animal = DairyAnimal.objects.create(
+            tag_number='X-1', animal_type=animal_type, breed=breed, owner=cls.other_owner
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = reverse('milk-production-bulk')
+        # As in a running process, the breed averages are already loaded
+        get_breed_averages()
+
+    def test_bulk_creates_and_replaces_records(self):
+        MilkProduction.objects.create(animal=self.animals[0], date=date(2025, 3, 1), morning_amount=Decimal('1'))
+        rows = [
+            {'animal': animal.pk, 'date': '2025-03-01', 'morning_amount': '6.5', 'evening_amount': '5.5'}
+            for animal in self.animals
+        ]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'saved': 3, 'errors': []})
+        self.assertEqual(MilkProduction.objects.count(), 3)
+        record = MilkProduction.objects.get(animal=self.animals[0], date=date(2025, 3, 1))
+        self.assertEqual(record.total_amount, Decimal('12'))
+        self.assertEqual(record.recorded_by, self.owner)
+
+    def test_bulk_reports_row_errors_without_aborting(self):
+        rows = [
+            {'animal': self.animals[0].pk, 'date': '2025-03-01', 'morning_amount': '4'},
+            {'animal': self.animals[1].pk, 'date': '2025-03-01', 'morning_amount': '-1'},
+            {'animal': self.foreign_animal.pk, 'date': '2025-03-01', 'morning_amount': '4'},
+            {'animal': self.animals[0].pk, 'date': '2025-03-01', 'morning_amount': '5'},
+        ]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['saved'], 1)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2, 3])
+        self.assertIn('morning_amount', response.data['errors'][0]['errors'])
+        self.assertIn('animal', response.data['errors'][1]['errors'])
+        self.assertFalse(MilkProduction.objects.filter(animal=self.foreign_animal).exists())
+
+    def test_bulk_query_count_does_not_grow_with_rows(self):
+        rows = [
+            {'animal': animal.pk, 'date': f'2025-03-{day:02d}', 'morning_amount': '5', 'evening_amount': '5'}
+            for animal in self.animals for day in range(1, 21)
+        ]
+        # Animal access check, then SAVEPOINT, INSERT, dashboard refresh
+        # (aggregate and upsert), lactation rollup UPDATE, forecast reads
+        # (animals, lactations and records; nothing changes without a
+        # lactation or breed average), profitability UPDATE and RELEASE.
+        with self.assertNumQueries(11):
+            response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.data['saved'], 60)
+
+
+class MilkSessionTests(TestCase):
+    """Tests for merging parlour meter sessions into milk records."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.other_owner = User.objects.create_user(email='other@example.com', password='pass', first_name='Other')
+        cls.animal_type = AnimalType.objects.create(name='Cow', farming_type='dairy')
+        cls.breed = Breed.objects.create(animal_type=cls.animal_type, name='Holstein')
+        cls.animals = [
+            DairyAnimal.objects.create(tag_number=f'D-{index}', animal_type=cls.animal_type, breed=cls.breed, owner=cls.owner)
+            for index in range(3)
+        ]
+        DairyAnimal.objects.create(tag_number='X-1', animal_type=cls.animal_type, breed=cls.breed, owner=cls.other_owner)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = reverse('milk-production-session')
+        # As in a running process, the breed averages are already loaded
+        get_breed_averages()
+
+    def post_session(self, session, rows, **params):
+        return self.client.post(f'{self.url}?{urlencode({"session": session, **params})}', rows, format='json')
+
+    def test_sessions_merge_into_one_record(self):
+        rows = [{'tag_number': animal.tag_number, 'amount': '6.5', 'date': '2025-03-01'} for animal in self.animals]
+        response = self.post_session('morning', rows)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'saved': 3, 'errors': []})
+        record = MilkProduction.objects.get(animal=self.animals[0])
+        self.assertEqual((record.time_of_day, record.morning_amount, record.total_amount), ('morning', Decimal('6.5'), Decimal('6.5')))
+
+        body = 'Tag Number,Amount,Fat Content\nD-0,5.25,4.1\nD-1,5,\n'
+        response = self.client.post(f'{self.url}?session=evening&date=2025-03-01', body, content_type='text/csv')
+        self.assertEqual(response.data, {'saved': 2, 'errors': []})
+        self.assertEqual(MilkProduction.objects.count(), 3)
+        record.refresh_from_db()
+        self.assertEqual(record.time_of_day, 'both')
+        self.assertEqual((record.morning_amount, record.evening_amount), (Decimal('6.5'), Decimal('5.25')))
+        self.assertEqual((record.total_amount, record.fat_content), (Decimal('11.75'), Decimal('4.1')))
+        self.assertEqual(record.recorded_by, self.owner)
+
+        # Re-importing the morning session replaces only the morning amount
+        self.post_session('morning', rows[:1], date='2025-03-01')
+        record.refresh_from_db()
+        self.assertEqual((record.morning_amount, record.total_amount), (Decimal('6.5'), Decimal('11.75')))
+        self.assertEqual(MilkProduction.objects.get(animal=self.animals[2]).total_amount, Decimal('6.5'))
+
+    def test_session_reports_row_errors(self):
+        rows = [
+            {'tag_number': 'D-0', 'amount': '4'},
+            {'tag_number': 'X-1', 'amount': '4'},
+            {'tag_number': 'D-1', 'amount': '-1'},
+            {'tag_number': 'D-0', 'amount': '5'},
+        ]
+        response = self.post_session('evening', rows, date='2025-03-01')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2, 3])
+        self.assertIn('tag_number', response.data['errors'][0]['errors'])
+        self.assertEqual(self.post_session('noon', rows).status_code, 400)
+
+    def test_tag_map_is_cached_until_animals_change(self):
+        rows = [{'tag_number': animal.tag_number, 'amount': '5'} for animal in self.animals]
+        self.post_session('morning', rows, date='2025-03-01')
+        # Upsert, dashboard refresh (aggregate and upsert), lactation rollup
+        # UPDATE, forecast reads (animals, lactations and records),
+        # profitability UPDATE and the savepoint pair; the tags come from the cache
+        with self.assertNumQueries(10):
+            self.post_session('evening', rows, date='2025-03-01')
+
+        new_animal = DairyAnimal.objects.create(tag_number='D-9', animal_type=self.animal_type, breed=self.breed, owner=self.owner)
+        response = self.post_session('morning', [{'tag_number': 'D-9', 'amount': '7'}], date='2025-03-01')
+        self.assertEqual(response.data['saved'], 1)
+        self.assertTrue(new_animal.milk_records.exists())
+
+    def test_ingest_parlour_command_streams_batches(self):
+        source = StringIO('tag_number,amount\n' + ''.join(f'D-{index % 3},{index}\n' for index in range(3)) + 'Z-1,4\n')
+        output = StringIO()
+        with patch('sys.stdin', source):
+            call_command('ingest_parlour', '-', session='evening', date='2025-03-02', batch_size=2, stdout=output, stderr=StringIO())
+        self.assertIn('Merged 3 evening yields', output.getvalue())
+        self.assertIn('rejected 1', output.getvalue())
+        self.assertEqual(MilkProduction.objects.get(animal=self.animals[2]).evening_amount, Decimal('2'))
+
+
+class MilkProductionExportTests(TestCase):
+    """Tests for exporting milk records as CSV and XLSX."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        other_owner = User.objects.create_user(email='other@example.com', password='pass', first_name='Other')
+        animal_type = AnimalType.objects.create(name='Cow', farming_type='dairy')
+        breed = Breed.objects.create(animal_type=animal_type, name='Holstein')
+        cls.animal = DairyAnimal.objects.create(tag_number='D-1', animal_type=animal_type, breed=breed, owner=cls.owner)
+        other_animal = DairyAnimal.objects.create(tag_number='D-2', animal_type=animal_type, breed=breed, owner=cls.owner)
+        foreign_animal = DairyAnimal.objects.create(tag_number='X-1', animal_type=animal_type, breed=breed, owner=other_owner)
+        for day in range(1, 26):
+            for animal in (cls.animal, other_animal, foreign_animal):
+                MilkProduction.objects.create(animal=animal, date=date(2025, 1, day), morning_amount=Decimal(day))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_csv_export_streams_every_filtered_row(self):
+        response = self.client.get(
+            reverse('milk-production-list'), {'format': 'csv', 'animal': self.animal.pk, 'ordering': 'date'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="milk-production.csv"')
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 25)
+        self.assertEqual({row['animal_tag'] for row in rows}, {'D-1'})
+        self.assertEqual([row['total_amount'] for row in rows[:2]], ['1.00', '2.00'])
+
+    def test_xlsx_export_writes_numbers(self):
+        response = self.client.get(reverse('milk-production-list'), {'format': 'xlsx', 'search': 'D-'})
+        self.assertEqual(response.status_code, 200)
+        sheet = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        rows = list(sheet.values)
+        self.assertEqual(len(rows), 51)
+        total_column = rows[0].index('total_amount')
+        self.assertEqual(rows[1][total_column], 25)
+
+    def test_animal_export_rows_line_up_with_the_header(self):
+        # Animals with milk records get extra latest_milk_* keys in the API
+        response = self.client.get(reverse('dairy-animal-list'), {'format': 'csv'})
+        header, *rows = csv.reader(StringIO(b''.join(response.streaming_content).decode()))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({len(row) for row in rows}, {len(header)})
+        self.assertEqual({row[header.index('tag_number')] for row in rows}, {'D-1', 'D-2'})
+
+    def test_json_list_is_still_paginated(self):
+        response = self.client.get(reverse('milk-production-list'))
+        self.assertEqual(response.data['count'], 50)
+        self.assertEqual(len(response.data['results']), 10)
+
+
+class MilkProductionPaginationTests(TestCase):
+    """Tests for keyset pagination of milk records."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        animal_type = AnimalType.objects.create(name='Cow', farming_type='dairy')
+        breed = Breed.objects.create(animal_type=animal_type, name='Holstein')
+        animals = [
+            DairyAnimal.objects.create(tag_number=f'D-{index}', animal_type=animal_type, breed=breed, owner=cls.owner)
+            for index in range(3)
+        ]
+        # Several records share each date, so pages split within a day
+        for day in range(1, 11):
+            for animal in animals:
+                MilkProduction.objects.create(animal=animal, date=date(2025, 1, day), morning_amount=Decimal(day))
+        cls.expected = list(MilkProduction.objects.order_by('-date', '-id').values_list('pk', flat=True))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def walk(self, url, params=None, link='next'):
+        seen, pages = [], []
+        response = self.client.get(url, params)
+        while True:
+            pages.append(response.data)
+            seen.extend(row['id'] for row in response.data['results'])
+            if not response.data[link]:
+                return seen, pages
+            response = self.client.get(response.data[link])
+
+    def test_pages_follow_date_and_id_without_gaps(self):
+        seen, pages = self.walk(reverse('milk-production-list'), {'page_size': 7})
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(page['results']) for page in pages], [7, 7, 7, 7, 2])
+        self.assertEqual(pages[0]['count'], 30)
+        self.assertIsNone(pages[0]['previous'])
+
+        # Walking back from the last page returns the same rows
+        back, back_pages = self.walk(pages[-1]['previous'], link='previous')
+        self.assertEqual([row for page in reversed(back_pages) for row in page['results']], [
+            row for page in pages[:-1] for row in page['results']
+        ])
+
+    def test_ascending_order_and_skipped_count(self):
+        seen, pages = self.walk(reverse('milk-production-list'), {'page_size': 8, 'ordering': 'date', 'count': 'false'})
+        self.assertEqual(seen, list(reversed(self.expected)))
+        self.assertNotIn('count', pages[0])
+
+    def test_deep_page_is_one_query_without_count(self):
+        response = self.client.get(reverse('milk-production-list'), {'page_size': 25})
+        with self.assertNumQueries(1):
+            response = self.client.get(response.data['next'] + '&count=false')
+        self.assertEqual([row['id'] for row in response.data['results']], self.expected[25:])
+        self.assertIsNone(response.data['next'])
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(reverse('milk-production-list'), {'page_size': 100000})
+        self.assertEqual(len(response.data['results']), 30)
+        self.assertEqual(MilkProductionPagination.max_page_size, 500)
+
+    def test_other_orderings_use_page_numbers(self):
+        response = self.client.get(reverse('milk-production-list'), {'ordering': '-total_amount', 'page': 2})
+        self.assertEqual(response.data['count'], 30)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIn('page=3', response.data['next'])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse('milk-production-list'), {'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 404)
+
+
+class MilkForecastTests(TestCase):
+    """Tests for the lactation curve forecasts of milk records."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        animal_type = AnimalType.objects.create(name='Cow', farming_type='dairy')
+        cls.breed = Breed.objects.create(animal_type=animal_type, name='Holstein', average_milk_production=Decimal('20'))
+        cls.animal = DairyAnimal.objects.create(
+            tag_number='D-1', animal_type=animal_type, breed=cls.breed, owner=cls.owner
+        )
+        Lactation.objects.create(animal=cls.animal, lactation_number=1, start_date=date(2025, 1, 1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    @staticmethod
+    def wood(day):
+        return 15 * day ** 0.25 * math.exp(-0.005 * day)
+
+    def create_records(self, days):
+        # Committed together, so the lactation is refitted once
+        with self.captureOnCommitCallbacks(execute=True):
+            for day in days:
+                MilkProduction.objects.create(
+                    animal=self.animal, date=date(2025, 1, 1) + timedelta(days=day - 1),
+                    morning_amount=Decimal(f'{self.wood(day):.2f}'),
+                )
+
+    def test_fitted_curve_follows_the_lactation(self):
+        self.create_records(range(1, 61, 3))
+        record = MilkProduction.objects.get(animal=self.animal, date=date(2025, 2, 27))
+        self.assertAlmostEqual(float(record.expected_amount), self.wood(58), delta=0.05)
+        self.assertAlmostEqual(float(record.expected_next_week), self.wood(65), delta=0.05)
+        self.assertAlmostEqual(float(record.expected_next_month), self.wood(88), delta=0.1)
+
+    def test_few_records_fall_back_to_the_breed_average(self):
+        self.create_records([10, 11])
+        # The default curve averages the breed's 20 liters over 305 days
+        expected = [float(value) for value in MilkProduction.objects.order_by('date').values_list('expected_amount', flat=True)]
+        mean_shape = sum(day ** 0.2 * math.exp(-0.004 * day) for day in range(1, 306)) / 305
+        self.assertAlmostEqual(expected[0], 20 / mean_shape * 10 ** 0.2 * math.exp(-0.04), delta=0.01)
+        self.assertGreater(expected[1], expected[0])
+
+    def test_record_before_any_lactation_expects_the_animal_average(self):
+        self.animal.breed_avg_milk_production = Decimal('25')
+        self.animal.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            record = MilkProduction.objects.create(animal=self.animal, date=date(2024, 12, 1), morning_amount=Decimal('5'))
+        record.refresh_from_db()
+        self.assertEqual(record.expected_amount, Decimal('25'))
+        self.assertEqual(record.expected_next_month, Decimal('25'))
+
+    def test_api_and_bulk_records_get_forecasts(self):
+        self.create_records(range(1, 30))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('milk-production-list'), {
+                'animal': self.animal.pk, 'date': '2025-02-10', 'morning_amount': f'{self.wood(41):.2f}', 'expected_amount': '1',
+            })
+        self.assertEqual(response.status_code, 201)
+        record = MilkProduction.objects.get(animal=self.animal, date=date(2025, 2, 10))
+        self.assertAlmostEqual(float(record.expected_amount), self.wood(41), delta=0.05)
+
+        MilkProduction.objects.update(expected_amount=None)
+        self.client.post(reverse('milk-production-bulk'), [
+            {'animal': self.animal.pk, 'date': '2025-02-11', 'morning_amount': '20'},
+        ], format='json')
+        self.assertFalse(MilkProduction.objects.filter(date__gte=date(2025, 1, 1), expected_amount__isnull=True).exists())
+
+    def test_records_saved_together_share_one_refit(self):
+        # INSERT, lactation rollup UPDATE, profitability UPDATE and the
+        # dashboard aggregate and upsert; the refit waits for the commit
+        with self.assertNumQueries(5):
+            MilkProduction.objects.create(animal=self.animal, date=date(2025, 1, 1), morning_amount=Decimal('10'))
+        # Then a single refit at the commit: the animal, lactation and record
+        # reads and the forecast UPDATE in a savepoint
+        with self.assertNumQueries(5 * 10 + 6):
+            self.create_records(range(2, 12))
+        self.assertFalse(MilkProduction.objects.filter(expected_amount__isnull=True).exists())
+
+    def test_refit_only_touches_changed_records(self):
+        self.create_records(range(1, 30))
+        self.assertEqual(forecast_milk(), 0)
+        MilkProduction.objects.filter(date=date(2025, 1, 5)).update(expected_amount=Decimal('0'))
+        self.assertEqual(forecast_milk([self.animal.pk], since=date(2025, 1, 20)), 1)
+
+
+class LactationRollupTests(TestCase):
+    """Tests for the lactation totals and peaks maintained from milk records."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        animal_type = AnimalType.objects.create(name='Cow', farming_type='dairy')
+        breed = Breed.objects.create(animal_type=animal_type, name='Holstein')
+        cls.animal = DairyAnimal.objects.create(tag_number='D-1', animal_type=animal_type, breed=breed, owner=cls.owner)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.first = Lactation.objects.create(
+            animal=self.animal, lactation_number=1, start_date=date(2024, 1, 1), end_date=date(2024, 10, 31)
+        )
+        self.second = Lactation.objects.create(animal=self.animal, lactation_number=2, start_date=date(2025, 1, 1))
+
+    def record(self, day, amount):
+        return MilkProduction.objects.create(animal=self.animal, date=day, morning_amount=Decimal(amount))
+
+    def assertRollup(self, lactation, total, peak, peak_date):
+        lactation.refresh_from_db()
+        self.assertEqual(
+            (lactation.total_production, lactation.peak_production, lactation.peak_date),
+            (Decimal(total), None if peak is None else Decimal(peak), peak_date),
+        )
+
+    def test_new_records_add_to_their_lactation(self):
+        self.record(date(2025, 1, 5), '10')
+        self.record(date(2025, 1, 6), '14')
+        self.record(date(2025, 1, 7), '12')
+        self.record(date(2024, 12, 1), '50')  # Dry period, outside both windows
+        self.assertRollup(self.second, '36', '14', date(2025, 1, 6))
+        self.assertRollup(self.first, '0', None, None)
+
+    def test_int_and_float_amounts(self):
+        MilkProduction.objects.create(animal=self.animal, date=date(2025, 1, 5))
+        MilkProduction.objects.create(animal=self.animal, date=date(2025, 1, 6), morning_amount=5.5, evening_amount=2)
+        self.assertRollup(self.second, '7.5', '7.5', date(2025, 1, 6))
+
+    def test_new_record_is_a_single_update(self):
+        with self.assertNumQueries(1):
+            Lactation.objects.filter(animal=self.animal).add_milk(date(2025, 1, 5), Decimal('10'), Decimal('10'))
+        self.assertRollup(self.second, '10', '10', date(2025, 1, 5))
+
+    def test_editing_the_peak_down_recomputes_it(self):
+        self.record(date(2025, 1, 5), '10')
+        peak = self.record(date(2025, 1, 6), '14')
+        peak.morning_amount = Decimal('8')
+        peak.save()
+        self.assertRollup(self.second, '18', '10', date(2025, 1, 5))
+
+        peak.morning_amount = Decimal('11')
+        peak.save()
+        self.assertRollup(self.second, '21', '11', date(2025, 1, 6))
+
+    def test_moving_and_deleting_records(self):
+        self.record(date(2025, 1, 5), '10')
+        moved = self.record(date(2025, 1, 6), '14')
+        moved.date = date(2024, 6, 1)
+        moved.save()
+        self.assertRollup(self.second, '10', '10', date(2025, 1, 5))
+        self.assertRollup(self.first, '14', '14', date(2024, 6, 1))
+
+        moved.delete()
+        self.assertRollup(self.first, '0', None, None)
+
+    def test_changing_the_window_recomputes_the_lactation(self):
+        self.record(date(2024, 11, 15), '9')
+        self.first.end_date = date(2024, 11, 30)
+        self.first.save()
+        self.assertEqual(self.first.total_production, Decimal('9'))
+        self.assertEqual(self.first.peak_date, date(2024, 11, 15))
+
+    def test_api_ignores_rollup_input(self):
+        response = self.client.post(reverse('lactation-list'), {
+            'animal': self.animal.pk, 'lactation_number': 3, 'start_date': '2026-01-01', 'total_production': '999',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['total_production'], '0.00')
+
+    def test_bulk_records_and_recompute_command(self):
+        self.client.post(reverse('milk-production-bulk'), [
+            {'animal': self.animal.pk, 'date': f'2025-01-{day:02d}', 'morning_amount': str(day)} for day in range(1, 11)
+        ], format='json')
+        self.assertRollup(self.second, '55', '10', date(2025, 1, 10))
+
+        Lactation.objects.update(total_production=None, peak_production=None, peak_date=None)
+        with self.assertNumQueries(1):
+            Lactation.objects.recompute()
+        self.assertRollup(self.second, '55', '10', date(2025, 1, 10))
 
-# Create your tests here.
+        Lactation.objects.update(total_production=None)
+        call_command('recompute_lactations', owner=self.owner.pk, stdout=StringIO())
+        self.assertRollup(self.second, '55', '10', date(2025, 1, 10))
@@ -1,37 +1,35 @@
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions, filters, serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from ezdairy.models import DairyAnimal, MilkProduction, Lactation
-from .serializers import DairyAnimalSerializer, MilkProductionSerializer, LactationSerializer
-from ezcore.permissions import IsOwnerOrEmployee, HasFarmAccess
+from .serializers import (
+    DairyAnimalSerializer, MilkProductionSerializer, MilkProductionBulkSerializer, MilkSessionSerializer,
+    LactationSerializer
+)
+from ezdairy.recording import SESSION_FIELDS
+from ezcore.permissions import IsOwnerOrEmployee, HasFarmAccess, has_capability
+from ezcore.mixins import ExportMixin, FarmScopedQuerySetMixin
+from ezcore.pagination import KeysetPagination
+from ezcore.parsers import CSVParser, read_csv_rows
 from django.http import HttpResponse
+from django.utils.translation import gettext_lazy as _
 
 
 
 
-class DairyAnimalViewSet(viewsets.ModelViewSet):
+class DairyAnimalViewSet(ExportMixin, FarmScopedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and editing dairy animals."""
+    queryset = DairyAnimal.objects.with_production_summary()
     serializer_class = DairyAnimalSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['animal_type', 'breed', 'status', 'is_active', 'gender']
     search_fields = ['tag_number', 'name']
     ordering_fields = ['tag_number', 'name', 'date_of_birth', 'acquisition_date']
-    
-    def get_queryset(self):
-        """
-        This view should return a list of all dairy animals
-        for the currently authenticated user.
-        """
-        user = self.request.user
-        if user.is_staff:
-            return DairyAnimal.objects.all()
-        elif user.is_farm_owner:
-            return DairyAnimal.objects.filter(owner=user)
-        elif user.employer:
-            # Employees can see their employer's animals if they have permission
-            if user.can_manage_animals:
-                return DairyAnimal.objects.filter(owner=user.employer)
-            return DairyAnimal.objects.none()
-        return DairyAnimal.objects.none()
+    owner_field = 'owner_id'
+    capability = 'animals'
     
     def get_permissions(self):
         """
@@ -51,30 +49,22 @@ class DairyAnimalViewSet(viewsets.ModelViewSet):
             serializer.save(owner=self.request.user.employer)
 
 
-class MilkProductionViewSet(viewsets.ModelViewSet):
+class MilkProductionPagination(KeysetPagination):
+    """Keyset pagination for milk records."""
+    max_page_size = 500
+
+
+class MilkProductionViewSet(ExportMixin, FarmScopedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and editing milk production records."""
+    queryset = MilkProduction.objects.all()
     serializer_class = MilkProductionSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['animal', 'date']
     search_fields = ['animal__tag_number', 'animal__name']
     ordering_fields = ['date', 'animal__tag_number', 'morning_amount', 'evening_amount', 'total_amount']
-    
-    def get_queryset(self):
-        """
-        This view should return a list of all milk production records
-        for the currently authenticated user's animals.
-        """
-        user = self.request.user
-        if user.is_staff:
-            return MilkProduction.objects.all()
-        elif user.is_farm_owner:
-            return MilkProduction.objects.filter(animal__owner=user)
-        elif user.employer:
-            # Employees can see their employer's records if they have permission
-            if user.can_manage_animals:
-                return MilkProduction.objects.filter(animal__owner=user.employer)
-            return MilkProduction.objects.none()
-        return MilkProduction.objects.none()
+    pagination_class = MilkProductionPagination
+    owner_field = 'animal__owner_id'
+    capability = 'animals'
     
     def get_permissions(self):
         """
@@ -87,32 +77,82 @@ class MilkProductionViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         serializer.save(recorded_by=self.request.user)
+    
+    def get_animal_queryset(self):
+        """Return the dairy animals the current user may record milk for."""
+        return self.filter_by_farm(DairyAnimal.objects.all(), 'owner_id')
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Record a whole milking session in one request.
+        Rows for an existing (animal, date) replace that record, and invalid
+        rows are reported by index without aborting the rest of the batch.
+        """
+        context = self.get_serializer_context()
+        context['animals'] = self.get_animal_queryset()
+        serializer = MilkProductionBulkSerializer(data=request.data, many=True, context=context)
+        serializer.is_valid(raise_exception=True)
+        records = serializer.save(recorded_by=request.user) if serializer.validated_data else []
+        return Response(
+            {'saved': len(records), 'errors': serializer.row_errors},
+            status=status.HTTP_201_CREATED if records else status.HTTP_400_BAD_REQUEST
+        )
+    
+    def get_session_owner_id(self):
+        """
+        Return the owner whose tags a parlour session is matched against,
+        or None for staff, who may record for any farm.
+        """
+        user = self.request.user
+        if user.is_staff:
+            return None
+        farm_owner_id = self.get_farm_owner_id()
+        if farm_owner_id is None or not has_capability(self.request, self.capability):
+            raise PermissionDenied(_("You may not record milk for this farm."))
+        return farm_owner_id
+    
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, CSVParser, MultiPartParser])
+    def session(self, request):
+        """
+        Record a parlour meter export of one milking session, given by
+        ?session=morning or evening, as a JSON list, a text/csv body or an
+        uploaded file with tag_number and amount columns. Yields are merged
+        into that session's amount of each (animal, date) record, keeping
+        the other session's amount.
+        """
+        session = request.query_params.get('session')
+        if session not in SESSION_FIELDS:
+            raise serializers.ValidationError({'session': [_("Session must be morning or evening.")]})
+        data = request.data
+        if 'file' in request.FILES:
+            data = read_csv_rows(request.FILES['file'].read())
+        context = self.get_serializer_context()
+        context['session'] = session
+        context['owner_id'] = self.get_session_owner_id()
+        if request.query_params.get('date'):
+            context['date'] = serializers.DateField(input_formats=['iso-8601', '%d/%m/%Y']).run_validation(
+                request.query_params['date']
+            )
+        serializer = MilkSessionSerializer(data=data, many=True, context=context)
+        serializer.is_valid(raise_exception=True)
+        saved = serializer.save(recorded_by=request.user) if serializer.validated_data else 0
+        return Response(
+            {'saved': saved, 'errors': serializer.row_errors},
+            status=status.HTTP_201_CREATED if saved else status.HTTP_400_BAD_REQUEST
+        )
 
 
-class LactationViewSet(viewsets.ModelViewSet):
+class LactationViewSet(ExportMixin, FarmScopedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and editing lactation records."""
+    queryset = Lactation.objects.all()
     serializer_class = LactationSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['animal', 'lactation_number']
     search_fields = ['animal__tag_number', 'animal__name']
     ordering_fields = ['animal__tag_number', 'lactation_number', 'start_date', 'end_date']
-    
-    def get_queryset(self):
-        """
-        This view should return a list of all lactation records
-        for the currently authenticated user's animals.
-        """
-        user = self.request.user
-        if user.is_staff:
-            return Lactation.objects.all()
-        elif user.is_farm_owner:
-            return Lactation.objects.filter(animal__owner=user)
-        elif user.employer:
-            # Employees can see their employer's records if they have permission
-            if user.can_manage_animals:
-                return Lactation.objects.filter(animal__owner=user.employer)
-            return Lactation.objects.none()
-        return Lactation.objects.none()
+    owner_field = 'animal__owner_id'
+    capability = 'animals'
     
     def get_permissions(self):
         """
@@ -17,7 +17,7 @@ class MeatAnimalAdmin(admin.ModelAdmin):
             'fields': ('gender', 'date_of_birth', 'mother', 'father_tag', 'status', 'notes')
         }),
         (_('Weight Information'), {
-            'fields': ('acquisition_weight', 'current_weight', 'target_weight')
+            'fields': ('acquisition_weight', 'current_weight', 'target_weight', 'expected_ready_date')
         }),
         (_('Acquisition Info'), {
             'fields': ('acquisition_date', 'acquisition_price')
@@ -26,7 +26,7 @@ class MeatAnimalAdmin(admin.ModelAdmin):
             'fields': ('breed_avg_daily_gain', 'breed_avg_finishing_weight', 'breed_avg_days_to_finish')
         }),
     )
-    readonly_fields = ('current_weight',)
+    readonly_fields = ('current_weight', 'expected_ready_date')
     raw_id_fields = ('mother', 'owner')
 
 
@@ -47,6 +47,7 @@ class WeightRecordAdmin(admin.ModelAdmin):
             'fields': ('notes',)
         }),
     )
+    readonly_fields = ('expected_weight', 'expected_next_week', 'expected_next_month', 'expected_daily_gain')
     raw_id_fields = ('animal', 'recorded_by')
     
     def weight_variance(self, obj):
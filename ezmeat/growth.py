@@ -0,0 +1,180 @@
+import math
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+from ezcore.db import update_rows
+from ezcore.reference import get_breed_averages
+from ezmeat.models import MeatAnimal, WeightRecord
+
+# Linear-plateau growth: weight rises at a steady daily gain until the
+# breed's finishing weight. Each animal's gain is fitted from its weigh-ins
+# and shrunk towards the breed's gain, the prior counting as much as two
+# weigh-ins a month apart.
+PRIOR_STRENGTH = 450.0
+DAYS_PER_MONTH = 30
+FORECAST_FIELDS = ('expected_weight', 'expected_next_week', 'expected_next_month', 'expected_daily_gain')
+FORECAST_OFFSETS = (0, 7, 30)
+MAX_WEIGHT = 9999.99
+MAX_GAIN = 99.99
+
+
+def fit_growth(groups, days, weights, prior_gains, group_count):
+    """
+    Fit a line to every group's weigh-ins at once.
+
+    groups, days and weights are parallel arrays with one entry per record.
+    prior_gains holds each group's breed daily gain, or nan without one.
+    Return (intercept, gain) arrays with one entry per group; both are nan
+    where a group has no prior and too few distinct days to fit a slope.
+    """
+    count = np.bincount(groups, minlength=group_count).astype(float)
+    sum_days = np.bincount(groups, weights=days, minlength=group_count)
+    sum_weights = np.bincount(groups, weights=weights, minlength=group_count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_days = sum_days / count
+        mean_weights = sum_weights / count
+    centered_days = days - mean_days[groups]
+    spread = np.bincount(groups, weights=centered_days ** 2, minlength=group_count)
+    covariance = np.bincount(groups, weights=centered_days * (weights - mean_weights[groups]), minlength=group_count)
+
+    has_prior = ~np.isnan(prior_gains)
+    strength = np.where(has_prior, PRIOR_STRENGTH, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        gain = (covariance + strength * np.nan_to_num(prior_gains)) / (spread + strength)
+    gain[(spread <= 0) & ~has_prior] = np.nan
+    return mean_weights - gain * mean_days, gain
+
+
+def project_growth(groups, days, intercept, gain, plateau):
+    """
+    Return the expected weight of each record on its own day and 7 and 30
+    days later, and the expected daily gain on its day, as an array of
+    shape (records, 4).
+    """
+    forecasts = np.empty((len(groups), len(FORECAST_FIELDS)))
+    for column, offset in enumerate(FORECAST_OFFSETS):
+        forecasts[:, column] = np.minimum(intercept[groups] + gain[groups] * (days + offset), plateau[groups])
+    forecasts[:, -1] = np.where(forecasts[:, 0] < plateau[groups], gain[groups], 0)
+    forecasts[:, :-1] = np.clip(forecasts[:, :-1], 0, MAX_WEIGHT)
+    forecasts[:, -1] = np.clip(forecasts[:, -1], -MAX_GAIN, MAX_GAIN)
+    return np.round(forecasts, 2)
+
+
+def ready_days(latest_weights, targets, gain, plateau):
+    """
+    Return the days after each animal's latest weigh-in until it reaches its
+    target weight, or nan when the fitted growth never gets there.
+    """
+    remaining = np.maximum(targets - latest_weights, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        days = np.ceil(remaining / gain)
+    days[remaining == 0] = 0
+    days[(remaining > 0) & ~(gain > 0)] = np.nan
+    days[targets > plateau] = np.nan
+    return days
+
+
+def to_float(values):
+    """Convert a column of decimals to floats, with nan for None."""
+    return np.array([float('nan') if value is None else float(value) for value in values], dtype=float)
+
+
+def forecast_growth(animal_ids=None):
+    """
+    Fit the growth of the given meat animals, or the whole herd, and store
+    the expected weights and gain on their weight records and the date
+    they are expected to reach target_weight on the animal.
+
+    Animals without their own breed averages also get them filled in from
+    Breed.growth_rate and Breed.average_weight. Return the number of
+    weight records whose forecasts changed.
+    """
+    animals = MeatAnimal.objects.order_by('pk')
+    records = WeightRecord.objects.order_by('animal_id', 'date')
+    if animal_ids is not None:
+        animals = animals.filter(pk__in=animal_ids)
+        records = records.filter(animal_id__in=animal_ids)
+
+    animal_rows = list(animals.values_list(
+        'pk', 'target_weight', 'breed_avg_daily_gain', 'breed_avg_finishing_weight',
+        'breed_avg_days_to_finish', 'expected_ready_date', 'breed_id',
+    ))
+    if not animal_rows:
+        return 0
+    (animal_pks, targets, own_gains, own_finishing, own_days, stored_ready,
+     breed_ids) = (list(column) for column in zip(*animal_rows))
+    breed_averages = get_breed_averages(breed_ids)
+    breed_growth = [breed_averages[breed_id].growth_rate for breed_id in breed_ids]
+    breed_weights = [breed_averages[breed_id].average_weight for breed_id in breed_ids]
+    animal_pks = np.array(animal_pks, dtype=np.int64)
+    breed_gains = to_float(breed_growth) / DAYS_PER_MONTH
+    breed_weights = to_float(breed_weights)
+    prior_gains = np.where(np.isnan(to_float(own_gains)), breed_gains, to_float(own_gains))
+    finishing = np.where(np.isnan(to_float(own_finishing)), breed_weights, to_float(own_finishing))
+
+    rows = list(records.values_list('pk', 'animal_id', 'date', 'weight', *FORECAST_FIELDS))
+    ready = np.full(len(animal_pks), np.nan)
+    if rows:
+        pks, record_animals, dates, weights, *stored = (list(column) for column in zip(*rows))
+        groups = np.searchsorted(animal_pks, np.array(record_animals, dtype=np.int64))
+        days = np.array([day.toordinal() for day in dates], dtype=float)
+        weights = np.array(weights, dtype=float)
+
+        # Count days from each animal's first weigh-in to keep the fit well conditioned
+        first_days = np.full(len(animal_pks), np.inf)
+        np.minimum.at(first_days, groups, days)
+        days -= first_days[groups]
+
+        intercept, gain = fit_growth(groups, days, weights, prior_gains, len(animal_pks))
+        # An animal already heavier than its breed finishes at its own weight
+        heaviest = np.zeros(len(animal_pks))
+        np.maximum.at(heaviest, groups, weights)
+        plateau = np.where(np.isnan(finishing), np.inf, np.maximum(finishing, heaviest))
+        forecasts = project_growth(groups, days, intercept, gain, plateau)
+
+        # Records are ordered by date, so the last one of each animal is its latest
+        latest = np.flatnonzero(np.append(groups[1:] != groups[:-1], True))
+        latest_groups = groups[latest]
+        ready[latest_groups] = days[latest] + first_days[latest_groups] + ready_days(
+            weights[latest], to_float(targets)[latest_groups], gain[latest_groups], plateau[latest_groups]
+        )
+
+        stored = np.column_stack([to_float(column) for column in stored])
+        missing = np.isnan(forecasts)
+        changed = ((np.abs(forecasts - stored) >= 0.005) | (np.isnan(stored) != missing)).any(axis=1)
+        record_updates = [
+            [None if missing[index, column] else Decimal(f'{forecasts[index, column]:.2f}') for column in range(len(FORECAST_FIELDS))]
+            + [pks[index]]
+            for index in np.flatnonzero(changed)
+        ]
+    else:
+        record_updates = []
+
+    # Fill the breed averages the animals do not set themselves
+    defaults = {
+        'breed_avg_daily_gain': [None if math.isnan(value) else Decimal(f'{min(value, MAX_GAIN):.2f}') for value in breed_gains],
+        'breed_avg_finishing_weight': [None if math.isnan(value) else Decimal(f'{value:.2f}') for value in breed_weights],
+        'breed_avg_days_to_finish': [
+            None if math.isnan(value) or not gain_value > 0 else math.ceil(value / gain_value)
+            for value, gain_value in zip(breed_weights, breed_gains)
+        ],
+    }
+    ready_dates = [None if math.isnan(value) else date.fromordinal(int(value)) for value in ready]
+    animal_updates = []
+    for index, pk in enumerate(animal_pks):
+        row = [ready_dates[index]] + [
+            values[index] if current[index] is None else current[index]
+            for values, current in zip(defaults.values(), (own_gains, own_finishing, own_days))
+        ]
+        if row != [stored_ready[index], own_gains[index], own_finishing[index], own_days[index]]:
+            animal_updates.append(row + [int(pk)])
+
+    if record_updates or animal_updates:
+        with transaction.atomic():
+            update_rows(WeightRecord, FORECAST_FIELDS, record_updates)
+            update_rows(MeatAnimal, ('expected_ready_date', *defaults), animal_updates)
+    return len(record_updates)
+
@@ -0,0 +1,40 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from ezmeat.growth import fit_growth, project_growth, ready_days
+
+
+class Command(BaseCommand):
+    help = 'Time the vectorised growth fit and ready-date projection on a synthetic herd'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--animals', type=int, default=50000, help='Number of animals to fit')
+        parser.add_argument('--weigh-ins', type=int, default=12, help='Weight records per animal')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs')
+
+    def handle(self, *args, **options):
+        animals, weigh_ins = options['animals'], options['weigh_ins']
+        rng = np.random.default_rng(0)
+        groups = np.repeat(np.arange(animals), weigh_ins)
+        days = np.tile(np.arange(weigh_ins) * 14.0, animals)
+        gains = rng.uniform(0.6, 1.4, animals)
+        weights = rng.uniform(150, 250, animals)[groups] + gains[groups] * days + rng.normal(0, 3, len(groups))
+        prior_gains = np.full(animals, 1.0)
+        plateau = np.full(animals, 650.0)
+        targets = np.full(animals, 550.0)
+        latest = np.arange(1, animals + 1) * weigh_ins - 1
+
+        timings = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            intercept, gain = fit_growth(groups, days, weights, prior_gains, animals)
+            project_growth(groups, days, intercept, gain, plateau)
+            ready_days(weights[latest], targets, gain, plateau)
+            timings.append(time.perf_counter() - start)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{animals} animals, {len(groups)} records: best {min(timings) * 1000:.0f} ms, '
+            f'mean {sum(timings) / len(timings) * 1000:.0f} ms, median gain error {np.median(np.abs(gain - gains)):.3f} kg/day'
+        ))
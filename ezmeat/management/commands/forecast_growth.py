@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from ezmeat.growth import forecast_growth
+from ezmeat.models import MeatAnimal
+
+
+class Command(BaseCommand):
+    help = 'Refit the growth of the meat herd and store the expected weights and ready dates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', type=int, help='Only forecast the animals of this farm owner id')
+
+    def handle(self, *args, **options):
+        animal_ids = None
+        if options['owner']:
+            animal_ids = list(MeatAnimal.objects.filter(owner_id=options['owner']).values_list('pk', flat=True))
+
+        updated = forecast_growth(animal_ids)
+        self.stdout.write(self.style.SUCCESS(f'Updated the forecasts of {updated} weight records.'))
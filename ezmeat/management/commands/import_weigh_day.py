@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ezcore.parsers import read_csv_rows
+from ezmeat.models import MeatAnimal
+from ezmeat.serializers import WeightRecordBulkSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Import a scale export CSV of weigh-ins, matching animals by tag number'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with tag_number and weight columns, and optionally date and notes')
+        parser.add_argument('--owner', type=int, required=True, help='Farm owner id the animals belong to')
+        parser.add_argument('--date', help='Weigh date (YYYY-MM-DD) for rows without a date column')
+
+    def handle(self, *args, **options):
+        owner = User.objects.filter(pk=options['owner']).first()
+        if owner is None:
+            raise CommandError(f"No user with id {options['owner']}.")
+        context = {'animals': MeatAnimal.objects.filter(owner=owner)}
+        if options['date']:
+            try:
+                context['date'] = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--date must be in YYYY-MM-DD format.')
+
+        with open(options['path'], 'rb') as csv_file:
+            rows = read_csv_rows(csv_file.read())
+        serializer = WeightRecordBulkSerializer(data=rows, many=True, context=context)
+        if not serializer.is_valid():
+            raise CommandError(serializer.errors)
+        records = serializer.save(recorded_by=owner) if serializer.validated_data else []
+
+        for error in serializer.row_errors:
+            self.stderr.write(f"Row {error['index'] + 2}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(f'Imported {len(records)} weight records.'))
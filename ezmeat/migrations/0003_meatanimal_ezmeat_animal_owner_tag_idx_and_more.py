@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 14:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezanimal', '0002_animaltype_birth_date'),
+        ('ezmeat', '0002_alter_weightrecord_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='meatanimal',
+            index=models.Index(fields=['owner', 'tag_number'], name='ezmeat_animal_owner_tag_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meatanimal',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['owner', 'status'], name='ezmeat_animal_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weightrecord',
+            index=models.Index(fields=['-date'], name='ezmeat_weight_date_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 15:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ezanimal', '0002_animaltype_birth_date'),
+        ('ezmeat', '0003_meatanimal_ezmeat_animal_owner_tag_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meatanimal',
+            name='expected_ready_date',
+            field=models.DateField(blank=True, null=True, verbose_name='expected date to reach target weight'),
+        ),
+        migrations.AddIndex(
+            model_name='meatanimal',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['owner', 'expected_ready_date'], name='ezmeat_animal_ready_idx'),
+        ),
+    ]
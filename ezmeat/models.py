@@ -1,9 +1,38 @@
 from django.db import models
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from ezanimal.models import AnimalType, Breed
 from user.models import User
 
 
+class MeatAnimalQuerySet(models.QuerySet):
+    """Custom queryset for meat animals."""
+    
+    def with_weight_summary(self):
+        """
+        Annotate each animal with its latest weight record and the weight and
+        date of the record before it, so list views need no query per animal.
+        """
+        latest_weight = WeightRecord.objects.with_gain().filter(animal=OuterRef('pk')).order_by('-date')
+        return self.select_related('animal_type', 'breed', 'owner').annotate(
+            latest_weight_date=Subquery(latest_weight.values('date')[:1]),
+            latest_weight_value=Subquery(latest_weight.values('weight')[:1]),
+            latest_expected_weight=Subquery(latest_weight.values('expected_weight')[:1]),
+            latest_expected_daily_gain=Subquery(latest_weight.values('expected_daily_gain')[:1]),
+            latest_previous_weight=Subquery(latest_weight.values('previous_weight')[:1]),
+            latest_previous_date=Subquery(latest_weight.values('previous_date')[:1]),
+        )
+    
+    def refresh_current_weight(self):
+        """
+        Set current_weight from each animal's latest-dated weight record in
+        one UPDATE, falling back on acquisition_weight without any records.
+        """
+        latest_weight = WeightRecord.objects.filter(animal=OuterRef('pk')).order_by('-date')
+        return self.update(current_weight=Coalesce(Subquery(latest_weight.values('weight')[:1]), 'acquisition_weight'))
+
+
 class MeatAnimal(models.Model):
     """Model for meat animals."""
     
@@ -47,10 +76,20 @@ class MeatAnimal(models.Model):
     breed_avg_finishing_weight = models.DecimalField(_('breed average finishing weight (kg)'), max_digits=6, decimal_places=2, blank=True, null=True)
     breed_avg_days_to_finish = models.PositiveIntegerField(_('breed average days to finish'), blank=True, null=True)
     
+    # Projected by ezmeat.growth
+    expected_ready_date = models.DateField(_('expected date to reach target weight'), blank=True, null=True)
+    
+    objects = MeatAnimalQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('meat animal')
         verbose_name_plural = _('meat animals')
         ordering = ['tag_number']
+        indexes = [
+            models.Index(fields=['owner', 'tag_number'], name='ezmeat_animal_owner_tag_idx'),
+            models.Index(fields=['owner', 'status'], condition=Q(is_active=True), name='ezmeat_animal_active_idx'),
+            models.Index(fields=['owner', 'expected_ready_date'], condition=Q(is_active=True), name='ezmeat_animal_ready_idx'),
+        ]
     
     def __str__(self):
         return f"{self.tag_number} - {self.name or 'Unnamed'}"
@@ -75,6 +114,37 @@ class MeatAnimal(models.Model):
         return min(100, (actual_gain / total_gain_needed) * 100)
 
 
+def daily_gain_between(weight, date, previous_weight, previous_date):
+    """Calculate the daily gain between two weighings."""
+    if previous_weight is None or previous_date is None:
+        return None
+    days_difference = (date - previous_date).days
+    if days_difference <= 0:
+        return None
+    return (weight - previous_weight) / days_difference
+
+
+class WeightRecordQuerySet(models.QuerySet):
+    """Custom queryset for weight records."""
+    
+    def with_gain(self):
+        """
+        Annotate each record with the weight and date of the same animal's
+        previous record, so that daily gain for any number of records is
+        served by a single query.
+        
+        The previous record is looked up in the whole table, so it is found
+        even when the queryset's filters or pagination leave it out.
+        """
+        previous = WeightRecord.objects.filter(
+            animal_id=OuterRef('animal_id'), date__lt=OuterRef('date')
+        ).order_by('-date')
+        return self.annotate(
+            previous_weight=Subquery(previous.values('weight')[:1]),
+            previous_date=Subquery(previous.values('date')[:1]),
+        )
+
+
 class WeightRecord(models.Model):
     """Model for weight records."""
     
@@ -92,20 +162,38 @@ class WeightRecord(models.Model):
     expected_next_month = models.DecimalField(_('expected weight next month (kg)'), max_digits=6, decimal_places=2, blank=True, null=True)
     expected_daily_gain = models.DecimalField(_('expected daily gain (kg/day)'), max_digits=4, decimal_places=2, blank=True, null=True)
     
+    objects = WeightRecordQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('weight record')
         verbose_name_plural = _('weight records')
         ordering = ['-date']
         unique_together = ['animal', 'date']
+        # The unique (animal, date) index serves per-animal history and with_gain()
+        indexes = [
+            models.Index(fields=['-date'], name='ezmeat_weight_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.animal.tag_number} - {self.date} - {self.weight}kg"
     
     def save(self, *args, **kwargs):
-        # Update the current weight of the animal
         super().save(*args, **kwargs)
-        self.animal.current_weight = self.weight
-        self.animal.save(update_fields=['current_weight'])
+        self.refresh_animal_weight()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.refresh_animal_weight()
+        return result
+    
+    def refresh_animal_weight(self):
+        """
+        Set the animal's current weight from its latest-dated record, which
+        is not necessarily this one when an older weigh-in is entered late.
+        """
+        MeatAnimal.objects.filter(pk=self.animal_id).refresh_current_weight()
+        if WeightRecord.animal.is_cached(self):
+            self.animal.refresh_from_db(fields=['current_weight'])
     
     @property
     def weight_variance(self):
@@ -125,13 +213,14 @@ class WeightRecord(models.Model):
     @property
     def actual_daily_gain(self):
         """Calculate the actual daily gain since the previous record."""
+        # Records loaded through WeightRecordQuerySet.with_gain() already
+        # carry the previous weighing.
+        if hasattr(self, 'previous_weight'):
+            return daily_gain_between(self.weight, self.date, self.previous_weight, self.previous_date)
         prev = self.previous_record
         if not prev:
             return None
-        days_difference = (self.date - prev.date).days
-        if days_difference <= 0:
-            return None
-        return (self.weight - prev.weight) / days_difference
+        return daily_gain_between(self.weight, self.date, prev.weight, prev.date)
     
     @property
     def daily_gain_variance(self):
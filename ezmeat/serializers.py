@@ -1,6 +1,9 @@
 from rest_framework import serializers
-from ezmeat.models import MeatAnimal, WeightRecord, SlaughterRecord
+from django.db import transaction
+from ezmeat.models import MeatAnimal, WeightRecord, SlaughterRecord, daily_gain_between
 from ezanimal.serializers import AnimalTypeSerializer, BreedSerializer
+from ezcore.dashboard.models import FarmDailySummary, SUMMARY_SOURCES
+from ezmeat.growth import forecast_growth
 from django.utils.translation import gettext_lazy as _
 
 
@@ -23,9 +26,10 @@ class MeatAnimalSerializer(serializers.ModelSerializer):
             'acquisition_weight', 'current_weight', 'target_weight',
             'status', 'status_display', 'notes', 'is_active', 'owner', 'owner_name',
             'created_at', 'updated_at', 'age_in_days', 'weight_gain_progress_percent',
-            'breed_avg_daily_gain', 'breed_avg_finishing_weight', 'breed_avg_days_to_finish'
+            'breed_avg_daily_gain', 'breed_avg_finishing_weight', 'breed_avg_days_to_finish',
+            'expected_ready_date'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'current_weight']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'current_weight', 'expected_ready_date']
     
     def get_age_in_days(self, obj):
         """Get the age of the animal in days."""
@@ -39,30 +43,47 @@ class MeatAnimalSerializer(serializers.ModelSerializer):
         """Add additional calculated fields to the serialized representation."""
         representation = super().to_representation(instance)
         
+        # Use the annotations from MeatAnimalQuerySet.with_weight_summary()
+        # when present, otherwise load the latest record through with_gain().
+        if hasattr(instance, 'latest_weight_date'):
+            latest_date = instance.latest_weight_date
+            latest_weight = instance.latest_weight_value
+            expected_weight = instance.latest_expected_weight
+            expected_daily_gain = instance.latest_expected_daily_gain
+            actual_daily_gain = daily_gain_between(
+                latest_weight, latest_date, instance.latest_previous_weight, instance.latest_previous_date
+            ) if latest_date else None
+        else:
+            latest_record = instance.weight_records.with_gain().order_by('-date').first()
+            latest_date = latest_record.date if latest_record else None
+            latest_weight = latest_record.weight if latest_record else None
+            expected_weight = latest_record.expected_weight if latest_record else None
+            expected_daily_gain = latest_record.expected_daily_gain if latest_record else None
+            actual_daily_gain = latest_record.actual_daily_gain if latest_record else None
+        
         # Add latest weight record data if available
-        latest_weight = instance.weight_records.order_by('-date').first()
-        if latest_weight:
-            representation['latest_weight_date'] = latest_weight.date
-            representation['latest_weight'] = latest_weight.weight
-            representation['expected_weight'] = latest_weight.expected_weight
+        if latest_date:
+            representation['latest_weight_date'] = latest_date
+            representation['latest_weight'] = latest_weight
+            representation['expected_weight'] = expected_weight
             
             # Add variance if expected weight is available
-            if latest_weight.expected_weight:
-                representation['weight_variance_percent'] = latest_weight.weight_variance
+            if expected_weight:
+                representation['weight_variance_percent'] = ((latest_weight - expected_weight) / expected_weight) * 100
             
             # Add daily gain information if available
-            if latest_weight.actual_daily_gain:
-                representation['actual_daily_gain'] = latest_weight.actual_daily_gain
-                representation['expected_daily_gain'] = latest_weight.expected_daily_gain
+            if actual_daily_gain:
+                representation['actual_daily_gain'] = actual_daily_gain
+                representation['expected_daily_gain'] = expected_daily_gain
                 
-                if latest_weight.expected_daily_gain:
-                    representation['daily_gain_variance_percent'] = latest_weight.daily_gain_variance
+                if expected_daily_gain:
+                    representation['daily_gain_variance_percent'] = (
+                        (actual_daily_gain - expected_daily_gain) / expected_daily_gain
+                    ) * 100
         
-        # Calculate days to target weight based on current daily gain
-        if instance.current_weight and instance.target_weight and latest_weight and latest_weight.actual_daily_gain and latest_weight.actual_daily_gain > 0:
-            weight_to_gain = instance.target_weight - instance.current_weight
-            if weight_to_gain > 0:
-                representation['estimated_days_to_target'] = round(weight_to_gain / latest_weight.actual_daily_gain)
+        # Days from the latest weigh-in to the date projected by ezmeat.growth
+        if latest_date and instance.expected_ready_date and instance.expected_ready_date > latest_date:
+            representation['estimated_days_to_target'] = (instance.expected_ready_date - latest_date).days
         
         return representation
 
@@ -85,7 +106,11 @@ class WeightRecordSerializer(serializers.ModelSerializer):
             'expected_daily_gain', 'weight_variance_percent', 'actual_daily_gain',
             'daily_gain_variance_percent'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        # The expected weights and gain are forecast by ezmeat.growth
+        read_only_fields = [
+            'id', 'created_at', 'updated_at',
+            'expected_weight', 'expected_next_week', 'expected_next_month', 'expected_daily_gain'
+        ]
     
     def get_weight_variance_percent(self, obj):
         """Get the variance between actual and expected weight as a percentage."""
@@ -106,6 +131,114 @@ class WeightRecordSerializer(serializers.ModelSerializer):
         return data
 
 
+class WeightRecordBulkListSerializer(serializers.ListSerializer):
+    """
+    List serializer for recording a whole weigh day at once.
+    Invalid rows are collected in row_errors instead of failing the batch.
+    """
+    
+    def to_internal_value(self, data):
+        """Validate each row and keep the ones that can be written."""
+        if not isinstance(data, list):
+            raise serializers.ValidationError(_("Expected a list of weight records."))
+        if not data:
+            raise serializers.ValidationError(_("No weight records were provided."))
+        
+        self.row_errors = []
+        rows = []
+        for index, item in enumerate(data):
+            try:
+                rows.append((index, self.child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                self.row_errors.append({'index': index, 'errors': exc.detail})
+        
+        # Check access to every referenced animal, and resolve scale tags, with one query each
+        animals = self.context['animals']
+        animal_ids = {row['animal_id'] for index, row in rows if 'animal_id' in row}
+        tags = {row['tag_number'] for index, row in rows if 'animal_id' not in row}
+        self.animal_owners = dict(animals.filter(pk__in=animal_ids).values_list('pk', 'owner_id'))
+        tag_animals = {}
+        for pk, tag_number, owner_id in animals.filter(tag_number__in=tags).values_list('pk', 'tag_number', 'owner_id'):
+            tag_animals[tag_number] = pk
+            self.animal_owners[pk] = owner_id
+        
+        valid_rows = []
+        seen = set()
+        for index, row in rows:
+            if 'animal_id' not in row:
+                tag_number = row.pop('tag_number')
+                if tag_number not in tag_animals:
+                    self.row_errors.append({'index': index, 'errors': {'tag_number': [_("Unknown tag number.")]}})
+                    continue
+                row['animal_id'] = tag_animals[tag_number]
+            row.pop('tag_number', None)
+            key = (row['animal_id'], row['date'])
+            if row['animal_id'] not in self.animal_owners:
+                self.row_errors.append({'index': index, 'errors': {'animal': [_("Invalid animal.")]}})
+            elif key in seen:
+                self.row_errors.append({'index': index, 'errors': {'non_field_errors': [_("Duplicate animal and date in this batch.")]}})
+            else:
+                seen.add(key)
+                valid_rows.append(row)
+        self.row_errors.sort(key=lambda error: error['index'])
+        return valid_rows
+    
+    def create(self, validated_data):
+        """
+        Insert or replace the records for each (animal, date) and set the
+        animals' current weights with a single UPDATE, in one transaction.
+        """
+        with transaction.atomic():
+            records = WeightRecord.objects.bulk_create(
+                [WeightRecord(**row) for row in validated_data],
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['animal', 'date'],
+                update_fields=['weight', 'notes', 'recorded_by', 'updated_at'],
+            )
+            # bulk_create() bypasses WeightRecord.save() and sends no signals, so
+            # refresh the current weights, dashboard totals and forecasts here
+            animal_ids = {record.animal_id for record in records}
+            MeatAnimal.objects.filter(pk__in=animal_ids).refresh_current_weight()
+            source = SUMMARY_SOURCES[WeightRecord]
+            keys = {(self.animal_owners[record.animal_id], record.date) for record in records}
+            FarmDailySummary.objects.refresh(
+                source, {affected for key in keys for affected in source.get_affected_keys(key)}
+            )
+            forecast_growth(animal_ids)
+        return records
+
+
+class WeightRecordBulkSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a single row of a bulk weigh-in request. Rows from a
+    scale export may give the animal's tag_number instead of its id, and
+    take the request's default date when they carry none.
+    """
+    animal = serializers.IntegerField(source='animal_id', required=False)
+    tag_number = serializers.CharField(required=False)
+    date = serializers.DateField(required=False, input_formats=['iso-8601', '%d/%m/%Y'])
+    
+    class Meta:
+        model = WeightRecord
+        fields = ['animal', 'tag_number', 'date', 'weight', 'notes']
+        # Existing (animal, date) rows are replaced, so skip the per-row unique check
+        validators = []
+        list_serializer_class = WeightRecordBulkListSerializer
+    
+    def validate(self, data):
+        """Require an animal or tag, a date and a positive weight."""
+        if 'animal_id' not in data and not data.get('tag_number'):
+            raise serializers.ValidationError({'animal': [_("An animal or tag number is required.")]})
+        if 'date' not in data:
+            if self.context.get('date') is None:
+                raise serializers.ValidationError({'date': [_("This field is required.")]})
+            data['date'] = self.context['date']
+        if data['weight'] <= 0:
+            raise serializers.ValidationError({'weight': [_("Weight must be positive.")]})
+        return data
+
+
 class SlaughterRecordSerializer(serializers.ModelSerializer):
     """Serializer for the SlaughterRecord model."""
     animal_tag = serializers.ReadOnlyField(source='animal.tag_number')
@@ -151,3 +284,15 @@ class SlaughterRecordSerializer(serializers.ModelSerializer):
         if 'live_weight' in data and 'carcass_weight' in data and data['carcass_weight'] > data['live_weight']:
             raise serializers.ValidationError(_("Carcass weight cannot be greater than live weight."))
         return data
+
+
+class ReadyForecastSerializer(serializers.ModelSerializer):
+    """Serializer for animals in the ready-for-market forecast."""
+    breed_name = serializers.ReadOnlyField(source='breed.name')
+    
+    class Meta:
+        model = MeatAnimal
+        fields = [
+            'id', 'tag_number', 'name', 'breed', 'breed_name', 'status',
+            'current_weight', 'target_weight', 'expected_ready_date'
+        ]
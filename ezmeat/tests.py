@@ -1,3 +1,265 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ezanimal.models import AnimalType, Breed
+from ezcore.reference import get_breed_averages
+from ezmeat.models import MeatAnimal, WeightRecord
+from user.models import User
+
+
+class WeightGainTests(TestCase):
+    """Tests for the set-based weight gain annotations."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.animal_type = AnimalType.objects.create(name='Goat', farming_type='meat')
+        cls.breed = Breed.objects.create(animal_type=cls.animal_type, name='Boer')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def create_animal(self, tag_number, weights):
+        animal = MeatAnimal.objects.create(
+            tag_number=tag_number, animal_type=self.animal_type, breed=self.breed,
+            gender='male', target_weight=Decimal('60'), owner=self.owner
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for day, weight in weights:
+                WeightRecord.objects.create(animal=animal, date=date(2025, 1, day), weight=Decimal(weight))
+        return animal
+
+    def test_with_gain_annotates_previous_record(self):
+        animal = self.create_animal('M-1', [(1, '20'), (11, '25'), (21, '27')])
+        self.create_animal('M-2', [(5, '40')])
+        records = {record.date.day: record for record in WeightRecord.objects.filter(animal=animal).with_gain()}
+        self.assertIsNone(records[1].previous_weight)
+        self.assertEqual(records[11].previous_weight, Decimal('20'))
+        self.assertEqual(records[21].previous_date, date(2025, 1, 11))
+        with self.assertNumQueries(0):
+            self.assertEqual(records[11].actual_daily_gain, Decimal('0.5'))
+            self.assertEqual(records[21].actual_daily_gain, Decimal('0.2'))
+
+    def test_weight_record_list_query_count_does_not_grow_with_history(self):
+        animal = self.create_animal('M-1', [(day, str(20 + day)) for day in range(1, 9)])
+        # Filter choice lookup, pagination COUNT and one SELECT for the page.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('weight-record-list'), {'animal': animal.pk})
+        gains = [row['actual_daily_gain'] for row in response.data['results']]
+        self.assertEqual(gains[:-1], [Decimal('1')] * 7)
+        self.assertIsNone(gains[-1])
+
+    def test_gain_survives_filters_and_pages(self):
+        animal = self.create_animal('M-1', [(1, '20'), (11, '25'), (21, '27')])
+        record = animal.weight_records.get(date=date(2025, 1, 21))
+        detail = self.client.get(reverse('weight-record-detail', args=[record.pk]))
+        self.assertEqual(detail.data['actual_daily_gain'], Decimal('0.2'))
+        filtered = self.client.get(reverse('weight-record-list'), {'date': '2025-01-21'})
+        self.assertEqual([row['actual_daily_gain'] for row in filtered.data['results']], [Decimal('0.2')])
+        first_page = self.client.get(reverse('weight-record-list'), {'ordering': 'date', 'page_size': 1})
+        second_page = self.client.get(first_page.data['next'])
+        self.assertEqual(second_page.data['results'][0]['actual_daily_gain'], Decimal('0.5'))
+
+    def test_meat_animal_list_uses_latest_gain(self):
+        for index in range(3):
+            self.create_animal(f'M-{index}', [(1, '20'), (11, '30')])
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('meat-animal-list'))
+        row = response.data['results'][0]
+        self.assertEqual(row['latest_weight'], Decimal('30'))
+        self.assertEqual(row['actual_daily_gain'], Decimal('1'))
+        self.assertEqual(row['estimated_days_to_target'], 30)
+
+
+class GrowthForecastTests(TestCase):
+    """Tests for the growth projections of meat animals."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.other_owner = User.objects.create_user(email='other@example.com', password='pass', first_name='Other')
+        cls.animal_type = AnimalType.objects.create(name='Steer', farming_type='meat')
+        cls.breed = Breed.objects.create(
+            animal_type=cls.animal_type, name='Angus', growth_rate=Decimal('30'), average_weight=Decimal('300')
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def create_animal(self, tag_number, weights, target='250', owner=None):
+        animal = MeatAnimal.objects.create(
+            tag_number=tag_number, animal_type=self.animal_type, breed=self.breed,
+            gender='male', target_weight=Decimal(target), owner=owner or self.owner
+        )
+        # Committed together, so the growth is refitted once
+        with self.captureOnCommitCallbacks(execute=True):
+            for day, weight in weights:
+                WeightRecord.objects.create(animal=animal, date=date(2025, 1, day), weight=Decimal(weight))
+        animal.refresh_from_db()
+        return animal
+
+    def test_steady_gain_projects_weights_and_ready_date(self):
+        animal = self.create_animal('M-1', [(1, '200'), (11, '220'), (21, '240')])
+        latest = animal.weight_records.get(date=date(2025, 1, 21))
+        # The 2 kg/day fitted gain is shrunk towards the breed's 1 kg/day
+        self.assertEqual(latest.expected_daily_gain, Decimal('1.31'))
+        self.assertEqual(latest.expected_next_week - latest.expected_weight, Decimal('9.15'))
+        # 10 kg short of the target at 1.31 kg/day
+        self.assertEqual(animal.expected_ready_date, date(2025, 1, 29))
+
+    def test_weigh_ins_saved_together_share_one_refit(self):
+        animal = self.create_animal('M-1', [])
+        # INSERT, the next weigh-in's date, the dashboard aggregate and
+        # upsert and the current weight UPDATE and read; the refit waits
+        # for the commit
+        with self.assertNumQueries(6):
+            WeightRecord.objects.create(animal=animal, date=date(2025, 1, 1), weight=Decimal('200'))
+        # Then a single refit at the commit: the animal and record reads and
+        # the forecast and ready date UPDATEs in a savepoint
+        with self.assertNumQueries(6 * 2 + 6), self.captureOnCommitCallbacks(execute=True):
+            for day, weight in [(11, '220'), (21, '240')]:
+                WeightRecord.objects.create(animal=animal, date=date(2025, 1, day), weight=Decimal(weight))
+        self.assertFalse(animal.weight_records.filter(expected_daily_gain__isnull=True).exists())
+
+    def test_single_weigh_in_follows_the_breed(self):
+        animal = self.create_animal('M-1', [(1, '200')])
+        record = animal.weight_records.get()
+        self.assertEqual(record.expected_daily_gain, Decimal('1'))
+        self.assertEqual(record.expected_next_month, Decimal('230'))
+        self.assertEqual(animal.expected_ready_date, date(2025, 2, 20))
+        self.assertEqual(animal.breed_avg_daily_gain, Decimal('1'))
+        self.assertEqual(animal.breed_avg_finishing_weight, Decimal('300'))
+        self.assertEqual(animal.breed_avg_days_to_finish, 300)
+
+    def test_growth_levels_off_at_the_finishing_weight(self):
+        animal = self.create_animal('M-1', [(1, '280'), (11, '290')], target='350')
+        record = animal.weight_records.get(date=date(2025, 1, 11))
+        self.assertEqual(record.expected_next_month, Decimal('300'))
+        self.assertIsNone(animal.expected_ready_date)
+
+        # Raising the animal's own finishing weight moves the plateau
+        animal.breed_avg_finishing_weight = Decimal('400')
+        animal.save()
+        self.assertIsNotNone(animal.expected_ready_date)
+
+    def test_ready_forecast_lists_animals_by_date(self):
+        soon = self.create_animal('M-1', [(1, '240'), (11, '245')])
+        later = self.create_animal('M-2', [(1, '100'), (11, '110')])
+        self.create_animal('X-1', [(1, '240'), (11, '245')], owner=self.other_owner)
+        sold = self.create_animal('M-3', [(1, '240'), (11, '245')])
+        sold.is_active = False
+        sold.save()
+
+        url = reverse('meat-animal-ready-forecast')
+        response = self.client.get(url, {'by': '2025-02-01'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['tag_number'] for row in response.data['results']], ['M-1'])
+        self.assertEqual(response.data['results'][0]['expected_ready_date'], soon.expected_ready_date.isoformat())
+
+        response = self.client.get(url, {'by': later.expected_ready_date.isoformat()})
+        self.assertEqual([row['tag_number'] for row in response.data['results']], ['M-1', 'M-2'])
+
+        self.assertEqual(self.client.get(url, {'by': 'soon'}).status_code, 400)
+
+
+class WeighDayTests(TestCase):
+    """Tests for bulk weigh-in recording and the current weight it maintains."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.other_owner = User.objects.create_user(email='other@example.com', password='pass', first_name='Other')
+        cls.animal_type = AnimalType.objects.create(name='Goat', farming_type='meat')
+        cls.breed = Breed.objects.create(animal_type=cls.animal_type, name='Boer')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = reverse('weight-record-bulk')
+        # As in a running process, the breed averages are already loaded
+        get_breed_averages()
+
+    def create_animal(self, tag_number, owner=None):
+        return MeatAnimal.objects.create(
+            tag_number=tag_number, animal_type=self.animal_type, breed=self.breed,
+            gender='male', owner=owner or self.owner
+        )
+
+    def test_current_weight_follows_the_latest_date(self):
+        animal = self.create_animal('M-1')
+        WeightRecord.objects.create(animal=animal, date=date(2025, 1, 11), weight=Decimal('30'))
+        # A weigh-in entered late for an earlier day leaves the current weight alone
+        record = WeightRecord.objects.create(animal=animal, date=date(2025, 1, 1), weight=Decimal('25'))
+        self.assertEqual(record.animal.current_weight, Decimal('30'))
+        animal.refresh_from_db()
+        self.assertEqual(animal.current_weight, Decimal('30'))
+
+        animal.weight_records.get(date=date(2025, 1, 11)).delete()
+        animal.refresh_from_db()
+        self.assertEqual(animal.current_weight, Decimal('25'))
+
+    def test_bulk_json_records_and_replaces(self):
+        first, second = self.create_animal('M-1'), self.create_animal('M-2')
+        WeightRecord.objects.create(animal=first, date=date(2025, 1, 1), weight=Decimal('20'))
+        response = self.client.post(self.url, [
+            {'animal': first.pk, 'date': '2025-01-01', 'weight': '21'},
+            {'animal': first.pk, 'date': '2024-12-01', 'weight': '18'},
+            {'animal': second.pk, 'date': '2025-01-01', 'weight': '35'},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'saved': 3, 'errors': []})
+        self.assertEqual(WeightRecord.objects.count(), 3)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.current_weight, Decimal('21'))
+        self.assertEqual(second.current_weight, Decimal('35'))
+
+    def test_bulk_csv_matches_tags_and_default_date(self):
+        animal = self.create_animal('M-1')
+        body = 'Tag Number,Weight,Notes\r\nM-1,31.5,\r\nM-9,40,lost tag\r\n\r\n'
+        response = self.client.post(f'{self.url}?date=2025-01-05', body, content_type='text/csv')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['saved'], 1)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertIn('tag_number', response.data['errors'][0]['errors'])
+        record = animal.weight_records.get()
+        self.assertEqual((record.date, record.weight, record.recorded_by), (date(2025, 1, 5), Decimal('31.5'), self.owner))
+
+    def test_bulk_file_upload(self):
+        animal = self.create_animal('M-1')
+        upload = SimpleUploadedFile('scale.csv', '﻿tag_number,date,weight\nM-1,05/01/2025,30\n'.encode('utf-8'))
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(animal.weight_records.get().date, date(2025, 1, 5))
+
+    def test_bulk_reports_invalid_rows(self):
+        animal = self.create_animal('M-1')
+        other = self.create_animal('X-1', owner=self.other_owner)
+        response = self.client.post(self.url, [
+            {'animal': animal.pk, 'date': '2025-01-01', 'weight': '0'},
+            {'animal': other.pk, 'date': '2025-01-01', 'weight': '30'},
+            {'tag_number': 'X-1', 'date': '2025-01-01', 'weight': '30'},
+            {'animal': animal.pk, 'weight': '30'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['saved'], 0)
+        self.assertEqual([error['index'] for error in response.data['errors']], [0, 1, 2, 3])
+        self.assertFalse(WeightRecord.objects.exists())
 
-# Create your tests here.
+    def test_bulk_query_count_does_not_grow_with_rows(self):
+        animals = [self.create_animal(f'M-{index}') for index in range(20)]
+        rows = [{'tag_number': animal.tag_number, 'weight': '30'} for animal in animals]
+        # Tag lookup, upsert, current weight UPDATE, dashboard refresh (next
+        # dates, totals, upsert), growth refit (animals, records, one
+        # executemany) and two savepoint pairs
+        with self.assertNumQueries(13):
+            response = self.client.post(f'{self.url}?date=2025-01-01', rows, format='json')
+        self.assertEqual(response.data['saved'], 20)
+        self.assertEqual(MeatAnimal.objects.filter(current_weight=Decimal('30')).count(), 20)
@@ -1,36 +1,32 @@
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions, filters, serializers, status
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.utils import timezone
 from ezmeat.models import MeatAnimal, WeightRecord, SlaughterRecord
-from .serializers import MeatAnimalSerializer, WeightRecordSerializer, SlaughterRecordSerializer
+from .serializers import (
+    MeatAnimalSerializer, ReadyForecastSerializer, WeightRecordSerializer, WeightRecordBulkSerializer,
+    SlaughterRecordSerializer
+)
 from ezcore.permissions import IsOwnerOrEmployee, HasFarmAccess
+from ezcore.mixins import ExportMixin, FarmScopedQuerySetMixin
+from ezcore.pagination import KeysetPagination
+from ezcore.parsers import CSVParser, read_csv_rows
 from django.http import HttpResponse
 
 
 
-class MeatAnimalViewSet(viewsets.ModelViewSet):
+class MeatAnimalViewSet(ExportMixin, FarmScopedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and editing meat animals."""
+    queryset = MeatAnimal.objects.with_weight_summary()
     serializer_class = MeatAnimalSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['animal_type', 'breed', 'status', 'is_active', 'gender']
     search_fields = ['tag_number', 'name']
     ordering_fields = ['tag_number', 'name', 'date_of_birth', 'acquisition_date', 'current_weight']
-    
-    def get_queryset(self):
-        """
-        This view should return a list of all meat animals
-        for the currently authenticated user.
-        """
-        user = self.request.user
-        if user.is_staff:
-            return MeatAnimal.objects.all()
-        elif user.is_farm_owner:
-            return MeatAnimal.objects.filter(owner=user)
-        elif user.employer:
-            # Employees can see their employer's animals if they have permission
-            if user.can_manage_animals:
-                return MeatAnimal.objects.filter(owner=user.employer)
-            return MeatAnimal.objects.none()
-        return MeatAnimal.objects.none()
+    owner_field = 'owner_id'
+    capability = 'animals'
     
     def get_permissions(self):
         """
@@ -48,32 +44,40 @@ class MeatAnimalViewSet(viewsets.ModelViewSet):
         # Employees create animals for their employer
         elif self.request.user.employer and self.request.user.can_manage_animals:
             serializer.save(owner=self.request.user.employer)
+    
+    @action(detail=False, methods=['get'], url_path='ready-forecast')
+    def ready_forecast(self, request):
+        """
+        List the active animals projected to reach their target weight by
+        ?by= (default today), soonest first. The projections are stored by
+        ezmeat.growth, so this is an indexed range scan however large the herd.
+        """
+        value = request.query_params.get('by')
+        by = serializers.DateField().run_validation(value) if value else timezone.localdate()
+        queryset = self.filter_by_farm(MeatAnimal.objects.select_related('breed')).filter(
+            is_active=True, expected_ready_date__lte=by
+        ).order_by('expected_ready_date', 'tag_number')
+        page = self.paginate_queryset(queryset)
+        serializer = ReadyForecastSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
 
+class WeightRecordPagination(KeysetPagination):
+    """Keyset pagination for weight records."""
+    max_page_size = 500
 
-class WeightRecordViewSet(viewsets.ModelViewSet):
+
+class WeightRecordViewSet(ExportMixin, FarmScopedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and editing weight records."""
+    queryset = WeightRecord.objects.with_gain()
     serializer_class = WeightRecordSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['animal', 'date']
     search_fields = ['animal__tag_number', 'animal__name']
     ordering_fields = ['date', 'animal__tag_number', 'weight']
-    
-    def get_queryset(self):
-        """
-        This view should return a list of all weight records
-        for the currently authenticated user's animals.
-        """
-        user = self.request.user
-        if user.is_staff:
-            return WeightRecord.objects.all()
-        elif user.is_farm_owner:
-            return WeightRecord.objects.filter(animal__owner=user)
-        elif user.employer:
-            # Employees can see their employer's records if they have permission
-            if user.can_manage_animals:
-                return WeightRecord.objects.filter(animal__owner=user.employer)
-            return WeightRecord.objects.none()
-        return WeightRecord.objects.none()
+    pagination_class = WeightRecordPagination
+    owner_field = 'animal__owner_id'
+    capability = 'animals'
     
     def get_permissions(self):
         """
@@ -86,32 +90,47 @@ class WeightRecordViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         serializer.save(recorded_by=self.request.user)
+    
+    def get_animal_queryset(self):
+        """Return the meat animals the current user may record weights for."""
+        return self.filter_by_farm(MeatAnimal.objects.all(), 'owner_id')
+    
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, CSVParser, MultiPartParser])
+    def bulk(self, request):
+        """
+        Record a whole weigh day in one request, as a JSON list, a text/csv
+        body or a scale export uploaded as file. Rows for an existing
+        (animal, date) replace that record, and invalid rows are reported
+        by index without aborting the rest of the batch.
+        """
+        data = request.data
+        if 'file' in request.FILES:
+            data = read_csv_rows(request.FILES['file'].read())
+        context = self.get_serializer_context()
+        context['animals'] = self.get_animal_queryset()
+        if request.query_params.get('date'):
+            context['date'] = serializers.DateField(input_formats=['iso-8601', '%d/%m/%Y']).run_validation(
+                request.query_params['date']
+            )
+        serializer = WeightRecordBulkSerializer(data=data, many=True, context=context)
+        serializer.is_valid(raise_exception=True)
+        records = serializer.save(recorded_by=request.user) if serializer.validated_data else []
+        return Response(
+            {'saved': len(records), 'errors': serializer.row_errors},
+            status=status.HTTP_201_CREATED if records else status.HTTP_400_BAD_REQUEST
+        )
 
 
-class SlaughterRecordViewSet(viewsets.ModelViewSet):
+class SlaughterRecordViewSet(ExportMixin, FarmScopedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and editing slaughter records."""
+    queryset = SlaughterRecord.objects.all()
     serializer_class = SlaughterRecordSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['animal', 'slaughter_date', 'quality_grade']
     search_fields = ['animal__tag_number', 'animal__name', 'slaughter_location', 'processor']
     ordering_fields = ['slaughter_date', 'animal__tag_number', 'live_weight', 'carcass_weight']
-    
-    def get_queryset(self):
-        """
-        This view should return a list of all slaughter records
-        for the currently authenticated user's animals.
-        """
-        user = self.request.user
-        if user.is_staff:
-            return SlaughterRecord.objects.all()
-        elif user.is_farm_owner:
-            return SlaughterRecord.objects.filter(animal__owner=user)
-        elif user.employer:
-            # Employees can see their employer's records if they have permission
-            if user.can_manage_animals:
-                return SlaughterRecord.objects.filter(animal__owner=user.employer)
-            return SlaughterRecord.objects.none()
-        return SlaughterRecord.objects.none()
+    owner_field = 'animal__owner_id'
+    capability = 'animals'
     
     def get_permissions(self):
         """
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import Role, User
+from .roles import to_names
 
 
 class UserAdmin(BaseUserAdmin):
@@ -13,10 +14,8 @@ class UserAdmin(BaseUserAdmin):
         (_('Personal info'), {'fields': ('first_name', 'last_name', 'preferred_language')}),
         (_('Farm info'), {'fields': ('farm_name', 'farm_location', 'farm_size', 'is_farm_owner')}),
         (_('Role and permissions'), {
-            'fields': ('role', 'employer', 'hire_date', 'job_title', 'contact_number',
-                      'can_manage_animals', 'can_manage_health', 'can_manage_feeding',
-                      'can_manage_inventory', 'can_manage_sales', 'can_manage_employees',
-                      'can_view_reports'),
+            'fields': ('role', 'custom_role', 'employer', 'hire_date', 'job_title', 'contact_number',
+                      'capability_names'),
         }),
         (_('Permissions'), {'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
         (_('Important dates'), {'fields': ('last_login', 'date_joined')}),
@@ -30,10 +29,22 @@ class UserAdmin(BaseUserAdmin):
     search_fields = ('email', 'first_name', 'last_name', 'farm_name')
     ordering = ('email',)
     filter_horizontal = ('groups', 'user_permissions')
+    readonly_fields = ('capability_names',)
+
+    @admin.display(description=_('capabilities'))
+    def capability_names(self, obj):
+        return ', '.join(to_names(obj.capabilities))
 
 
 admin.site.register(User, UserAdmin)
 
+
+@admin.register(Role)
+class RoleAdmin(admin.ModelAdmin):
+    """Admin for farm roles."""
+    list_display = ('name', 'owner', 'capabilities')
+    search_fields = ('name', 'owner__email')
+
 # class UserAdmin(BaseUserAdmin):
 #     model = User
 #     list_display = ('email', 'is_staff', 'is_superuser')
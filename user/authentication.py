@@ -0,0 +1,49 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import permissions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from user.models import TOKEN_USER_FIELDS, TokenUser
+from user.tokens import claims_are_current
+
+
+class FarmJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds the user of a read request from the
+    claims of its access token instead of querying the user row. Writes
+    and tokens without the claims load the user as usual. A token whose
+    claims no longer match its user is refused on every request.
+    """
+
+    def authenticate(self, request):
+        self.read_only = request.method in permissions.SAFE_METHODS
+        validated_token = get_header_token(request._request)
+        if validated_token is None:
+            # No token, or an invalid one the usual path reports
+            return super().authenticate(request)
+        return self.get_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        # Permission checks read the claims on writes too
+        if 'capabilities' in validated_token and not claims_are_current(validated_token):
+            raise InvalidToken(_('Token claims are no longer valid'))
+        if self.read_only and all(field in validated_token for field in TOKEN_USER_FIELDS if field != 'id'):
+            return TokenUser.from_token(validated_token)
+        return super().get_user(validated_token)
+
+
+def get_header_token(request):
+    """
+    Return the validated access token of a Django request's Authorization
+    header, or None, without touching the database. It is cached on the
+    request, so middleware can read claims before DRF authenticates.
+    """
+    if not hasattr(request, '_header_token'):
+        authentication = JWTAuthentication()
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header is not None else None
+        try:
+            request._header_token = authentication.get_validated_token(raw_token) if raw_token else None
+        except (InvalidToken, TokenError):
+            request._header_token = None
+    return request._header_token
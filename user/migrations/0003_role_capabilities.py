@@ -0,0 +1,91 @@
+# Generated by Django 5.2 on 2026-10-18 16:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Value
+
+# The capability bit of each old permission flag
+FLAG_BITS = {
+    'can_manage_animals': 1 << 0,
+    'can_manage_health': 1 << 1,
+    'can_manage_feeding': 1 << 2,
+    'can_manage_inventory': 1 << 3,
+    'can_manage_sales': 1 << 4,
+    'can_manage_employees': 1 << 5,
+    'can_view_reports': 1 << 6,
+}
+
+
+def flags_to_capabilities(apps, schema_editor):
+    """Fold the permission flags of every user into the capabilities bitmask."""
+    User = apps.get_model('user', 'User')
+    for flag, bit in FLAG_BITS.items():
+        User.objects.filter(**{flag: True}).update(capabilities=models.F('capabilities') + Value(bit))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_alter_user_last_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='capabilities',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='capabilities'),
+        ),
+        migrations.CreateModel(
+            name='Role',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='name')),
+                ('capabilities', models.PositiveIntegerField(default=0, verbose_name='capabilities')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='roles', to=settings.AUTH_USER_MODEL, verbose_name='owner')),
+            ],
+            options={
+                'verbose_name': 'role',
+                'verbose_name_plural': 'roles',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='custom_role',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='users', to='user.role', verbose_name='custom role'),
+        ),
+        migrations.RunPython(flags_to_capabilities, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='user',
+            name='can_manage_animals',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='can_manage_employees',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='can_manage_feeding',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='can_manage_health',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='can_manage_inventory',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='can_manage_sales',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='can_view_reports',
+        ),
+        migrations.AddConstraint(
+            model_name='role',
+            constraint=models.UniqueConstraint(fields=('owner', 'name'), name='user_role_owner_name_uniq'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 16:41
+
+import user.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0003_role_capabilities'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenUser',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('user.user',),
+            managers=[
+                ('objects', user.models.UserManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+# Farm workers manage animals and feeding, as they did before the bitmask
+WORKER_CAPABILITIES = (1 << 0) | (1 << 2)
+
+
+def restore_worker_capabilities(apps, schema_editor):
+    """Give workers without a farm role of their own back feeding instead of inventory."""
+    User = apps.get_model('user', 'User')
+    User.objects.filter(role='worker', custom_role__isnull=True).update(capabilities=WORKER_CAPABILITIES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0004_tokenuser'),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_worker_capabilities, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,12 @@
 from django.db import models
+from django.db.models import DEFERRED
 from django.contrib.auth.models import AbstractUser, BaseUserManager, PermissionsMixin
 from django.utils.translation import gettext_lazy as _
 
+from rest_framework_simplejwt.settings import api_settings
+
+from user.roles import CAPABILITIES, ROLE_CAPABILITIES
+
 
 class UserManager(BaseUserManager):
     use_in_migrations = True
@@ -32,6 +37,11 @@ class UserManager(BaseUserManager):
         return self._create_user(email, password, **extra_fields)
 
 
+def capability_property(name):
+    """Return a read-only property telling whether a user has a capability."""
+    return property(lambda user: bool(user.capabilities & CAPABILITIES[name]))
+
+
 class User(AbstractUser, PermissionsMixin):
     username = None  # <--- Remove username
     email = models.EmailField(_('email address'), unique=True)
@@ -67,13 +77,20 @@ class User(AbstractUser, PermissionsMixin):
     job_title = models.CharField(_('job title'), max_length=100, blank=True, null=True)
     contact_number = models.CharField(_('contact number'), max_length=20, blank=True, null=True)
 
-    can_manage_animals = models.BooleanField(_('can manage animals'), default=False)
-    can_manage_health = models.BooleanField(_('can manage health records'), default=False)
-    can_manage_feeding = models.BooleanField(_('can manage feeding'), default=False)
-    can_manage_inventory = models.BooleanField(_('can manage inventory'), default=False)
-    can_manage_sales = models.BooleanField(_('can manage sales'), default=False)
-    can_manage_employees = models.BooleanField(_('can manage employees'), default=False)
-    can_view_reports = models.BooleanField(_('can view reports'), default=False)
+    # A farm's own role, which takes the place of the built-in role
+    custom_role = models.ForeignKey('user.Role', on_delete=models.SET_NULL,
+                                    null=True, blank=True,
+                                    related_name='users',
+                                    verbose_name=_('custom role'))
+    capabilities = models.PositiveIntegerField(_('capabilities'), default=0, editable=False)
+
+    can_manage_animals = capability_property('animals')
+    can_manage_health = capability_property('health')
+    can_manage_feeding = capability_property('feeding')
+    can_manage_inventory = capability_property('inventory')
+    can_manage_sales = capability_property('sales')
+    can_manage_employees = capability_property('employees')
+    can_view_reports = capability_property('reports')
 
     USERNAME_FIELD = 'email'  # <--- Email is now login field
     REQUIRED_FIELDS = []      # No required extra fields for createsuperuser
@@ -84,21 +101,69 @@ class User(AbstractUser, PermissionsMixin):
         return self.email
 
     def save(self, *args, **kwargs):
-        # Automatically assign permissions based on role
-        role_config = {
-            'owner':       [True, True, True, True, True, True, True, True],
-            'manager':     [False, True, True, True, True, True, False, True],
-            'veterinarian':[False, True, True, False, False, False, False, False],
-            'worker':      [False, True, False, True, False, False, False, False],
-            'accountant':  [False, False, False, False, True, True, False, True],
-        }
-
-        config = role_config.get(self.role, [False]*8)
-        self.is_farm_owner, self.can_manage_animals, self.can_manage_health, self.can_manage_feeding, \
-        self.can_manage_inventory, self.can_manage_sales, self.can_manage_employees, self.can_view_reports = config
+        # Automatically assign capabilities based on role
+        if self.custom_role_id is not None:
+            self.is_farm_owner = False
+            # Read from the row, as another process may just have changed the role
+            self.capabilities = Role.objects.filter(pk=self.custom_role_id).values_list(
+                'capabilities', flat=True
+            ).first() or 0
+        else:
+            self.is_farm_owner = self.role == 'owner'
+            self.capabilities = ROLE_CAPABILITIES.get(self.role, 0)
 
         super().save(*args, **kwargs)
 
     class Meta:
         verbose_name = _('user')
         verbose_name_plural = _('users')
+
+
+# The User fields an access token carries, see user.tokens.user_claims()
+TOKEN_USER_FIELDS = ['id', 'is_active', 'is_staff', 'is_farm_owner', 'employer_id', 'capabilities', 'preferred_language']
+
+
+class TokenUser(User):
+    """
+    A user built from the claims of an access token without a query. The
+    other fields are deferred, and touching any of them loads the rest of
+    the row in one query.
+    """
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_token(cls, token):
+        claims = {field: token[field] for field in TOKEN_USER_FIELDS if field != 'id'}
+        claims['id'] = cls._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+        return cls.from_db(
+            None, [field.attname for field in cls._meta.concrete_fields],
+            [claims.get(field.attname, DEFERRED) for field in cls._meta.concrete_fields],
+        )
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred_fields = self.get_deferred_fields()
+        if fields is not None and set(fields) <= deferred_fields:
+            fields = deferred_fields
+        super().refresh_from_db(using, fields, from_queryset)
+
+
+class Role(models.Model):
+    """A role a farm owner defines for their employees, with its own capabilities."""
+    owner = models.ForeignKey(User, on_delete=models.CASCADE,
+                              related_name='roles',
+                              verbose_name=_('owner'))
+    name = models.CharField(_('name'), max_length=50)
+    capabilities = models.PositiveIntegerField(_('capabilities'), default=0)
+
+    class Meta:
+        verbose_name = _('role')
+        verbose_name_plural = _('roles')
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'name'], name='user_role_owner_name_uniq'),
+        ]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,31 @@
+# One bit per area of the farm a user may be given access to
+CAPABILITIES = {
+    'animals': 1 << 0,
+    'health': 1 << 1,
+    'feeding': 1 << 2,
+    'inventory': 1 << 3,
+    'sales': 1 << 4,
+    'employees': 1 << 5,
+    'reports': 1 << 6,
+}
+ALL_CAPABILITIES = sum(CAPABILITIES.values())
+
+
+def to_bits(names):
+    """Return the capability bits of a list of capability names."""
+    return sum(CAPABILITIES[name] for name in set(names))
+
+
+def to_names(bits):
+    """Return the names of the capabilities set in bits."""
+    return [name for name, bit in CAPABILITIES.items() if bits & bit]
+
+
+# The capabilities of the built-in roles
+ROLE_CAPABILITIES = {
+    'owner': ALL_CAPABILITIES,
+    'manager': to_bits(['animals', 'health', 'feeding', 'inventory', 'sales', 'reports']),
+    'veterinarian': to_bits(['animals', 'health']),
+    'worker': to_bits(['animals', 'feeding']),
+    'accountant': to_bits(['inventory', 'sales', 'reports']),
+}
@@ -5,6 +5,9 @@ from allauth.account import app_settings as allauth_account_settings
 from allauth.account.adapter import get_adapter
 from dj_rest_auth.registration.serializers import RegisterSerializer
 
+from user.models import Role
+from user.roles import CAPABILITIES, to_bits, to_names
+
 User = get_user_model()
 
 class CustomRegisterSerializer(RegisterSerializer):
@@ -21,6 +24,19 @@ class CustomRegisterSerializer(RegisterSerializer):
     first_name = serializers.CharField(required=True)
     last_name = serializers.CharField(required=False, allow_blank=True)
 
+class CapabilitiesField(serializers.MultipleChoiceField):
+    """Capability bits, read and written as a list of capability names."""
+
+    def __init__(self, **kwargs):
+        super().__init__(choices=list(CAPABILITIES), **kwargs)
+
+    def to_representation(self, value):
+        return to_names(value)
+
+    def to_internal_value(self, data):
+        return to_bits(super().to_internal_value(data))
+
+
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for the User model."""
 
@@ -30,20 +46,21 @@ class UserSerializer(serializers.ModelSerializer):
     employer_email = serializers.ReadOnlyField(source='employer.email', allow_null=True)
     role_display = serializers.ReadOnlyField(source='get_role_display')
     employees_count = serializers.SerializerMethodField()
+    capabilities = CapabilitiesField(read_only=True)
 
     class Meta:
         model = User
         fields = [
             'id', 'email', 'password1', 'password2', 'first_name', 'last_name',
             'farm_name', 'farm_location', 'farm_size', 'preferred_language',
-            'is_farm_owner', 'role', 'role_display', 'employer', 'employer_email',
-            'hire_date', 'job_title', 'contact_number', 'employees_count',
+            'is_farm_owner', 'role', 'role_display', 'custom_role', 'employer', 'employer_email',
+            'hire_date', 'job_title', 'contact_number', 'employees_count', 'capabilities',
             'can_manage_animals', 'can_manage_health', 'can_manage_feeding',
             'can_manage_inventory', 'can_manage_sales', 'can_manage_employees',
             'can_view_reports', 'is_active', 'date_joined'
         ]
         read_only_fields = [
-            'id', 'is_active', 'date_joined', 'is_farm_owner', 'role',
+            'id', 'is_active', 'date_joined', 'is_farm_owner', 'role', 'capabilities',
             'can_manage_animals', 'can_manage_health', 'can_manage_feeding',
             'can_manage_inventory', 'can_manage_sales', 'can_manage_employees',
             'can_view_reports'
@@ -106,6 +123,11 @@ class EmployeeSerializer(UserSerializer):
         if data.get('is_farm_owner'):
             raise serializers.ValidationError(_("Employees cannot be farm owners."))
 
+        custom_role = data.get('custom_role')
+        employer_id = data['employer'].pk if data.get('employer') else getattr(self.instance, 'employer_id', None)
+        if custom_role and custom_role.owner_id != employer_id:
+            raise serializers.ValidationError({'custom_role': [_("The role belongs to another farm.")]})
+
         return data
 
 
@@ -120,3 +142,14 @@ class EmployerSerializer(UserSerializer):
         if data.get('employer'):
             raise serializers.ValidationError(_("Farm owners cannot have employers."))
         return data
+
+
+class RoleSerializer(serializers.ModelSerializer):
+    """Serializer for the Role model."""
+    capabilities = CapabilitiesField()
+    users_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Role
+        fields = ['id', 'name', 'capabilities', 'users_count', 'owner']
+        read_only_fields = ['id', 'owner']
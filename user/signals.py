@@ -0,0 +1,41 @@
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from user.models import Role, User
+from user.roles import ROLE_CAPABILITIES
+from user.tokens import forget_claims
+
+
+@receiver(post_save, sender=User)
+def forget_user_claims(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    The next request of a saved user reads its claims from the row again,
+    also after the commit, so a request in between cannot keep old ones.
+    """
+    if not raw and update_fields != {'last_login'}:
+        forget_claims([instance.pk])
+        transaction.on_commit(lambda: forget_claims([instance.pk]))
+
+
+@receiver(post_save, sender=Role)
+def sync_role_capabilities(sender, instance, raw=False, **kwargs):
+    """Give the users of a role its capabilities with one UPDATE."""
+    if not raw:
+        users = User.objects.filter(custom_role=instance).exclude(capabilities=instance.capabilities)
+        user_ids = list(users.values_list('pk', flat=True))
+        if user_ids:
+            User.objects.filter(pk__in=user_ids).update(capabilities=instance.capabilities)
+            forget_claims(user_ids)
+
+
+@receiver(pre_delete, sender=Role)
+def restore_builtin_capabilities(sender, instance, **kwargs):
+    """The users of a deleted role fall back to the capabilities of their built-in role."""
+    users = User.objects.filter(custom_role=instance)
+    user_ids = list(users.values_list('pk', flat=True))
+    users.update(capabilities=Case(
+        *[When(role=role, then=Value(bits)) for role, bits in ROLE_CAPABILITIES.items()], default=Value(0)
+    ))
+    forget_claims(user_ids)
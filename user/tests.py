@@ -1,3 +1,140 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from ezdairy.models import DairyAnimal
+from user.models import Role, TokenUser, User
+from user.roles import CAPABILITIES, ROLE_CAPABILITIES
+from user.tokens import FarmTokenObtainPairSerializer
+
+
+class RoleCapabilityTests(TestCase):
+    """Tests for the capability bits of built-in and farm roles."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.worker = User.objects.create_user(
+            email='worker@example.com', password='pass', first_name='Worker', role='worker', employer=cls.owner
+        )
+
+    def test_builtin_roles(self):
+        self.assertEqual(self.owner.capabilities, ROLE_CAPABILITIES['owner'])
+        self.assertTrue(self.owner.is_farm_owner)
+        self.assertFalse(self.worker.is_farm_owner)
+        self.assertEqual(
+            (self.worker.can_manage_animals, self.worker.can_manage_feeding,
+             self.worker.can_manage_inventory, self.worker.can_view_reports),
+            (True, True, False, False)
+        )
+
+    def test_custom_role_follows_its_changes(self):
+        role = Role.objects.create(owner=self.owner, name='Milker', capabilities=CAPABILITIES['animals'])
+        self.worker.custom_role = role
+        self.worker.save()
+        self.assertEqual(User.objects.get(pk=self.worker.pk).capabilities, CAPABILITIES['animals'])
+
+        role.capabilities = CAPABILITIES['animals'] | CAPABILITIES['reports']
+        role.save()
+        self.assertTrue(User.objects.get(pk=self.worker.pk).can_view_reports)
+        self.worker.refresh_from_db()
+        self.worker.save()
+        self.assertTrue(User.objects.get(pk=self.worker.pk).can_view_reports)
+
+        # A change made by another process is read from the row on save
+        Role.objects.filter(pk=role.pk).update(capabilities=CAPABILITIES['health'])
+        self.worker.save()
+        self.assertEqual(User.objects.get(pk=self.worker.pk).capabilities, CAPABILITIES['health'])
+
+        role.delete()
+        self.assertEqual(User.objects.get(pk=self.worker.pk).capabilities, ROLE_CAPABILITIES['worker'])
+
+    def test_roles_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.post(reverse('role-list'), {'name': 'Clerk', 'capabilities': ['sales', 'reports']}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Role.objects.get().capabilities, CAPABILITIES['sales'] | CAPABILITIES['reports'])
+        self.assertEqual(sorted(client.get(reverse('role-list')).data['results'][0]['capabilities']), ['reports', 'sales'])
+        client.force_authenticate(self.worker)
+        self.assertEqual(client.get(reverse('role-list')).status_code, 403)
+
+    def test_access_token_carries_capabilities(self):
+        token = AccessToken(str(FarmTokenObtainPairSerializer.get_token(self.worker).access_token))
+        self.assertEqual(
+            (token['capabilities'], token['farm_owner_id'], token['is_farm_owner']),
+            (ROLE_CAPABILITIES['worker'], self.owner.pk, False)
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        # The first request reads the claims to check the token against
+        cache.clear()
+        with self.assertNumQueries(2):
+            self.assertEqual(client.get(reverse('dairy-animal-list')).status_code, 200)
+        # Later neither authentication nor the permission checks read the user row
+        with self.assertNumQueries(1):
+            self.assertEqual(client.get(reverse('dairy-animal-list')).status_code, 200)
+        self.assertEqual(client.get(reverse('expense-list')).status_code, 403)
+
+
+class TokenUserTests(TestCase):
+    """Tests for the user built from access token claims on read requests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='owner@example.com', password='pass', first_name='Owner')
+        cls.worker = User.objects.create_user(
+            email='worker@example.com', password='pass', first_name='Worker', role='worker',
+            employer=cls.owner, preferred_language='ur'
+        )
+
+    def setUp(self):
+        cache.clear()
+        token = FarmTokenObtainPairSerializer.get_token(self.worker).access_token
+        self.token = AccessToken(str(token))
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_fields_outside_the_claims_load_the_row_once(self):
+        with self.assertNumQueries(0):
+            user = TokenUser.from_token(self.token)
+            self.assertEqual((user.pk, user.employer_id, user.is_farm_owner), (self.worker.pk, self.owner.pk, False))
+            self.assertTrue(user.can_manage_animals)
+        with self.assertNumQueries(1):
+            self.assertEqual((user.email, user.first_name, user.hire_date), ('worker@example.com', 'Worker', None))
+        self.assertEqual(User.objects.filter(employer=user).count(), 0)
+
+    def test_language_is_read_from_the_token(self):
+        response = self.client.get(reverse('dairy-animal-list'))
+        self.assertEqual(response['Content-Language'], 'ur')
+        self.assertEqual(self.client.get(reverse('user-me')).data['email'], 'worker@example.com')
+
+    def test_writes_load_the_user(self):
+        response = self.client.post(reverse('role-list'), {'name': 'Clerk', 'capabilities': []}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertIs(type(response.wsgi_request.user), User)
+
+    def test_deactivated_user_is_refused(self):
+        self.client.get(reverse('dairy-animal-list'))
+        with self.assertNumQueries(1):  # the animal count, not the user
+            self.assertEqual(self.client.get(reverse('dairy-animal-list')).status_code, 200)
+        self.worker.is_active = False
+        self.worker.save()
+        self.assertEqual(self.client.get(reverse('dairy-animal-list')).status_code, 401)
+        # Not even a cache flush lets the old claims through
+        cache.clear()
+        self.assertEqual(self.client.get(reverse('dairy-animal-list')).status_code, 401)
+
+    def test_changed_role_refuses_older_tokens(self):
+        role = Role.objects.create(owner=self.owner, name='Vet', capabilities=CAPABILITIES['animals'])
+        self.worker.custom_role = role
+        self.worker.save()
+        self.assertEqual(self.client.get(reverse('dairy-animal-list')).status_code, 401)
+        token = FarmTokenObtainPairSerializer.get_token(self.worker).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get(reverse('dairy-animal-list')).status_code, 200)
+        role.capabilities = CAPABILITIES['health']
+        role.save()
+        self.assertEqual(self.client.get(reverse('dairy-animal-list')).status_code, 401)
@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user.models import TOKEN_USER_FIELDS, User
+
+# The claims a user's access tokens must carry to be trusted, read from the
+# user row on first use and dropped whenever the user or their role changes.
+# An entry outlives no token issued before it was written.
+USER_CLAIMS_KEY = 'user:claims:{}'
+
+
+def user_claims(user):
+    """
+    Return the claims an access token carries, so permission checks and
+    read requests need not read the user row, see TokenUser.
+    """
+    claims = {field: getattr(user, field) for field in TOKEN_USER_FIELDS if field != 'id'}
+    claims['farm_owner_id'] = user.pk if user.is_farm_owner else user.employer_id
+    return claims
+
+
+def remember_claims(user):
+    """Record the current claims of a user in the shared cache and return them."""
+    claims = user_claims(user)
+    cache.set(USER_CLAIMS_KEY.format(user.pk), claims, api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    return claims
+
+
+def forget_claims(user_ids):
+    """Drop the recorded claims of changed users."""
+    cache.delete_many([USER_CLAIMS_KEY.format(pk) for pk in user_ids])
+
+
+def claims_are_current(token):
+    """
+    Return whether the claims of an access token still match its user, so
+    a deactivated user or a changed role is not trusted until the token
+    expires. The user row is only read when the claims are not cached.
+    """
+    user_id = token[api_settings.USER_ID_CLAIM]
+    claims = cache.get(USER_CLAIMS_KEY.format(user_id))
+    if claims is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            return False
+        claims = remember_claims(user)
+    return all(token.get(claim) == value for claim, value in claims.items())
+
+
+class FarmRefreshToken(RefreshToken):
+    """
+    A refresh token whose access token carries the user's capabilities.
+    The claims are not stored in the refresh token itself, so an access
+    token from a later refresh falls back to the user row. An access token
+    whose claims went stale is refused, see claims_are_current().
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.user_claims = user_claims(user)
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        for claim, value in getattr(self, 'user_claims', {}).items():
+            access[claim] = value
+        return access
+
+
+class FarmTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair serializer issuing FarmRefreshToken."""
+    token_class = FarmRefreshToken
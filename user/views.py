@@ -3,7 +3,11 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth import get_user_model
-from user.serializers import UserSerializer, EmployeeSerializer
+from django.db.models import Count
+from ezcore.mixins import FarmScopedQuerySetMixin
+from ezcore.permissions import HasFarmAccess
+from user.models import Role
+from user.serializers import UserSerializer, EmployeeSerializer, RoleSerializer
 from django.http import HttpResponse
 
 User = get_user_model()
@@ -116,5 +120,20 @@ class UserViewSet(viewsets.ModelViewSet):
             employee.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
 
+class RoleViewSet(FarmScopedQuerySetMixin, viewsets.ModelViewSet):
+    """ViewSet for viewing and editing the current user's farm roles."""
+
+    queryset = Role.objects.annotate(users_count=Count('users'))
+    serializer_class = RoleSerializer
+    permission_classes = [permissions.IsAuthenticated, HasFarmAccess, CanManageEmployees]
+    capability = 'employees'
+
+    def get_queryset(self):
+        # The annotation drops the model ordering, so pages need their own
+        return super().get_queryset().order_by('name', 'id')
+
+    def perform_create(self, serializer):
+        serializer.save(owner_id=self.get_farm_owner_id())
+
 def user_view(request):
     return HttpResponse("User view is working!")